@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from metrics import span
+from scoring import SEVERITY_LEVELS, WEIGHT_CATEGORIES
+
+ADVICE_FEATURES = ['AHI', 'BMI', 'Severity', 'Weight Category']
+CATEGORIES_PATH = 'advice_categories.json'
+
+# LabelEncoder sorts classes alphabetically; used when model_two.py has not saved the mapping
+DEFAULT_CATEGORIES = {
+    'Severity': sorted(SEVERITY_LEVELS),
+    'Weight Category': sorted(WEIGHT_CATEGORIES),
+}
+
+
+def load_categories(path=CATEGORIES_PATH):
+    """Load the category classes saved next to model.pkl by model_two.py."""
+    if not os.path.exists(path):
+        return DEFAULT_CATEGORIES
+    with open(path) as f:
+        return json.load(f)
+
+
+class AdvicePredictor:
+    """Thread-safe nutrition & sleep advice inference.
+
+    Categories are encoded with the mapping the model was trained with, and a
+    StandardScaler-only preprocessor is folded into a mean/scale pair applied to
+    a preallocated per-thread row, so a prediction needs no LabelEncoder refit,
+    DataFrame or preprocessor validation.
+    """
+
+    def __init__(self, model, preprocessor, categories=None):
+        self.model = model
+        self.preprocessor = preprocessor
+        categories = categories or DEFAULT_CATEGORIES
+        self.severity_codes = _codes(categories['Severity'], SEVERITY_LEVELS)
+        self.weight_codes = _codes(categories['Weight Category'], WEIGHT_CATEGORIES)
+        self._scaler = _scaler_params(preprocessor)
+        self._local = threading.local()
+
+    def encode(self, ahi, bmi, severity, weight_category, out):
+        """Write one encoded feature row into `out`."""
+        out[0] = ahi
+        out[1] = bmi
+        out[2] = _code(self.severity_codes, 'Severity', severity)
+        out[3] = _code(self.weight_codes, 'Weight Category', weight_category)
+        return out
+
+    def transform(self, X):
+        """Apply the preprocessor to an encoded feature matrix (in place when possible)."""
+        if self._scaler is None:
+            return self.preprocessor.transform(pd.DataFrame(X, columns=ADVICE_FEATURES))
+        mean, scale = self._scaler
+        X -= mean
+        X /= scale
+        return X
+
+    def predict(self, ahi, bmi, severity, weight_category):
+        """Predict the advice for a single patient."""
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.empty((1, len(ADVICE_FEATURES)))
+        self.encode(ahi, bmi, severity, weight_category, row[0])
+        with span('advice.transform'):
+            X = self.transform(row)
+        with span('advice.predict'):
+            return self.model.predict(X)[0]
+
+    def predict_batch(self, ahi, bmi, severity, weight_category):
+        """Predict the advice for arrays of patients in one model call."""
+        X = np.empty((len(ahi), len(ADVICE_FEATURES)))
+        X[:, 0] = ahi
+        X[:, 1] = bmi
+        X[:, 2] = [_code(self.severity_codes, 'Severity', label) for label in severity]
+        X[:, 3] = [_code(self.weight_codes, 'Weight Category', label) for label in weight_category]
+        return self.model.predict(self.transform(X))
+
+
+def _codes(classes, ladder):
+    """Label -> code of the trained classes, plus every rung of `ladder` the training data lacked.
+
+    The scoring rules can produce a level the training set never had (say no
+    'Severe Obesity' rows); it gets the code of the nearest trained rung below
+    it, or above it when there is none below.
+    """
+    codes = {label: code for code, label in enumerate(classes)}
+    trained = [i for i, label in enumerate(ladder) if label in codes]
+    if trained:
+        for i, label in enumerate(ladder):
+            if label not in codes:
+                nearest = max((j for j in trained if j < i), default=min(trained))
+                codes[label] = codes[ladder[nearest]]
+    return codes
+
+
+def _code(codes, column, label):
+    try:
+        return codes[label]
+    except KeyError:
+        raise ValueError(f"Unknown {column}: {label}") from None
+
+
+def _scaler_params(preprocessor):
+    """Return (mean, scale) if the preprocessor is just a fitted StandardScaler, else None."""
+    scaler = preprocessor
+    if isinstance(preprocessor, Pipeline):
+        if len(preprocessor.steps) != 1:
+            return None
+        scaler = preprocessor.steps[0][1]
+    if type(scaler) is not StandardScaler:
+        return None
+    n_features = len(ADVICE_FEATURES)
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+    return np.asarray(mean, dtype=float), np.asarray(scale, dtype=float)
@@ -0,0 +1,146 @@
+import json
+import math
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Request body of /api/v1/predict: field -> (type, minimum, maximum, description)
+PATIENT_SCHEMA = {
+    'age': ('number', 1, 120, 'Age in years'),
+    'gender': ('string', None, None, 'Gender'),
+    'weight': ('number', 20, 400, 'Weight in kg'),
+    'height': ('number', 50, 250, 'Height in cm'),
+    'oxygen_saturation': ('number', 50, 100, 'Blood oxygen saturation in %'),
+    'pulse': ('number', 20, 250, 'Pulse rate in beats per minute'),
+    'BPsys': ('number', 50, 300, 'Systolic blood pressure in mmHg'),
+    'BPdia': ('number', 20, 200, 'Diastolic blood pressure in mmHg'),
+}
+
+# Response field -> key in the values build_prediction returns for the result page
+RESPONSE_FIELDS = {
+    'severity': 'prediction',
+    'ahi': 'ahi_score',
+    'bmi': 'bmi',
+    'weight_category': 'weight_category',
+    'sleep_quality': 'sleep_quality',
+    'sleep_quality_percentage': 'sleep_quality_percentage',
+    'recommendation': 'recommendation',
+    'advice': 'nutrition_advice',
+    'snore_score': 'snore_score',
+}
+
+# HTTP status for each error code
+ERROR_STATUS = {
+    'invalid_body': 400,
+    'missing_field': 422,
+    'invalid_type': 422,
+    'out_of_range': 422,
+    'unknown_field': 422,
+    'invalid_audio': 422,
+    'model_unavailable': 503,
+    'internal_error': 500,
+}
+
+
+class ApiError(Exception):
+    """An error reported to API clients as {"error": {"code", "message", "field"}}."""
+
+    def __init__(self, code, message, field=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.field = field
+        self.status = ERROR_STATUS[code]
+
+    def to_dict(self):
+        error = {'code': self.code, 'message': self.message}
+        if self.field is not None:
+            error['field'] = self.field
+        return {'error': error}
+
+
+def is_json(content_type):
+    """Whether a Content-Type header names JSON (application/json or application/*+json), as Flask's is_json."""
+    mimetype = content_type.split(';', 1)[0].strip().lower()
+    return mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json'))
+
+
+def json_schema():
+    """PATIENT_SCHEMA as a JSON Schema document, served at /api/v1/schema."""
+    properties = {}
+    for field, (kind, minimum, maximum, description) in PATIENT_SCHEMA.items():
+        spec = {'type': kind, 'description': description}
+        if minimum is not None:
+            spec['minimum'] = minimum
+            spec['maximum'] = maximum
+        properties[field] = spec
+    return {'type': 'object', 'properties': properties, 'required': list(PATIENT_SCHEMA),
+            'additionalProperties': False}
+
+
+def validate_patient(data, from_form=False):
+    """Check a request body against PATIENT_SCHEMA and return the patient dict build_prediction takes.
+
+    JSON bodies must carry real numbers; form posts (from_form=True) carry strings,
+    which are converted. Raises ApiError on the first invalid field.
+    """
+    if not isinstance(data, dict) and not from_form:
+        raise ApiError('invalid_body', "Request body must be a JSON object")
+    if not from_form:
+        for field in data:
+            if field not in PATIENT_SCHEMA:
+                raise ApiError('unknown_field', f"Unknown field: {field}", field)
+
+    values = {}
+    for field, (kind, minimum, maximum, _) in PATIENT_SCHEMA.items():
+        value = data.get(field)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            raise ApiError('missing_field', f"Missing input: {field}", field)
+        if kind == 'string':
+            if not isinstance(value, str):
+                raise ApiError('invalid_type', f"{field} must be a string", field)
+            values[field] = value
+            continue
+        if from_form:
+            try:
+                value = float(value)
+            except ValueError:
+                raise ApiError('invalid_type', f"{field} must be a number", field)
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ApiError('invalid_type', f"{field} must be a number", field)
+        if not math.isfinite(value) or not minimum <= value <= maximum:
+            raise ApiError('out_of_range', f"{field} must be between {minimum} and {maximum}", field)
+        values[field] = float(value)
+
+    return {
+        'age': values['age'],
+        'gender': values['gender'],
+        'weight': values['weight'],
+        'height': values['height'] / 100,  # Convert cm to meters
+        'oxygen_saturation': values['oxygen_saturation'],
+        'pulse_rate': values['pulse'],
+        'BPsys': values['BPsys'],
+        'BPdia': values['BPdia'],
+    }
+
+
+def prediction_response(result):
+    """The API fields of a build_prediction result, with numpy scalars turned into plain Python values."""
+    response = {}
+    for field, key in RESPONSE_FIELDS.items():
+        value = result[key]
+        response[field] = value.item() if hasattr(value, 'item') else value
+    if 'snore_timeline' in result:
+        response['snore_timeline'] = result['snore_timeline']
+    if 'features' in result:
+        response['features'] = result['features']
+    return response
+
+
+def dumps(payload):
+    """Serialize a response body to bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
@@ -1,172 +1,167 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Request, render_template, request, jsonify, url_for, current_app, g
 import joblib
 import pandas as pd
 import os
-import librosa
-import numpy as np
+import shutil
+import tempfile
+import time
+from bisect import bisect_right
 from werkzeug.utils import secure_filename
 from datetime import datetime
-from sklearn.preprocessing import LabelEncoder
-from chatbot import get_chatbot_response
+from api import ApiError, dumps, json_schema, prediction_response, validate_patient
+import metrics
+from metrics import span
+from chatbot import get_chatbot_response, knowledge_index
+from chat_sessions import SessionStore
+from advice import AdvicePredictor, load_categories
+from cache import ScoringCache
+from cleaning import CleaningTransform, patient_record
+from model_registry import ModelRegistry
+from predict_ahi import MODEL_DIR as SLEEP_MODEL_DIR, latest_manifest, load_artifact
+from tree_runtime import load_model
+from jobs import JobQueue, snore_score_job
+from feature_store import FeatureStore, hash_stream
+from batch_predict import predict_batch, AUDIO_COLUMN
+from scoring import (AGE_EDGES, BMI_EDGES, SLEEP_QUALITY_PERCENTAGES, calculate_sleep_quality, predict_ahi,
+                     get_severity_level, get_weight_category, get_doctor_recommendation)
+
+class SpooledRequest(Request):
+    """Keep uploaded files in memory up to AUDIO_SPOOL_THRESHOLD bytes, spooling larger ones to disk."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=current_app.config['AUDIO_SPOOL_THRESHOLD'], mode='rb+')
 
 app = Flask(__name__)
+app.request_class = SpooledRequest
 app.config['UPLOAD_FOLDER'] = 'uploads/'
-
-# Initialize LabelEncoder
-label_encoder = LabelEncoder()
+# Uploads above this size are spooled to a temporary file, removed when the request ends
+app.config['AUDIO_SPOOL_THRESHOLD'] = int(os.environ.get('AUDIO_SPOOL_THRESHOLD', 32 * 1024 * 1024))
+# Advice/scoring caches; set SCORING_CACHE_DB to share entries across gunicorn workers
+app.config['SCORING_CACHE_SIZE'] = int(os.environ.get('SCORING_CACHE_SIZE', 4096))
+app.config['SCORING_CACHE_TTL'] = float(os.environ.get('SCORING_CACHE_TTL', 0)) or None
+app.config['SCORING_CACHE_DB'] = os.environ.get('SCORING_CACHE_DB')
+app.config['SCORING_CACHE_DB_SIZE'] = int(os.environ.get('SCORING_CACHE_DB_SIZE', 100000))
+# Content-addressed store of extracted audio features
+app.config['FEATURE_STORE_DIR'] = os.environ.get('FEATURE_STORE_DIR', 'feature_store')
+app.config['FEATURE_STORE_MAX_BYTES'] = int(os.environ.get('FEATURE_STORE_MAX_BYTES', 512 * 1024 * 1024))
+# Worker processes for asynchronous snore analysis (defaults to one per CPU)
+app.config['SNORE_JOB_WORKERS'] = int(os.environ.get('SNORE_JOB_WORKERS', 0)) or None
+# Chat conversation state kept per session id (least recently used sessions are dropped first)
+app.config['CHAT_SESSION_LIMIT'] = int(os.environ.get('CHAT_SESSION_LIMIT', 50000))
+app.config['CHAT_SESSION_TTL'] = float(os.environ.get('CHAT_SESSION_TTL', 1800))
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Load models
-model_sleep = joblib.load('trained_sleep_model.pkl')
-with open('model.pkl', 'rb') as f:
-    model_advice = joblib.load(f)
-with open('preprocessor.pkl', 'rb') as f:
-    preprocessor = joblib.load(f)
-with open("snore_model.pkl", "rb") as f:
-    snore_model = joblib.load(f)
-
-def extract_features(file_path):
-    """Extract audio features for snoring analysis."""
+# Register models; each one is loaded on first use (set PRELOAD_MODELS=1 with gunicorn --preload
+# to load them in the master so forked workers share the memory-mapped arrays)
+models = ModelRegistry()
+
+def load_sleep_model():
+    """The newest AHI model version written by predict_ahi.py (the unversioned pickle before its first run)."""
+    manifest = latest_manifest(SLEEP_MODEL_DIR)
+    if manifest is None:
+        return joblib.load('trained_sleep_model.pkl', mmap_mode=models.mmap_mode)
+    return load_artifact(manifest, models.mmap_mode)
+
+# A version's manifest is moved into the model directory last, so its mtime changes once the version is complete
+models.register('sleep', loader=load_sleep_model, watch=SLEEP_MODEL_DIR)
+# Tree models run from their compiled node arrays when `python tree_runtime.py` has exported them
+models.register('advice', 'model.pkl', loader=lambda: load_model('model.pkl', models.mmap_mode))
+models.register('preprocessor', 'preprocessor.pkl')
+models.register('snore', 'snore_model.pkl', loader=lambda: load_model('snore_model.pkl', models.mmap_mode))
+models.register('advisor', loader=lambda: AdvicePredictor(models.get('advice'), models.get('preprocessor'),
+                                                          load_categories()))
+# Medians and codes fitted by clean_data.py, to clean patients the way the training rows were
+models.register('cleaning', 'cleaned_dataset.state.json',
+                loader=lambda: CleaningTransform.load(models.path('cleaning')))
+if os.environ.get('PRELOAD_MODELS'):
+    models.preload('advisor', 'snore')
+
+# AHI is rounded to one decimal and BMI to two before they reach the advice model,
+# so keying on the values the app already computes keeps the key space small
+advice_cache = ScoringCache('advice', app.config['SCORING_CACHE_SIZE'], app.config['SCORING_CACHE_TTL'],
+                            app.config['SCORING_CACHE_DB'], app.config['SCORING_CACHE_DB_SIZE'])
+scoring_cache = ScoringCache('scoring', app.config['SCORING_CACHE_SIZE'], app.config['SCORING_CACHE_TTL'],
+                             app.config['SCORING_CACHE_DB'], app.config['SCORING_CACHE_DB_SIZE'])
+
+# Features of previously seen recordings, keyed by the hash of their bytes
+feature_store = FeatureStore(app.config['FEATURE_STORE_DIR'], app.config['FEATURE_STORE_MAX_BYTES'])
+
+# Snore-analysis jobs submitted with /predict?async=1
+snore_jobs = JobQueue(max_workers=app.config['SNORE_JOB_WORKERS'])
+
+# Per-session chat context, so replies like "yes" answer the last follow-up question
+chat_sessions = SessionStore(app.config['CHAT_SESSION_LIMIT'], app.config['CHAT_SESSION_TTL'])
+# Load (or build and save) the chatbot's retrieval index now, not during the first /chat request
+knowledge_index()
+
+def score_patient(bmi, oxygen_saturation, snore_score, age, pulse_rate):
+    """Rule-based AHI, severity and sleep quality, cached on inputs quantized to what the rules use.
+
+    BMI and age only select a rung of their ladders, so the rung is the key. Oxygen saturation
+    and pulse are scored as whole numbers, as oximeters report them, and the snore score to the
+    one decimal the result page shows; near-identical patients then share a cache entry.
+    """
+    oxygen_saturation = round(oxygen_saturation)
+    pulse_rate = round(pulse_rate)
+    snore_score = round(float(snore_score), 1)
+    key = (bisect_right(BMI_EDGES, bmi), oxygen_saturation, snore_score, bisect_right(AGE_EDGES, age), pulse_rate)
+
+    def compute():
+        with span('scoring.rules'):
+            predicted_ahi = predict_ahi(bmi, oxygen_saturation, snore_score, age, pulse_rate)
+            sleep_quality = calculate_sleep_quality(predicted_ahi, snore_score, oxygen_saturation, pulse_rate)
+            return predicted_ahi, get_severity_level(predicted_ahi), sleep_quality
+
+    return scoring_cache.get_or_compute(key, compute)
+
+def get_advice(predicted_ahi, bmi, severity, weight_category):
+    """Personalized advice from the advice model, cached on its four inputs."""
+    key = (predicted_ahi, bmi, severity, weight_category)
+    return advice_cache.get_or_compute(
+        key, lambda: models.get('advisor').predict(predicted_ahi, bmi, severity, weight_category))
+
+def cleaned_features(patient, snore_score):
+    """The patient as a row of cleaned_dataset.csv, cleaned by the same transform as clean_data.py."""
+    try:
+        transform = models.get('cleaning')
+    except FileNotFoundError:
+        # The fitted state is written by clean_data.py and is not part of the checkout
+        raise ApiError('model_unavailable', f"Cleaned features need {models.path('cleaning')}; "
+                                            "run clean_data.py to create it", 'features') from None
+    with span('cleaning.transform'):
+        return transform.transform_records([patient_record(patient, snore_score)])[0]
+
+def extract_features(source):
+    """Extract audio features for snoring analysis from a file path or an upload stream."""
     try:
-        y, sr = librosa.load(file_path, sr=22050)
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-        chroma = librosa.feature.chroma_stft(y=y, sr=sr)
-        mel = librosa.feature.melspectrogram(y=y, sr=sr)
-        features = np.hstack([np.mean(mfccs, axis=1), np.mean(chroma, axis=1), np.mean(mel, axis=1)])
-        return features
+        # Imported here so librosa is only loaded once audio is actually analysed
+        from audio_features import extract_features_streaming
+
+        # Stream the recording so full-night uploads stay within bounded memory
+        return extract_features_streaming(source)
     except Exception as e:
         print(f"Error extracting features: {e}")
         return None
 
-def calculate_sleep_quality(ahi, snoring_score, oxygen_saturation, pulse):
-    """Calculate overall sleep quality score based on multiple factors."""
-    # Normalize values
-    ahi_score = max(0, 100 - (ahi * 2))  # Convert AHI to score (0-100)
-    snoring_score_norm = max(0, 100 - (snoring_score * 10))  # Convert snoring score (0-100)
-    oxygen_score = (oxygen_saturation - 80) * 5  # Convert oxygen saturation to score (0-100)
-    pulse_score = max(0, 100 - abs(pulse - 60) * 2)  # Convert pulse to score (0-100)
-    
-    # Weighted average
-    weights = {'ahi': 0.4, 'snoring': 0.3, 'oxygen': 0.2, 'pulse': 0.1}
-    total_score = (
-        ahi_score * weights['ahi'] +
-        snoring_score_norm * weights['snoring'] +
-        oxygen_score * weights['oxygen'] +
-        pulse_score * weights['pulse']
-    )
-    
-    # Convert to quality level
-    if total_score >= 90:
-        return "Good"
-    elif total_score >= 80:
-        return "Very Mild"
-    elif total_score >= 70:
-        return "Mild"
-    elif total_score >= 60:
-        return "Moderate"
-    elif total_score >= 50:
-        return "Moderately Poor"
-    elif total_score >= 40:
-        return "Poor"
-    elif total_score >= 30:
-        return "Very Poor"
-    else:
-        return "Extremely Poor"
-
-def predict_ahi(bmi, oxygen_saturation, snore_score, age, pulse_rate):
-    """Predict AHI based on key factors with improved accuracy."""
-    # Base AHI calculation based on BMI (primary factor)
-    base_ahi = 0
-    
-    # BMI impact (strong correlation)
-    if bmi >= 40:
-        base_ahi = 35  # Severe obesity
-    elif bmi >= 35:
-        base_ahi = 25  # Moderate obesity
-    elif bmi >= 30:
-        base_ahi = 15  # Mild obesity
-    elif bmi >= 25:
-        base_ahi = 8   # Overweight
-    else:
-        base_ahi = 3   # Normal weight
-
-    # Oxygen saturation impact (inverse relationship)
-    oxygen_factor = 0
-    if oxygen_saturation < 90:
-        oxygen_factor = 12  # Severe desaturation
-    elif oxygen_saturation < 93:
-        oxygen_factor = 8   # Moderate desaturation
-    elif oxygen_saturation < 95:
-        oxygen_factor = 4   # Mild desaturation
-    else:
-        oxygen_factor = 0   # Normal saturation
-
-    # Snoring impact (weighted less than BMI and oxygen)
-    snoring_factor = snore_score * 1.5  # Reduced impact
-
-    # Age impact (older age increases risk)
-    age_factor = 0
-    if age >= 60:
-        age_factor = 4
-    elif age >= 50:
-        age_factor = 2
-    elif age >= 40:
-        age_factor = 1
-    else:
-        age_factor = 0
-
-    # Pulse rate impact (minimal impact)
-    pulse_factor = 0
-    if pulse_rate >= 90:
-        pulse_factor = 2
-    elif pulse_rate >= 80:
-        pulse_factor = 1
-    else:
-        pulse_factor = 0
-
-    # Calculate final AHI with weighted factors
-    final_ahi = (
-        base_ahi * 0.5 +           # BMI is most important (50%)
-        oxygen_factor * 0.3 +      # Oxygen saturation (30%)
-        snoring_factor * 0.1 +     # Snoring (10%)
-        age_factor * 0.05 +        # Age (5%)
-        pulse_factor * 0.05        # Pulse rate (5%)
-    )
-    
-    # Apply non-linear scaling to prevent extreme values
-    final_ahi = final_ahi * (1 - 0.1 * (final_ahi / 100))  # Diminishing returns
-    
-    # Ensure AHI is within reasonable range (0-100)
-    final_ahi = max(0, min(100, final_ahi))
-    
-    # Round to one decimal place
-    return round(final_ahi, 1)
-
-def get_severity_level(ahi):
-    """Get severity level based on AHI score."""
-    if ahi >= 30:
-        return "Severe"
-    elif ahi >= 15:
-        return "Moderate"
-    elif ahi >= 5:
-        return "Mild"
-    else:
-        return "Normal"
-
-def get_weight_category(bmi):
-    """Get weight category based on BMI."""
-    if bmi >= 40:
-        return "Severe Obesity"
-    elif bmi >= 35:
-        return "Moderate Obesity"
-    elif bmi >= 30:
-        return "Mild Obesity"
-    elif bmi >= 25:
-        return "Overweight"
-    else:
-        return "Normal Weight"
+@app.before_request
+def start_request_timer():
+    if metrics.enabled():
+        g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        metrics.request_seconds.observe(time.perf_counter() - start, request.endpoint or 'unmatched',
+                                        request.method, str(response.status_code))
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Stage and request latency histograms in the Prometheus text format."""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def home():
@@ -176,123 +171,290 @@ def home():
 def prediction():
     return render_template('prediction.html')
 
+def parse_patient_form(form):
+    """Validate the patient fields of a prediction form and convert them to numbers."""
+    # Required fields check
+    required_fields = ['age', 'gender', 'weight', 'height', 'oxygen_saturation', 'pulse', 'BPsys', 'BPdia']
+    for field in required_fields:
+        if field not in form or form[field].strip() == '':
+            raise ValueError(f"Missing input: {field}")
+
+    return {
+        'age': float(form.get('age')),
+        'gender': form.get('gender'),
+        'weight': float(form.get('weight')),
+        'height': float(form.get('height')) / 100,  # Convert cm to meters
+        'oxygen_saturation': float(form.get('oxygen_saturation')),
+        'pulse_rate': float(form.get('pulse')),
+        'BPsys': float(form.get('BPsys')),
+        'BPdia': float(form.get('BPdia')),
+    }
+
+def build_prediction(patient, snore_score):
+    """Score a patient and return the values shown on the result page."""
+    age = patient['age']
+    oxygen_saturation = patient['oxygen_saturation']
+    pulse_rate = patient['pulse_rate']
+
+    # Calculate BMI
+    bmi = round(patient['weight'] / (patient['height'] ** 2), 2)
+
+    # Predict AHI, severity level and overall sleep quality
+    predicted_ahi, severity, sleep_quality = score_patient(bmi, oxygen_saturation, snore_score, age, pulse_rate)
+
+    # Get weight category
+    weight_category = get_weight_category(bmi)
+
+    # Calculate sleep quality percentage
+    sleep_quality_percentage = SLEEP_QUALITY_PERCENTAGES.get(sleep_quality, 50)
+
+    # Generate doctor's recommendation based on severity
+    doctor_recommendation = get_doctor_recommendation(predicted_ahi)
+
+    # Predict nutrition & sleep advice
+    personalized_advice = get_advice(predicted_ahi, bmi, severity, weight_category)
+
+    return dict(prediction=severity,
+                ahi_score=predicted_ahi,
+                bmi=round(bmi, 1),
+                weight_category=weight_category,
+                sleep_quality=sleep_quality,
+                sleep_quality_percentage=sleep_quality_percentage,
+                recommendation=doctor_recommendation,
+                nutrition_advice=personalized_advice,
+                snore_score=round(snore_score, 1),
+                oxygen_saturation=oxygen_saturation,
+                pulse_rate=pulse_rate,
+                bp_sys=patient['BPsys'],
+                bp_dia=patient['BPdia'],
+                age=age)
+
+def submit_snore_job(patient, audio_stream, filename):
+    """Queue snore analysis of an upload on the worker pool and return the job id."""
+    # Worker processes need a file; they delete it once it has been decoded
+    with span('upload.save'):
+        fd, audio_path = tempfile.mkstemp(dir=app.config['UPLOAD_FOLDER'], suffix=os.path.splitext(filename)[1])
+        with os.fdopen(fd, 'wb') as f:
+            shutil.copyfileobj(audio_stream, f)
+
+    def finish(output):
+        # Runs in this process once the worker returns the snore score; undecodable audio fails the job
+        return build_prediction(patient, output['snore_score'])
+
+    return snore_jobs.submit(snore_score_job, audio_path, models.path('snore'), True, on_done=finish)
+
+def invalid_audio():
+    return ApiError('invalid_audio', "The snoringSound recording could not be decoded", 'snoringSound')
+
+def score_recording(audio_stream):
+    """Snore score of an uploaded recording; raises ApiError('invalid_audio') if it cannot be decoded."""
+    # Hash the upload so re-submitted recordings skip decoding; the audio itself is
+    # decoded straight from the request stream and never written to uploads/
+    with span('upload.hash'):
+        content_hash = hash_stream(audio_stream)
+    with span('feature_store.get'):
+        features = feature_store.get(content_hash)
+    if features is None:
+        features = extract_features(audio_stream)
+        if features is not None:
+            feature_store.put(content_hash, features)
+    if features is None:
+        raise invalid_audio()
+    snore_model = models.get('snore')
+    with span('snore_model.predict'):
+        return snore_model.predict(features.reshape(1, -1))[0]
+
+def recording_timeline(audio_stream):
+    """Score sliding windows of an uploaded recording and summarise its snore events."""
+    from snore_events import window_features, score_windows
+
+    with span('upload.hash'):
+        content_hash = hash_stream(audio_stream)
+    with span('feature_store.get'):
+        windows = feature_store.get_windows(content_hash)
+    if windows is None:
+        try:
+            windows = window_features(audio_stream)
+        except Exception as e:
+            print(f"Error extracting windowed features: {e}")
+            raise invalid_audio() from e
+        feature_store.put_windows(content_hash, *windows)
+    snore_model = models.get('snore')
+    with span('snore_model.predict'):
+        return score_windows(*windows, snore_model)
+
+def run_prediction(patient, audio_stream=None, filename='', options=None):
+    """Score a patient and any uploaded recording; returns the result values, or a job id in async mode."""
+    options = options or {}
+    if audio_stream is None:
+        return build_prediction(patient, 0)
+
+    # Async mode: analyse the recording in a worker process and return a job id right away
+    if options.get('async') == '1':
+        return {'job_id': submit_snore_job(patient, audio_stream, filename)}
+
+    # Timeline mode: score sliding windows and summarise snore events over the night
+    if options.get('timeline') == '1':
+        timeline = recording_timeline(audio_stream)
+        return dict(build_prediction(patient, timeline['snore_score']), snore_timeline=timeline)
+
+    # Extract features from audio and predict snoring severity
+    return build_prediction(patient, score_recording(audio_stream))
+
+def run_api_prediction(patient, audio_stream=None, filename='', options=None):
+    """run_prediction for /api/v1/predict; features=1 adds the cleaned feature row of the patient."""
+    options = options or {}
+    result = run_prediction(patient, audio_stream, filename, options)
+    if options.get('features') == '1' and 'job_id' not in result:
+        result['features'] = cleaned_features(patient, result['snore_score'])
+    return result
+
+def api_error(error):
+    """The ApiError reported to API clients for an exception raised while predicting."""
+    if isinstance(error, ApiError):
+        return error
+    if isinstance(error, FileNotFoundError):
+        return ApiError('model_unavailable', f"Model artifact not found: {error.filename}")
+    print("Error occurred:", error)
+    return ApiError('internal_error', "Prediction failed")
+
+def uploaded_audio(files):
+    """(stream, secure filename) of the snoringSound upload, or (None, '') if none was sent."""
+    audio_file = files.get('snoringSound')
+    if audio_file is None or audio_file.filename == '':
+        return None, ''
+    return audio_file.stream, secure_filename(audio_file.filename)
+
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
-        # Required fields check
-        required_fields = ['age', 'gender', 'weight', 'height', 'oxygen_saturation', 'pulse', 'BPsys', 'BPdia']
-        for field in required_fields:
-            if field not in request.form or request.form[field].strip() == '':
-                raise ValueError(f"Missing input: {field}")
-
-        # Collect user input
-        age = float(request.form.get('age'))
-        gender = request.form.get('gender')
-        weight = float(request.form.get('weight'))
-        height = float(request.form.get('height')) / 100  # Convert cm to meters
-        oxygen_saturation = float(request.form.get('oxygen_saturation'))
-        pulse_rate = float(request.form.get('pulse'))
-        BPsys = float(request.form.get('BPsys'))
-        BPdia = float(request.form.get('BPdia'))
-
-        # Calculate BMI
-        bmi = round(weight / (height ** 2), 2)
-
-        # Process Snoring Sound File (Detect Snoring Severity)
-        snore_score = 0  # Default if no file
-        if 'snoringSound' in request.files and request.files['snoringSound'].filename != '':
-            audio_file = request.files['snoringSound']
-            filename = secure_filename(audio_file.filename)
-            audio_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            audio_file.save(audio_path)
-
-            # Extract features from audio and predict snoring severity
-            features = extract_features(audio_path)
-            if features is not None:
-                features = features.reshape(1, -1)
-                snore_score = snore_model.predict(features)[0]
+        patient = parse_patient_form(request.form)
+        audio_stream, filename = uploaded_audio(request.files)
+        result = run_prediction(patient, audio_stream, filename, request.values)
+        if 'job_id' in result:
+            return jsonify({'job_id': result['job_id'],
+                            'status_url': url_for('job_status', job_id=result['job_id'])}), 202
+        with span('template.render'):
+            return render_template('result.html', **result)
+
+    except Exception as e:
+        print("Error occurred:", e)
+        return render_template('prediction.html', error=f"Error: {str(e)}")
+
+def api_response(payload, status=200):
+    return app.response_class(dumps(payload), status=status, mimetype='application/json')
+
+@app.route('/api/v1/predict', methods=['POST'])
+def predict_api():
+    """JSON prediction: a JSON body, or a form post when a snoringSound recording is attached."""
+    try:
+        if request.is_json:
+            body = request.get_json(silent=True)
+            if body is None:
+                raise ApiError('invalid_body', "Request body is not valid JSON")
+            patient = validate_patient(body)
+            audio_stream, filename = None, ''
+        else:
+            patient = validate_patient(request.form, from_form=True)
+            audio_stream, filename = uploaded_audio(request.files)
+        result = run_api_prediction(patient, audio_stream, filename, request.args)
+    except Exception as e:
+        error = api_error(e)
+        return api_response(error.to_dict(), error.status)
+
+    if 'job_id' in result:
+        return api_response({'job_id': result['job_id'],
+                             'status_url': url_for('job_status', job_id=result['job_id'])}, 202)
+    return api_response(prediction_response(result))
+
+@app.route('/api/v1/schema')
+def api_schema():
+    return api_response(json_schema())
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch_route():
+    """Score a cohort: an uploaded CSV/JSONL `file`, or a JSON body {"patients": [...]}.
+
+    Rows with an audio_path are scored from a recording: either the name of a
+    file sent in the same multipart request under `audio` (one per recording),
+    or a path to a file already under the upload folder.
+    """
+    try:
+        # Accept an uploaded CSV/JSONL file or a JSON body {"patients": [...]}
+        if 'file' in request.files and request.files['file'].filename != '':
+            upload = request.files['file']
+            if upload.filename.endswith(('.jsonl', '.ndjson')):
+                patients = pd.read_json(upload.stream, lines=True)
             else:
-                snore_score = 0
-
-        # Predict AHI using the new function
-        predicted_ahi = predict_ahi(bmi, oxygen_saturation, snore_score, age, pulse_rate)
-
-        # Get severity level and weight category
-        severity = get_severity_level(predicted_ahi)
-        weight_category = get_weight_category(bmi)
-
-        # Calculate overall sleep quality
-        sleep_quality = calculate_sleep_quality(predicted_ahi, snore_score, oxygen_saturation, pulse_rate)
-        
-        # Calculate sleep quality percentage
-        sleep_quality_map = {
-            "Extremely Poor": 20,
-            "Very Poor": 40,
-            "Poor": 50,
-            "Moderately Poor": 60,
-            "Moderate": 70,
-            "Mild": 80,
-            "Very Mild": 90,
-            "Good": 100
-        }
-        sleep_quality_percentage = sleep_quality_map.get(sleep_quality, 50)
-
-        # Generate doctor's recommendation based on severity
-        if predicted_ahi >= 30:
-            doctor_recommendation = "🚨 URGENT: Immediate specialist consultation required. Severe sleep apnea detected with high risk of complications."
-        elif predicted_ahi >= 20:
-            doctor_recommendation = "⚠️ Critical: Severe condition detected. Medical intervention is necessary. Consider CPAP therapy."
-        elif predicted_ahi >= 15:
-            doctor_recommendation = "⚠️ Severe: Strongly recommended to consult a sleep specialist. Lifestyle changes and medical treatment may be needed."
-        elif predicted_ahi >= 10:
-            doctor_recommendation = "🔶 High Risk: Lifestyle changes & medical guidance suggested. Consider weight management and sleep position therapy."
-        elif predicted_ahi >= 5:
-            doctor_recommendation = "🟡 Moderate Risk: Medical consultation advised. Focus on sleep hygiene and weight management."
-        elif predicted_ahi >= 3:
-            doctor_recommendation = "🟢 Mild: Consider lifestyle changes & monitor symptoms. Maintain healthy sleep habits."
+                patients = pd.read_csv(upload.stream)
         else:
-            doctor_recommendation = "✅ No sleep apnea detected. Continue maintaining healthy sleep habits."
-
-        # Prepare data for nutrition & sleep advice model
-        advice_data = pd.DataFrame({
-            'AHI': [predicted_ahi],
-            'BMI': [bmi],
-            'Severity': [label_encoder.fit_transform([severity])[0]],
-            'Weight Category': [label_encoder.fit_transform([weight_category])[0]]
-        })
-        
-        # Preprocess and predict
-        advice_data_scaled = preprocessor.transform(advice_data)
-        personalized_advice = model_advice.predict(advice_data_scaled)[0]
-
-        return render_template('result.html', 
-                             prediction=severity,
-                             ahi_score=predicted_ahi,
-                             bmi=round(bmi, 1),
-                             weight_category=weight_category,
-                             sleep_quality=sleep_quality,
-                             sleep_quality_percentage=sleep_quality_percentage,
-                             recommendation=doctor_recommendation,
-                             nutrition_advice=personalized_advice,
-                             snore_score=round(snore_score, 1),
-                             oxygen_saturation=oxygen_saturation,
-                             pulse_rate=pulse_rate,
-                             bp_sys=BPsys,
-                             bp_dia=BPdia,
-                             age=age)
+            body = request.get_json(silent=True) or {}
+            if not isinstance(body, dict):
+                raise ValueError("Request body must be a JSON object with a 'patients' list")
+            patients = pd.DataFrame(body.get('patients', []))
+
+        # Recordings sent with the request, by the file name the rows refer to
+        recordings = {f.filename: f.stream for f in request.files.getlist('audio') if f.filename}
+
+        # Other audio paths must point at files already in the upload folder
+        if AUDIO_COLUMN in patients.columns:
+            upload_root = os.path.realpath(app.config['UPLOAD_FOLDER'])
+            for path in patients[AUDIO_COLUMN].dropna():
+                if path in recordings:
+                    continue
+                if os.path.commonpath([upload_root, os.path.realpath(path)]) != upload_root:
+                    raise ValueError(f"Audio path outside upload folder: {path}")
 
+        snore_model = models.get('snore') if AUDIO_COLUMN in patients.columns else None
+        results = predict_batch(patients, models.get('advisor'), snore_model,
+                                lambda path: extract_features(recordings.get(path, path)))
+        return jsonify({'count': len(results), 'results': results.to_dict(orient='records')})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print("Error occurred:", e)
-        return render_template('prediction.html', error=f"Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify({'advice': advice_cache.stats(), 'scoring': scoring_cache.stats()})
+
+@app.route('/jobs/metrics')
+def job_metrics():
+    return jsonify(snore_jobs.metrics())
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = snore_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f"Unknown job: {job_id}"}), 404
+    return jsonify(job)
+
+@app.route('/features/stats')
+def feature_store_stats():
+    return jsonify(feature_store.stats())
+
+@app.route('/models/stats')
+def model_stats():
+    return jsonify(models.stats())
 
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
         user_message = request.json.get('message', '')
-        response = get_chatbot_response(user_message)
-        return jsonify({'response': response})
+        # The session id comes from the request body or, for browsers, the chat_session cookie
+        session_id, session = chat_sessions.get(request.json.get('session_id') or request.cookies.get('chat_session'))
+        response = get_chatbot_response(user_message, session)
+        resp = jsonify({'response': response, 'session_id': session_id})
+        resp.set_cookie('chat_session', session_id, max_age=int(app.config['CHAT_SESSION_TTL']) or None,
+                        httponly=True, samesite='Lax')
+        return resp
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/chat/stats')
+def chat_stats():
+    return jsonify(chat_sessions.stats())
+
 if __name__ == '__main__':
     app.run(debug=True)
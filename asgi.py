@@ -0,0 +1,153 @@
+import asyncio
+import contextlib
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+from flask import render_template
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, JSONResponse, Response
+from starlette.routing import Mount, Route
+from werkzeug.utils import secure_filename
+
+import metrics
+from api import ApiError, dumps, is_json, prediction_response, validate_patient
+from app import app as flask_app, api_error, chat_sessions, parse_patient_form, run_api_prediction, run_prediction
+from chatbot import get_chatbot_response
+
+# ASGI entry point (uvicorn asgi:app --workers 4). /predict, /chat and /api/v1/predict are
+# served by async handlers that read the request without blocking the event loop and run
+# decoding, feature extraction and model inference on a thread pool. Every other route
+# (pages, stats, batch predictions, job status) goes to the Flask app mounted underneath.
+# Needs a2wsgi and python-multipart; install uvicorn[standard] so it serves through
+# httptools and uvloop, without which its pure-Python HTTP parser is the bottleneck.
+
+# Threads for CPU-bound work; numpy, soxr and the sklearn models release the GIL for most of it.
+# One pool per lifespan, so an app started again after shutdown (e.g. by tests) gets a fresh one
+CPU_WORKERS = int(os.environ.get('ASGI_CPU_WORKERS', 0)) or None
+executor = ThreadPoolExecutor(max_workers=CPU_WORKERS)
+
+
+async def run_cpu(func, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+def render(template, **context):
+    # Flask's template globals (url_for etc.) need a request context
+    with flask_app.test_request_context(), metrics.span('template.render'):
+        return render_template(template, **context)
+
+
+def timed(endpoint):
+    """Record a handler's latency in the request histogram, as the Flask after_request hook does."""
+    def decorate(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            if not metrics.enabled():
+                return await handler(request)
+            start = time.perf_counter()
+            response = await handler(request)
+            metrics.request_seconds.observe(time.perf_counter() - start, endpoint, request.method,
+                                            str(response.status_code))
+            return response
+        return wrapper
+    return decorate
+
+
+def form_upload(form):
+    """(file, secure filename) of the snoringSound upload in a parsed form, or (None, '')."""
+    upload = form.get('snoringSound')
+    if upload is None or isinstance(upload, str) or not upload.filename:
+        return None, ''
+    return upload, secure_filename(upload.filename)
+
+
+@timed('predict')
+async def predict(request):
+    upload = None
+    try:
+        form = await request.form()
+        upload, filename = form_upload(form)
+        patient = parse_patient_form(form)
+        options = {**form, **request.query_params}
+        result = await run_cpu(run_prediction, patient, upload and upload.file, filename, options)
+    except Exception as e:
+        print("Error occurred:", e)
+        return HTMLResponse(await run_cpu(render, 'prediction.html', error=f"Error: {str(e)}"))
+    finally:
+        if upload is not None:
+            await upload.close()
+    if 'job_id' in result:
+        return _job_response(result['job_id'])
+    return HTMLResponse(await run_cpu(render, 'result.html', **result))
+
+
+@timed('predict_api')
+async def predict_api(request):
+    """JSON prediction: a JSON body, or a form post when a snoringSound recording is attached."""
+    upload = None
+    try:
+        if is_json(request.headers.get('content-type', '')):
+            try:
+                body = await request.json()
+            except ValueError:
+                raise ApiError('invalid_body', "Request body is not valid JSON")
+            patient = validate_patient(body)
+            filename = ''
+        else:
+            form = await request.form()
+            upload, filename = form_upload(form)
+            patient = validate_patient(form, from_form=True)
+        result = await run_cpu(run_api_prediction, patient, upload and upload.file, filename, request.query_params)
+    except Exception as e:
+        error = api_error(e)
+        return _api_response(error.to_dict(), error.status)
+    finally:
+        if upload is not None:
+            await upload.close()
+    if 'job_id' in result:
+        return _api_response({'job_id': result['job_id'], 'status_url': f"/jobs/{result['job_id']}"}, 202)
+    return _api_response(prediction_response(result))
+
+
+@timed('chat')
+async def chat(request):
+    try:
+        body = await request.json()
+        user_message = body.get('message', '')
+        session_id, session = chat_sessions.get(body.get('session_id') or request.cookies.get('chat_session'))
+        # Retrieval takes tens of microseconds, less than a hop to the executor, so it runs inline
+        response = JSONResponse({'response': get_chatbot_response(user_message, session), 'session_id': session_id})
+        response.set_cookie('chat_session', session_id, max_age=int(flask_app.config['CHAT_SESSION_TTL']) or None,
+                            httponly=True, samesite='lax')
+        return response
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+def _api_response(payload, status=200):
+    return Response(dumps(payload), status_code=status, media_type='application/json')
+
+
+def _job_response(job_id):
+    return JSONResponse({'job_id': job_id, 'status_url': f'/jobs/{job_id}'}, status_code=202)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global executor
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=CPU_WORKERS)
+    yield
+    executor.shutdown(wait=False)
+    executor = None
+
+
+app = Starlette(routes=[
+    Route('/predict', predict, methods=['POST']),
+    Route('/api/v1/predict', predict_api, methods=['POST']),
+    Route('/chat', chat, methods=['POST']),
+    Mount('/', WSGIMiddleware(flask_app)),
+], lifespan=lifespan)
@@ -0,0 +1,229 @@
+import functools
+import os
+import shutil
+import tempfile
+
+import librosa
+import numpy as np
+import scipy.fft
+import soundfile as sf
+import soxr
+
+from metrics import span
+
+# Analysis settings (librosa defaults used by the snore model)
+SAMPLE_RATE = 22050
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 13
+N_CHROMA = 12
+N_MELS = 128
+TOP_DB = 80.0
+
+# Frames per streamed block; the first block also estimates chroma tuning (~60 s)
+BLOCK_FRAMES = 2048
+TUNING_FRAMES = 2584
+READ_BLOCK_SIZE = 65536
+
+# dB histogram used to apply the MFCC top_db floor once the loudest frame is known
+DB_MIN = -100.0
+DB_MAX = 200.0
+DB_BIN = 0.5
+N_DB_BINS = int((DB_MAX - DB_MIN) / DB_BIN)
+
+# Column names of the 153-dim feature vector
+FEATURE_NAMES = ([f'mfcc_{i}' for i in range(N_MFCC)] + [f'chroma_{i}' for i in range(N_CHROMA)] +
+                 [f'mel_{i}' for i in range(N_MELS)])
+
+
+def extract_features(source):
+    """Extract the 153-dim snoring feature vector with the whole recording in memory.
+
+    `source` is a file path or a seekable binary file object (e.g. an upload stream).
+    """
+    return features_from_signal(load_audio(source))
+
+
+def load_audio(source):
+    """Decode a recording to mono float32 at SAMPLE_RATE, resampling with soxr."""
+    with span('audio.decode'):
+        return _load_audio(source)
+
+
+def _load_audio(source):
+    if isinstance(source, (str, os.PathLike)):
+        y, _ = librosa.load(source, sr=SAMPLE_RATE, res_type='soxr_hq')
+        return y
+    source.seek(0)
+    try:
+        y, _ = librosa.load(source, sr=SAMPLE_RATE, res_type='soxr_hq')
+        return y
+    except Exception:
+        # audioread needs a real file for formats libsndfile cannot decode
+        source.seek(0)
+        with tempfile.NamedTemporaryFile(suffix='.audio') as tmp:
+            shutil.copyfileobj(source, tmp)
+            tmp.flush()
+            y, _ = librosa.load(tmp.name, sr=SAMPLE_RATE, res_type='soxr_hq')
+            return y
+
+
+def features_from_signal(y):
+    """Compute the feature vector of a signal already sampled at SAMPLE_RATE."""
+    return spectral_features(power_spectrogram(y))
+
+
+def power_spectrogram(y):
+    """Centered |STFT|^2, the spectrogram librosa's feature functions build internally."""
+    with span('audio.stft'):
+        return np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH, center=True, pad_mode='constant')) ** 2
+
+
+def spectral_features(S, tuning=None):
+    """Derive the MFCC, chroma and mel means from a single power spectrogram.
+
+    The MFCCs come from the log-power of the same mel spectrogram and chroma
+    reuses S directly, so the STFT is computed once instead of three times.
+    """
+    with span('features.mel'):
+        mel = mel_basis() @ S
+    with span('features.mfcc'):
+        mfccs = librosa.feature.mfcc(S=librosa.power_to_db(mel, top_db=TOP_DB), n_mfcc=N_MFCC)
+    with span('features.chroma'):
+        chroma = librosa.feature.chroma_stft(S=S, sr=SAMPLE_RATE, tuning=tuning)
+    return np.hstack([np.mean(mfccs, axis=1), np.mean(chroma, axis=1), np.mean(mel, axis=1)])
+
+
+def extract_features_streaming(source, block_frames=BLOCK_FRAMES):
+    """Extract the same feature vector block by block with bounded memory."""
+    accumulator = _FeatureAccumulator()
+    for S in stream_spectrogram(source, block_frames):
+        accumulator.update(S)
+    return accumulator.result()
+
+
+def stream_spectrogram(source, block_frames=BLOCK_FRAMES, first_block_frames=TUNING_FRAMES):
+    """Yield consecutive blocks of the centered power spectrogram of a recording.
+
+    Frames line up exactly with power_spectrogram() of the whole signal. The
+    first block is longer so chroma tuning can be estimated from it. `source`
+    is a file path or a seekable binary file object, decoded without a copy
+    to disk.
+    """
+    try:
+        blocks = _read_blocks(source)
+        first = next(blocks, None)
+    except RuntimeError:
+        # Formats libsndfile cannot read (e.g. some MP3s) go through audioread
+        S = power_spectrogram(load_audio(source))
+        yield S[:, :first_block_frames]
+        for start in range(first_block_frames, S.shape[1], block_frames):
+            yield S[:, start:start + block_frames]
+        return
+
+    # Zero padding reproduces librosa's centered framing (pad_mode='constant')
+    pending = np.zeros(N_FFT // 2, dtype=np.float32)
+    target = first_block_frames
+    if first is not None:
+        pending = np.concatenate([pending, first])
+    for y in blocks:
+        while _frame_count(len(pending)) >= target:
+            S, pending = _split_frames(pending, target)
+            yield S
+            target = block_frames
+        pending = np.concatenate([pending, y])
+
+    pending = np.concatenate([pending, np.zeros(N_FFT // 2, dtype=np.float32)])
+    while _frame_count(len(pending)) > 0:
+        S, pending = _split_frames(pending, min(target, _frame_count(len(pending))))
+        yield S
+        target = block_frames
+
+
+def _split_frames(samples, n_frames):
+    """Power spectrogram of the first n_frames of samples, and the unconsumed tail."""
+    segment = samples[:(n_frames - 1) * HOP_LENGTH + N_FFT]
+    with span('audio.stft'):
+        S = np.abs(librosa.stft(segment, n_fft=N_FFT, hop_length=HOP_LENGTH, center=False)) ** 2
+    return S, samples[n_frames * HOP_LENGTH:]
+
+
+def _read_blocks(source, block_size=READ_BLOCK_SIZE):
+    """Yield mono float32 blocks resampled to SAMPLE_RATE."""
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+    with sf.SoundFile(source) as f:
+        resampler = None
+        if f.samplerate != SAMPLE_RATE:
+            resampler = soxr.ResampleStream(f.samplerate, SAMPLE_RATE, 1, dtype='float32', quality='HQ')
+
+        blocks = f.blocks(blocksize=block_size, dtype='float32', always_2d=True)
+        while True:
+            with span('audio.decode'):
+                block = next(blocks, None)
+                if block is None:
+                    break
+                y = block.mean(axis=1)
+                if resampler is not None:
+                    y = resampler.resample_chunk(y)
+            if y.size:
+                yield y
+    if resampler is not None:
+        tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        if tail.size:
+            yield tail
+
+
+def _frame_count(n_samples):
+    if n_samples < N_FFT:
+        return 0
+    return 1 + (n_samples - N_FFT) // HOP_LENGTH
+
+
+@functools.lru_cache(maxsize=None)
+def mel_basis():
+    return librosa.filters.mel(sr=SAMPLE_RATE, n_fft=N_FFT, n_mels=N_MELS)
+
+
+class _FeatureAccumulator:
+    """Running sums for the MFCC, chroma and mel means."""
+
+    def __init__(self):
+        self.n_frames = 0
+        self.tuning = None
+        self.mel_sum = np.zeros(N_MELS)
+        self.chroma_sum = np.zeros(N_CHROMA)
+        self.db_max = -np.inf
+        self.db_counts = np.zeros(N_MELS * N_DB_BINS)
+        self.db_sums = np.zeros(N_MELS * N_DB_BINS)
+        self._band_offsets = (np.arange(N_MELS) * N_DB_BINS)[:, None]
+
+    def update(self, S):
+        with span('features.chroma'):
+            if self.tuning is None:
+                self.tuning = librosa.estimate_tuning(S=S, sr=SAMPLE_RATE, bins_per_octave=N_CHROMA)
+            chroma = librosa.feature.chroma_stft(S=S, sr=SAMPLE_RATE, tuning=self.tuning)
+            self.chroma_sum += chroma.sum(axis=1)
+        with span('features.mel'):
+            mel = mel_basis() @ S
+            self.mel_sum += mel.sum(axis=1)
+        self.n_frames += S.shape[1]
+
+        with span('features.mfcc'):
+            db = librosa.power_to_db(mel, top_db=None)
+            self.db_max = max(self.db_max, float(db.max()))
+            bins = np.clip(((db - DB_MIN) / DB_BIN).astype(np.int64), 0, N_DB_BINS - 1)
+            flat = (bins + self._band_offsets).ravel()
+            self.db_counts += np.bincount(flat, minlength=self.db_counts.size)
+            self.db_sums += np.bincount(flat, weights=db.ravel(), minlength=self.db_sums.size)
+
+    def result(self):
+        n = max(self.n_frames, 1)
+        # Clip each histogram bin at the top_db floor, then take the per-band mean
+        floor = self.db_max - TOP_DB
+        counts = self.db_counts.reshape(N_MELS, N_DB_BINS)
+        sums = self.db_sums.reshape(N_MELS, N_DB_BINS)
+        means = np.divide(sums, counts, out=np.full_like(sums, floor), where=counts > 0)
+        log_mel_mean = (np.maximum(means, floor) * counts).sum(axis=1) / n
+        mfcc_mean = scipy.fft.dct(log_mel_mean, type=2, norm='ortho')[:N_MFCC]
+        return np.hstack([mfcc_mean, self.chroma_sum / n, self.mel_sum / n])
@@ -0,0 +1,118 @@
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from advice import AdvicePredictor, load_categories
+from scoring import (SLEEP_QUALITY_PERCENTAGES, calculate_sleep_quality_array, predict_ahi_array,
+                     get_severity_level_array, get_weight_category_array, get_doctor_recommendation_array,
+                     round_half_array)
+
+REQUIRED_COLUMNS = ['age', 'gender', 'weight', 'height', 'oxygen_saturation', 'pulse', 'BPsys', 'BPdia']
+NUMERIC_COLUMNS = ['age', 'weight', 'height', 'oxygen_saturation', 'pulse', 'BPsys', 'BPdia']
+AUDIO_COLUMN = 'audio_path'
+ID_COLUMN = 'patient_id'
+
+
+def load_patients(path):
+    """Load a CSV or JSONL file of patients into a DataFrame."""
+    if path.endswith(('.jsonl', '.ndjson')):
+        return pd.read_json(path, lines=True)
+    return pd.read_csv(path)
+
+
+def predict_batch(patients, advisor, snore_model=None, extract_features=None):
+    """Score a DataFrame of patients with one advice-model call for the whole batch.
+
+    Missing values raise ValueError: the array rules in scoring.py do not bin
+    NaN the way the scalar ones do.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in patients.columns]
+    if missing:
+        raise ValueError(f"Missing input: {', '.join(missing)}")
+    if len(patients) == 0:
+        return pd.DataFrame()
+
+    values = patients[NUMERIC_COLUMNS].apply(pd.to_numeric, errors='raise').astype(float)
+    if values.isna().any().any():
+        row = int(np.flatnonzero(values.isna().any(axis=1).to_numpy())[0])
+        raise ValueError(f"Missing input in row {row}: {', '.join(values.columns[values.iloc[row].isna()])}")
+
+    height = values['height'].to_numpy() / 100  # Convert cm to meters
+    bmi = round_half_array(values['weight'].to_numpy() / height ** 2, 2)
+    snore_scores = _snore_scores(patients, snore_model, extract_features)
+
+    predicted_ahi = predict_ahi_array(bmi, values['oxygen_saturation'], snore_scores, values['age'], values['pulse'])
+    sleep_quality = calculate_sleep_quality_array(predicted_ahi, snore_scores, values['oxygen_saturation'],
+                                                  values['pulse'])
+    results = pd.DataFrame({
+        'severity': get_severity_level_array(predicted_ahi),
+        'ahi': predicted_ahi,
+        'bmi': round_half_array(bmi, 1),
+        'weight_category': get_weight_category_array(bmi),
+        'sleep_quality': sleep_quality,
+        'sleep_quality_percentage': pd.Series(sleep_quality).map(SLEEP_QUALITY_PERCENTAGES).to_numpy(),
+        'recommendation': get_doctor_recommendation_array(predicted_ahi),
+        'snore_score': round_half_array(snore_scores, 1),
+    }, index=patients.index)
+
+    results['advice'] = advisor.predict_batch(predicted_ahi, bmi, results['severity'], results['weight_category'])
+
+    if ID_COLUMN in patients.columns:
+        results.insert(0, ID_COLUMN, patients[ID_COLUMN])
+    return results
+
+
+def _snore_scores(patients, snore_model, extract_features):
+    """Predict snore scores for rows with an audio file in one snore_model call; 0 elsewhere."""
+    scores = np.zeros(len(patients))
+    if AUDIO_COLUMN not in patients.columns or snore_model is None:
+        return scores
+    if extract_features is None:
+        from audio_features import extract_features_streaming as extract_features
+
+    rows, features = [], []
+    for i, path in enumerate(patients[AUDIO_COLUMN]):
+        if not isinstance(path, str) or path.strip() == '':
+            continue
+        try:
+            vector = extract_features(path)
+        except Exception as e:
+            print(f"Error extracting features from {path}: {e}")
+            vector = None
+        if vector is not None:
+            rows.append(i)
+            features.append(vector)
+    if features:
+        scores[rows] = snore_model.predict(np.vstack(features))
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Screen a cohort of patients from a CSV or JSONL file.')
+    parser.add_argument('input', help='CSV or JSONL file with one patient per row')
+    parser.add_argument('-o', '--output', help='Where to write results (.csv or .jsonl); prints to stdout if omitted')
+    parser.add_argument('--model', default='model.pkl', help='Advice model')
+    parser.add_argument('--preprocessor', default='preprocessor.pkl', help='Advice preprocessor')
+    parser.add_argument('--categories', default='advice_categories.json', help='Category mapping saved by model_two.py')
+    parser.add_argument('--snore-model', default='snore_model.pkl', help='Snore model, used for rows with audio_path')
+    args = parser.parse_args()
+
+    patients = load_patients(args.input)
+    snore_model = joblib.load(args.snore_model) if AUDIO_COLUMN in patients.columns else None
+    advisor = AdvicePredictor(joblib.load(args.model), joblib.load(args.preprocessor), load_categories(args.categories))
+    results = predict_batch(patients, advisor, snore_model)
+
+    if args.output is None:
+        print(results.to_csv(index=False))
+        return
+    if args.output.endswith(('.jsonl', '.ndjson')):
+        results.to_json(args.output, orient='records', lines=True, force_ascii=False)
+    else:
+        results.to_csv(args.output, index=False)
+    print(f"✅ Scored {len(results)} patients. Results saved as '{args.output}'.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import statistics
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from _common import ROOT
+from advice import AdvicePredictor, load_categories
+
+
+def legacy_advice(model, preprocessor, label_encoder, ahi, bmi, severity, weight_category):
+    """The advice step as /predict originally ran it."""
+    advice_data = pd.DataFrame({
+        'AHI': [ahi],
+        'BMI': [bmi],
+        'Severity': [label_encoder.fit_transform([severity])[0]],
+        'Weight Category': [label_encoder.fit_transform([weight_category])[0]]
+    })
+    return model.predict(preprocessor.transform(advice_data))[0]
+
+
+def latencies(func, cases):
+    samples = []
+    for case in cases:
+        start = time.perf_counter()
+        func(*case)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run(n=2000, seed=0):
+    model = joblib.load(os.path.join(ROOT, 'model.pkl'))
+    preprocessor = joblib.load(os.path.join(ROOT, 'preprocessor.pkl'))
+    advisor = AdvicePredictor(model, preprocessor, load_categories(os.path.join(ROOT, 'advice_categories.json')))
+    label_encoder = LabelEncoder()
+
+    rng = np.random.default_rng(seed)
+    severities = list(advisor.severity_codes)
+    weights = list(advisor.weight_codes)
+    cases = [(round(rng.uniform(0, 40), 1), round(rng.uniform(17, 50), 2),
+              severities[rng.integers(len(severities))], weights[rng.integers(len(weights))]) for _ in range(n)]
+
+    # The fast path must agree with the DataFrame path given the same encoded inputs
+    for ahi, bmi, severity, weight in cases[:200]:
+        frame = pd.DataFrame([[ahi, bmi, advisor.severity_codes[severity], advisor.weight_codes[weight]]],
+                             columns=['AHI', 'BMI', 'Severity', 'Weight Category'])
+        assert advisor.predict(ahi, bmi, severity, weight) == model.predict(preprocessor.transform(frame))[0]
+
+    legacy = latencies(lambda *case: legacy_advice(model, preprocessor, label_encoder, *case), cases)
+    fast = latencies(advisor.predict, cases)
+    start = time.perf_counter()
+    advisor.predict_batch(*zip(*cases))
+    batch_s = time.perf_counter() - start
+
+    def summary(samples):
+        samples = sorted(samples)
+        return {'p50_ms': statistics.median(samples) * 1e3, 'p99_ms': samples[int(len(samples) * 0.99)] * 1e3}
+
+    return {'n': n, 'legacy': summary(legacy), 'precompiled': summary(fast), 'batch_per_row_ms': batch_s / n * 1e3}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Latency of the advice step before and after precompiling it.')
+    parser.add_argument('-n', type=int, default=2000, help='Number of predictions')
+    args = parser.parse_args()
+
+    r = run(args.n)
+    print(f"Legacy (LabelEncoder + DataFrame): p50 {r['legacy']['p50_ms']:.3f} ms, p99 {r['legacy']['p99_ms']:.3f} ms")
+    print(f"Precompiled row:                   p50 {r['precompiled']['p50_ms']:.3f} ms, "
+          f"p99 {r['precompiled']['p99_ms']:.3f} ms")
+    print(f"Batched ({r['n']} rows):            {r['batch_per_row_ms']:.4f} ms per row")
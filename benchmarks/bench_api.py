@@ -0,0 +1,58 @@
+import argparse
+import json
+import time
+
+from _common import ROOT  # noqa: F401  (puts the app modules on sys.path)
+import api
+from app import app
+
+PATIENT = {'age': 52, 'gender': 'male', 'weight': 96, 'height': 178, 'oxygen_saturation': 91, 'pulse': 84,
+           'BPsys': 138, 'BPdia': 88}
+
+
+def per_request(func, n):
+    """Mean microseconds per call after one warm-up call (which loads the models and fills the caches)."""
+    func()
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def run(n=2000):
+    client = app.test_client()
+    form = {key: str(value) for key, value in PATIENT.items()}
+
+    def html():
+        response = client.post('/predict', data=form)
+        assert response.status_code == 200, response.status_code
+
+    def json_api():
+        response = client.post('/api/v1/predict', json=PATIENT)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    html_response = client.post('/predict', data=form).get_data()
+    payload = json.loads(client.post('/api/v1/predict', json=PATIENT).get_data())
+    return {
+        'requests': n,
+        'html_us': per_request(html, n),
+        'json_api_us': per_request(json_api, n),
+        'html_bytes': len(html_response),
+        'json_bytes': len(api.dumps(payload)),
+        'stdlib_json_dumps_us': per_request(lambda: json.dumps(payload).encode('utf-8'), n * 10),
+        'api_dumps_us': per_request(lambda: api.dumps(payload), n * 10),
+        'orjson': api.orjson is not None,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='/api/v1/predict vs the HTML /predict path.')
+    parser.add_argument('-n', type=int, default=2000, help='Requests per endpoint')
+    args = parser.parse_args()
+
+    r = run(args.n)
+    print(f"HTML /predict:         {r['html_us']:>8.0f} us/request  ({r['html_bytes']:,} bytes)")
+    print(f"JSON /api/v1/predict:  {r['json_api_us']:>8.0f} us/request  ({r['json_bytes']:,} bytes)")
+    print(f"Speedup:               {r['html_us'] / r['json_api_us']:>8.2f}x")
+    print(f"Serialization:         json.dumps {r['stdlib_json_dumps_us']:.1f} us, "
+          f"api.dumps {r['api_dumps_us']:.1f} us ({'orjson' if r['orjson'] else 'stdlib fallback'})")
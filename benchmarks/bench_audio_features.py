@@ -0,0 +1,50 @@
+import argparse
+import os
+import tracemalloc
+
+import numpy as np
+
+from _common import synthetic_snore, write_wav, best_of
+from audio_features import extract_features, extract_features_streaming
+
+
+def peak_memory(func):
+    """Return the peak traced allocation in MB while running func."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def run(durations=(10, 60, 600), repeat=3):
+    results = []
+    for seconds in durations:
+        path = write_wav(synthetic_snore(seconds), 44100)
+        try:
+            t_full, full = best_of(lambda: extract_features(path), repeat)
+            t_stream, stream = best_of(lambda: extract_features_streaming(path), repeat)
+            results.append({
+                'seconds': seconds,
+                'in_memory_s': t_full,
+                'streaming_s': t_stream,
+                'in_memory_peak_mb': peak_memory(lambda: extract_features(path)),
+                'streaming_peak_mb': peak_memory(lambda: extract_features_streaming(path)),
+                'max_rel_diff': float(np.max(np.abs(stream - full) / (np.abs(full) + 1e-6))),
+            })
+        finally:
+            os.remove(path)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare in-memory and streaming snore feature extraction.')
+    parser.add_argument('--durations', type=float, nargs='+', default=[10, 60, 600], help='Audio lengths in seconds')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'audio':>8} {'in-mem s':>9} {'stream s':>9} {'in-mem MB':>10} {'stream MB':>10} {'max rel diff':>13}")
+    for r in run(args.durations, args.repeat):
+        print(f"{r['seconds']:>7.0f}s {r['in_memory_s']:>9.3f} {r['streaming_s']:>9.3f} "
+              f"{r['in_memory_peak_mb']:>10.1f} {r['streaming_peak_mb']:>10.1f} {r['max_rel_diff']:>13.2e}")
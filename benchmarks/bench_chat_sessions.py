@@ -0,0 +1,58 @@
+import argparse
+import time
+import tracemalloc
+
+from _common import ROOT  # noqa: F401  (puts the app modules on sys.path)
+import chatbot
+from chat_sessions import SessionStore
+
+
+def session_memory(counts):
+    """Traced memory of the store vs its own estimate as sessions accumulate."""
+    rows = []
+    store = SessionStore(maxsize=max(counts), ttl=None)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for count in sorted(counts):
+        while len(store) < count:
+            _, session = store.get()
+            chatbot.answer_topic('symptoms', 0, session)
+        traced = tracemalloc.get_traced_memory()[0] - base
+        rows.append({'sessions': count, 'traced_bytes': traced, 'estimated_bytes': store.memory_bytes()})
+    tracemalloc.stop()
+    return rows
+
+
+def follow_up_latency(n=20_000):
+    """Microseconds per reply for a "yes" routed from the session vs a question sent through retrieval."""
+    store = SessionStore()
+    _, session = store.get()
+    chatbot.knowledge_index()
+
+    def timed(message):
+        start = time.perf_counter()
+        for _ in range(n):
+            session.offered = ('causes', 'treatment')
+            chatbot.get_chatbot_response(message, session)
+        return (time.perf_counter() - start) / n * 1e6
+
+    return {'follow_up_us': timed("yes"), 'question_us': timed("What are the causes and treatment options?")}
+
+
+def run(counts=(1_000, 10_000, 50_000, 100_000)):
+    return {'memory': session_memory(counts), 'latency': follow_up_latency()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Chat session store memory and follow-up routing latency.')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1_000, 10_000, 50_000, 100_000],
+                        help='Session counts to measure')
+    args = parser.parse_args()
+
+    r = run(args.sessions)
+    print(f"{'sessions':>9} {'traced':>10} {'estimated':>10} {'bytes/session':>14}")
+    for row in r['memory']:
+        print(f"{row['sessions']:>9,} {row['traced_bytes'] / 2**20:>8.1f}MB {row['estimated_bytes'] / 2**20:>8.1f}MB "
+              f"{row['traced_bytes'] / row['sessions']:>14.0f}")
+    print(f"Follow-up routed from session: {r['latency']['follow_up_us']:.1f} us/reply")
+    print(f"Question through retrieval:    {r['latency']['question_us']:.1f} us/reply")
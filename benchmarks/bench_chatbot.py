@@ -0,0 +1,94 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from _common import ROOT, best_of  # noqa: F401  (ROOT puts the app modules on sys.path)
+import chatbot
+from knowledge_index import KnowledgeIndex
+
+TEMPLATES = [
+    "What is sleep apnea?", "hi there", "What are the symptoms of sleep apnea?", "Why do people get it?",
+    "How is it diagnosed? Do I need a sleep study test?", "thank you, bye", "Tell me about CPAP therapy and masks",
+    "what foods should I avoid at dinner", "Is this dangerous for my heart?", "My child snores loudly every night",
+    "Can exercise or a workout routine help?", "Which sleeping position is best?", "I'm pregnant, should I worry?",
+    "Are there natural or alternative treatments?", "my elderly father stops breathing at night",
+    "What complications and risks should I know about if it stays untreated for years?",
+]
+
+
+def legacy_topic(user_input):
+    """The original per-keyword substring scan (without its random response choice)."""
+    user_input = user_input.lower().strip()
+    if any(g in user_input for g in ["hi", "hello", "hey", "good morning", "good afternoon", "good evening"]):
+        return 'greeting'
+    if any(f in user_input for f in ["bye", "goodbye", "thanks", "thank you", "see you"]):
+        return 'farewell'
+    matched_topic, best = None, 0
+    for topic, keywords in chatbot.topic_keywords.items():
+        score = sum(1 for keyword in keywords if keyword in user_input)
+        if score > best:
+            best, matched_topic = score, topic
+    return matched_topic
+
+
+def corpus(n, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice(TEMPLATES) for _ in range(n)]
+
+
+def throughput(func, messages):
+    start = time.perf_counter()
+    for message in messages:
+        func(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def retrieval_latency(messages, k=3):
+    """Per-query BM25 search latency percentiles, in microseconds."""
+    index = chatbot.knowledge_index()
+    samples = []
+    for message in messages:
+        start = time.perf_counter()
+        index.search(message, k)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {'p50': samples[len(samples) // 2], 'p99': samples[int(len(samples) * 0.99)], 'max': samples[-1]}
+
+
+def index_timings():
+    """Seconds to build the index from the knowledge base and to load the persisted copy."""
+    build_seconds, index = best_of(lambda: KnowledgeIndex.build(chatbot.sleep_apnea_knowledge, chatbot.topic_keywords))
+    path = os.path.join(tempfile.mkdtemp(), 'knowledge_index.json')
+    index.save(path)
+    load_seconds, _ = best_of(lambda: KnowledgeIndex.load(path))
+    return build_seconds, load_seconds
+
+
+def run(n=100_000):
+    messages = corpus(n)
+    build_seconds, load_seconds = index_timings()
+    return {
+        'index_build_s': build_seconds,
+        'index_load_s': load_seconds,
+        'retrieval_latency_us': retrieval_latency(messages[:min(n, 20_000)]),
+        'messages': n,
+        'legacy_topic_msgs_per_s': throughput(legacy_topic, messages),
+        'compiled_topic_msgs_per_s': throughput(lambda m: chatbot.match_topics(m.lower().strip()), messages),
+        'get_chatbot_response_msgs_per_s': throughput(chatbot.get_chatbot_response, messages),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Chatbot intent matching throughput and retrieval latency.')
+    parser.add_argument('-n', type=int, default=100_000, help='Number of messages')
+    args = parser.parse_args()
+
+    r = run(args.n)
+    print(f"Legacy substring scan:     {r['legacy_topic_msgs_per_s']:>10,.0f} msgs/sec")
+    print(f"Compiled keyword pattern:  {r['compiled_topic_msgs_per_s']:>10,.0f} msgs/sec")
+    print(f"get_chatbot_response:      {r['get_chatbot_response_msgs_per_s']:>10,.0f} msgs/sec")
+    latency = r['retrieval_latency_us']
+    print(f"BM25 retrieval (k=3):      p50 {latency['p50']:.1f} us, p99 {latency['p99']:.1f} us, max {latency['max']:.1f} us")
+    print(f"Index build / load:        {r['index_build_s'] * 1000:.1f} ms / {r['index_load_s'] * 1000:.1f} ms")
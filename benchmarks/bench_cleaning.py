@@ -0,0 +1,79 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from _common import ROOT, best_of
+import clean_data
+from cleaning import CleaningTransform, patient_record
+from dataset_cache import apply_schema
+
+
+def legacy_clean(df):
+    """The cleaning steps of the previous clean_data.py, on a frame read with plain read_csv."""
+    df = df.dropna(subset=['Diagnosis_of_SDB'])
+    df = df.drop(columns=['user_id', 'night_id', 'Patient_ID', 'Physician_Notes', 'Patient_Symptoms'],
+                 errors='ignore')
+    df['Gender'] = df['Gender'].map({'Male': 1, 'Female': 0})
+    df['CPAP'] = df['CPAP'].map({'True': 1, 'False': 0})
+    df['Surgery'] = df['Surgery'].map({'True': 1, 'False': 0})
+    df['Diagnosis_of_SDB'] = df['Diagnosis_of_SDB'].astype('category').cat.codes
+    for col in ['Age', 'BMI', 'Oxygen_Saturation', 'AHI', 'ECG_Heart_Rate', 'SpO2', 'Nasal_Airflow',
+                'Chest_Movement']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df.fillna(df.median(numeric_only=True))
+    df['ODI'] = df['Oxygen_Saturation'].apply(lambda x: 30 if x < 90 else 20 if x < 93 else 10 if x < 95 else 0)
+    df['BPsys'] = 120 + (df['BMI'] * 0.3)
+    df['BPdia'] = 80 + (df['BMI'] * 0.2)
+    df['Snoring_Score'] = np.random.randint(0, 100, size=len(df))
+    return df
+
+
+def legacy_script(source, output):
+    """The previous clean_data.py end to end: read, clean, write."""
+    legacy_clean(pd.read_csv(source, low_memory=False)).to_csv(output, index=False)
+
+
+def run(scale=1000):
+    directory = tempfile.mkdtemp(prefix='bench-cleaning-')
+    try:
+        source = os.path.join(directory, 'final_dataset.csv')
+        original = pd.read_csv(os.path.join(ROOT, 'final_dataset.csv'), low_memory=False)
+        pd.concat([original] * scale, ignore_index=True).to_csv(source, index=False)
+        raw = pd.read_csv(source, low_memory=False)
+        typed = apply_schema(raw.copy())
+        transform = CleaningTransform.from_state(clean_data.fit(source))
+
+        report = {'rows': len(raw)}
+        report['legacy_transform_s'], legacy = best_of(lambda: legacy_clean(raw.copy()))
+        report['transform_s'], cleaned = best_of(lambda: transform.transform(typed))
+        report['odi_agrees'] = bool((legacy['ODI'].to_numpy() == cleaned['ODI'].to_numpy()).all())
+
+        start = time.perf_counter()
+        legacy_script(source, os.path.join(directory, 'legacy.csv'))
+        report['legacy_script_s'] = time.perf_counter() - start
+        report['script_s'] = clean_data.clean(source, os.path.join(directory, 'cleaned.csv'), rebuild=True)['seconds']
+
+        patient = {'age': 50.0, 'gender': 'Male', 'weight': 90.0, 'height': 1.75, 'oxygen_saturation': 91.0,
+                   'pulse_rate': 70.0, 'BPsys': 130.0, 'BPdia': 85.0}
+        report['record_s'], _ = best_of(lambda: transform.transform_records([patient_record(patient, 4.2)]))
+        return report
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Previous clean_data.py vs the schema-driven cleaning transform.')
+    parser.add_argument('--scale', type=int, default=1000, help='Copies of final_dataset.csv to stack')
+    args = parser.parse_args()
+
+    r = run(args.scale)
+    print(f"{r['rows']:,} rows")
+    print(f"cleaning steps  legacy {r['legacy_transform_s'] * 1000:>8.1f} ms   transform {r['transform_s'] * 1000:>8.1f} ms"
+          f"   ({r['legacy_transform_s'] / r['transform_s']:.1f}x, ODI agrees: {r['odi_agrees']})")
+    print(f"whole script    legacy {r['legacy_script_s']:>8.2f} s    clean_data {r['script_s']:>8.2f} s")
+    print(f"one app patient: {r['record_s'] * 1000:.2f} ms")
@@ -0,0 +1,66 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from _common import ROOT, best_of
+import dataset_cache
+
+
+def legacy_load(path):
+    """What the scripts did on every run: read_csv, comma decimals via str ops, 'BPsys/BPdia' split."""
+    data = pd.read_csv(path, low_memory=False)
+    for column in ['height', 'weight', 'pulse', 'ODI', 'NAp', 'NHyp', 'AI', 'HI', 'AHI']:
+        data[column] = pd.to_numeric(data[column].astype(str).str.replace(',', '.'), errors='coerce')
+    data[['BPsys', 'BPdia']] = data['BPsys/BPdia'].str.split('/', expand=True)
+    data['BPsys'] = pd.to_numeric(data['BPsys'], errors='coerce')
+    data['BPdia'] = pd.to_numeric(data['BPdia'], errors='coerce')
+    return data
+
+
+def run(scale=200, source='final_dataset.csv'):
+    directory = tempfile.mkdtemp(prefix='bench-datasets-')
+    try:
+        path = os.path.join(directory, 'patients.csv')
+        original = pd.read_csv(os.path.join(ROOT, source), low_memory=False)
+        pd.concat([original] * scale, ignore_index=True).to_csv(path, index=False)
+        cache_dir = os.path.join(directory, 'cache')
+
+        legacy_s, _ = best_of(lambda: legacy_load(path))
+        start = time.perf_counter()
+        df = dataset_cache.load_dataset(path, cache_dir)
+        cold_s = time.perf_counter() - start
+        warm_s, _ = best_of(lambda: dataset_cache.load_dataset(path, cache_dir))
+        hash_s, _ = best_of(lambda: dataset_cache.file_digest(path))
+        cached = dataset_cache.cache_path(path, dataset_cache.file_digest(path), cache_dir)
+        return {
+            'rows': len(df),
+            'csv_bytes': os.path.getsize(path),
+            'cache_bytes': os.path.getsize(cached),
+            'format': os.path.splitext(cached)[1].lstrip('.'),
+            'legacy_s': legacy_s,
+            'cold_s': cold_s,
+            'warm_s': warm_s,
+            'hash_s': hash_s,
+            'memory_legacy': legacy_load(path).memory_usage(deep=True).sum(),
+            'memory_typed': df.memory_usage(deep=True).sum(),
+        }
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='CSV parsing in the scripts vs the typed dataset cache.')
+    parser.add_argument('--scale', type=int, default=200, help='Copies of final_dataset.csv to stack')
+    args = parser.parse_args()
+
+    r = run(args.scale)
+    print(f"{r['rows']:,} rows: CSV {r['csv_bytes'] / 1e6:.1f} MB, {r['format']} cache {r['cache_bytes'] / 1e6:.1f} MB")
+    print(f"read_csv + string fixes:  {r['legacy_s'] * 1000:>8.1f} ms  ({r['memory_legacy'] / 1e6:.1f} MB in memory)")
+    print(f"first load (parse+cache): {r['cold_s'] * 1000:>8.1f} ms")
+    print(f"cached load:              {r['warm_s'] * 1000:>8.1f} ms  ({r['memory_typed'] / 1e6:.1f} MB in memory, "
+          f"{r['hash_s'] * 1000:.1f} ms of it hashing the CSV)")
+    print(f"Speedup: {r['legacy_s'] / r['warm_s']:.1f}x")
@@ -0,0 +1,103 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from _common import ROOT
+import clean_data
+import merge_data
+
+PATIENT_COLUMNS = ['user_id', 'night_id', 'age', 'sex', 'height', 'weight', 'pulse', 'BPsys/BPdia', 'ODI', 'NAp',
+                   'NHyp', 'AI', 'HI', 'AHI']
+
+
+def synthetic_sources(directory, scale):
+    """Split final_dataset.csv back into its two sources and stack `scale` copies with distinct keys."""
+    final = pd.read_csv(os.path.join(ROOT, 'final_dataset.csv'), dtype=str, keep_default_na=False)
+    nights = final[final['user_id'] != ''][PATIENT_COLUMNS]
+    sdb = final[final['user_id'] == ''].drop(columns=PATIENT_COLUMNS)
+    paths = [os.path.join(directory, 'patients.csv'), os.path.join(directory, 'sdb_dataset.csv')]
+    for copy in range(scale):
+        header = copy == 0
+        nights.assign(user_id=nights['user_id'] + f'-{copy}').to_csv(paths[0], mode='a', header=header, index=False)
+        sdb.assign(Patient_ID=sdb['Patient_ID'] + f'-{copy}').to_csv(paths[1], mode='a', header=header, index=False)
+    return paths
+
+
+def add_rows(path, key_column, count):
+    """Append `count` rows with keys never seen before plus as many repeats of existing rows."""
+    repeats = pd.read_csv(path, dtype=str, keep_default_na=False, nrows=count)
+    fresh = repeats.assign(**{key_column: [f'new-{i}' for i in range(count)]})
+    pd.concat([fresh, repeats]).to_csv(path, mode='a', header=False, index=False)
+
+
+def legacy_merge(sources, output):
+    """The previous merge_data.py: everything in memory, drop_duplicates over all columns."""
+    merged = pd.concat([pd.read_csv(path, low_memory=False) for path in sources]).drop_duplicates()
+    merged.to_csv(output, index=False)
+    return len(merged)
+
+
+def peak_memory(func):
+    """(result, peak bytes allocated while it ran), as traced by tracemalloc."""
+    tracemalloc.start()
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(scale=1000, chunk_rows=merge_data.CHUNK_ROWS, new_rows=5000, memory=False):
+    directory = tempfile.mkdtemp(prefix='bench-incremental-')
+    try:
+        sources = synthetic_sources(directory, scale)
+        merged = os.path.join(directory, 'final_dataset.csv')
+        cleaned = os.path.join(directory, 'cleaned_dataset.csv')
+        report = {'source_rows': sum(len(pd.read_csv(path, usecols=[0])) for path in sources)}
+
+        start = time.perf_counter()
+        legacy_merge(sources, os.path.join(directory, 'legacy.csv'))
+        report['legacy_merge_s'] = time.perf_counter() - start
+        report['merge_full'] = merge_data.merge(sources, merged, chunk_rows)
+        report['clean_full'] = clean_data.clean(merged, cleaned, chunk_rows)
+
+        add_rows(sources[0], 'night_id', new_rows // 2)
+        add_rows(sources[1], 'Patient_ID', new_rows // 2)
+        report['merge_incremental'] = merge_data.merge(sources, merged, chunk_rows)
+        report['clean_incremental'] = clean_data.clean(merged, cleaned, chunk_rows)
+
+        if memory:
+            os.remove(merged)
+            os.remove(merge_data.index_path(merged))
+            _, report['legacy_peak_bytes'] = peak_memory(
+                lambda: legacy_merge(sources, os.path.join(directory, 'legacy.csv')))
+            _, report['merge_peak_bytes'] = peak_memory(lambda: merge_data.merge(sources, merged, chunk_rows))
+        return report
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Chunked, incremental merge + clean on a scaled-up dataset.')
+    parser.add_argument('--scale', type=int, default=1000, help="Copies of today's data (580 rows each)")
+    parser.add_argument('--chunk-rows', type=int, default=merge_data.CHUNK_ROWS, help='Rows read per chunk')
+    parser.add_argument('--new-rows', type=int, default=5000, help='New rows added before the incremental run')
+    parser.add_argument('--memory', action='store_true', help='Also trace peak memory (slower)')
+    args = parser.parse_args()
+
+    r = run(args.scale, args.chunk_rows, args.new_rows, args.memory)
+    print(f"{r['source_rows']:,} source rows")
+    print(f"Legacy concat + drop_duplicates: {r['legacy_merge_s']:>7.1f} s")
+    for name in ('merge_full', 'clean_full', 'merge_incremental', 'clean_incremental'):
+        s = r[name]
+        written = s.get('rows_added', s.get('rows_written'))
+        print(f"{name:<18} {s['seconds']:>7.1f} s  {s['rows_per_second']:>10,.0f} rows/s  "
+              f"({s['rows_read']:,} read, {written:,} written)")
+    if args.memory:
+        print(f"Peak memory: legacy {r['legacy_peak_bytes'] / 1e6:,.0f} MB, "
+              f"chunked merge {r['merge_peak_bytes'] / 1e6:,.0f} MB")
@@ -0,0 +1,48 @@
+import argparse
+import time
+
+from _common import ROOT  # noqa: F401  (puts the app modules on sys.path)
+import metrics
+
+
+def span_cost(n):
+    """Nanoseconds per `with span(...)` block, above an empty loop."""
+    def loop(body):
+        start = time.perf_counter()
+        for _ in range(n):
+            body()
+        return time.perf_counter() - start
+
+    def timed():
+        with metrics.span('bench'):
+            pass
+
+    baseline = loop(lambda: None)
+    costs = {}
+    for flag in (False, True):
+        metrics.set_enabled(flag)
+        costs['enabled' if flag else 'disabled'] = (loop(timed) - baseline) / n * 1e9
+    metrics.stage_seconds.clear()
+    return costs
+
+
+def run(n=1_000_000):
+    was_enabled = metrics.enabled()
+    try:
+        return span_cost(n)
+    finally:
+        metrics.set_enabled(was_enabled)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Overhead of the span-timing layer.')
+    parser.add_argument('-n', type=int, default=1_000_000, help='Spans to time')
+    args = parser.parse_args()
+
+    r = run(args.n)
+    print(f"Span, metrics disabled: {r['disabled']:>7.0f} ns")
+    print(f"Span, metrics enabled:  {r['enabled']:>7.0f} ns")
+    # A one-hour 44.1 kHz upload: ~2,400 decode blocks, ~76 spectrogram blocks x 4 stages, ~10 request stages
+    spans = 2400 + 76 * 4 + 10
+    print(f"Per one-hour upload (~{spans:,} spans): {r['enabled'] * spans / 1e6:.1f} ms enabled, "
+          f"{r['disabled'] * spans / 1e6:.1f} ms disabled")
@@ -0,0 +1,76 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from imblearn.over_sampling import SMOTE
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from _common import ROOT  # noqa: F401  (puts the app modules on sys.path)
+import model_two
+from scoring import get_severity_level_array, get_weight_category_array
+
+ADVICE_BY_SEVERITY = {'Normal': 'normal', 'Mild': 'mild', 'Moderate': 'moderate', 'Severe': 'severe'}
+
+
+def synthetic_nutrition(n, noise=0.15, seed=0):
+    """Rows shaped like data/nutrition.csv: advice follows severity, with a share of labels swapped at random."""
+    rng = np.random.default_rng(seed)
+    ahi = np.round(rng.gamma(2.0, 8.0, n), 1)
+    bmi = np.round(rng.normal(29, 6, n).clip(16, 55), 2)
+    severity = get_severity_level_array(ahi)
+    advice = pd.Series(severity).map(ADVICE_BY_SEVERITY).to_numpy()
+    flip = rng.random(n) < noise
+    advice[flip] = rng.choice(list(ADVICE_BY_SEVERITY.values()), flip.sum())
+    return pd.DataFrame({'AHI': ahi, 'BMI': bmi, 'Severity': severity,
+                         'Weight Category': get_weight_category_array(bmi), model_two.TARGET: advice})
+
+
+def legacy_search(X_train, y_train, X_test, y_test, n_jobs=-1):
+    """The previous model_two.py: SMOTE on the whole training split, then the full grid with no early stopping."""
+    preprocessor = StandardScaler()
+    X_resampled, y_resampled = SMOTE(random_state=42).fit_resample(preprocessor.fit_transform(X_train), y_train)
+    grid = {name.split('__', 1)[1]: values for name, values in model_two.PARAM_GRID.items()}
+    search = GridSearchCV(GradientBoostingClassifier(random_state=42), grid, cv=model_two.CV_FOLDS,
+                          scoring='accuracy', n_jobs=n_jobs)
+    start = time.perf_counter()
+    search.fit(X_resampled, y_resampled)
+    return {
+        'search': 'legacy grid',
+        'seconds': time.perf_counter() - start,
+        'candidates': len(search.cv_results_['params']),
+        'cv_accuracy': float(search.best_score_),
+        'test_accuracy': float(accuracy_score(y_test, search.best_estimator_.predict(preprocessor.transform(X_test)))),
+    }
+
+
+def run(rows=300, legacy=True, grid=True, n_jobs=-1):
+    """Reports of each search, yielded as they finish (the full grids take a while)."""
+    data = synthetic_nutrition(rows)
+    encoded = data.assign(**{column: pd.factorize(data[column], sort=True)[0] for column in model_two.CATEGORY_COLUMNS})
+    X, y = encoded[model_two.FEATURES], encoded[model_two.TARGET]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    if legacy:
+        yield legacy_search(X_train, y_train, X_test, y_test, n_jobs)
+    searches = [('grid', 0), ('grid', model_two.N_ITER_NO_CHANGE)] if grid else []
+    for search, patience in [('halving', model_two.N_ITER_NO_CHANGE)] + searches:
+        _, report = model_two.train(X_train, y_train, X_test, y_test, search, patience, n_jobs=n_jobs)
+        report['search'] = f"{search}{' + early stopping' if patience else ''}"
+        yield report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Advice-model search: previous full grid vs in-fold SMOTE searches.')
+    parser.add_argument('--rows', type=int, default=300, help='Synthetic training rows')
+    parser.add_argument('--skip-legacy', action='store_true', help="Don't run the previous search")
+    parser.add_argument('--skip-grid', action='store_true', help="Don't run the full grids with in-fold SMOTE")
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Parallel fits')
+    args = parser.parse_args()
+
+    for r in run(args.rows, not args.skip_legacy, not args.skip_grid, args.n_jobs):
+        print(f"{r['search']:<28} {r['seconds']:>8.1f} s  {r['candidates']:>4} candidates  "
+              f"CV accuracy {r['cv_accuracy']:.3f}  test accuracy {r['test_accuracy']:.3f}", flush=True)
@@ -0,0 +1,82 @@
+import argparse
+import time
+
+import numpy as np
+
+from _common import ROOT  # noqa: F401  (puts the app modules on sys.path)
+from scoring import (calculate_sleep_quality, predict_ahi, get_severity_level, get_weight_category,
+                     calculate_sleep_quality_array, predict_ahi_array, get_severity_level_array,
+                     get_weight_category_array, BMI_EDGES, OXYGEN_EDGES, AGE_EDGES, PULSE_EDGES)
+
+
+def synthetic_patients(n, seed=0):
+    """Random vitals, with a share of values sitting exactly on the rule thresholds."""
+    rng = np.random.default_rng(seed)
+    columns = {
+        'bmi': rng.uniform(15, 55, n).round(2),
+        'oxygen_saturation': rng.uniform(80, 100, n),
+        'snore_score': rng.uniform(0, 10, n),
+        'age': rng.integers(18, 90, n).astype(float),
+        'pulse_rate': rng.uniform(45, 120, n),
+    }
+    edges = {'bmi': BMI_EDGES, 'oxygen_saturation': OXYGEN_EDGES, 'age': AGE_EDGES, 'pulse_rate': PULSE_EDGES}
+    for name, values in edges.items():
+        on_edge = rng.random(n) < 0.1
+        columns[name][on_edge] = rng.choice(values, on_edge.sum())
+    return columns
+
+
+def check_parity(columns):
+    """Assert the array rules are bit-identical to the scalar ones on every row."""
+    ahi = predict_ahi_array(columns['bmi'], columns['oxygen_saturation'], columns['snore_score'],
+                            columns['age'], columns['pulse_rate'])
+    quality = calculate_sleep_quality_array(ahi, columns['snore_score'], columns['oxygen_saturation'],
+                                            columns['pulse_rate'])
+    severity = get_severity_level_array(ahi)
+    weight = get_weight_category_array(columns['bmi'])
+    for i in range(len(ahi)):
+        bmi, oxygen, snore = columns['bmi'][i], columns['oxygen_saturation'][i], columns['snore_score'][i]
+        age, pulse = columns['age'][i], columns['pulse_rate'][i]
+        expected = predict_ahi(bmi, oxygen, snore, age, pulse)
+        assert ahi[i] == expected and np.float64(expected).tobytes() == ahi[i].tobytes(), (i, ahi[i], expected)
+        assert quality[i] == calculate_sleep_quality(expected, snore, oxygen, pulse), i
+        assert severity[i] == get_severity_level(expected), i
+        assert weight[i] == get_weight_category(bmi), i
+
+
+def run(n_rows=1_000_000, n_parity=200_000):
+    check_parity(synthetic_patients(n_parity, seed=1))
+    columns = synthetic_patients(n_rows)
+
+    start = time.perf_counter()
+    for i in range(n_rows):
+        ahi = predict_ahi(columns['bmi'][i], columns['oxygen_saturation'][i], columns['snore_score'][i],
+                          columns['age'][i], columns['pulse_rate'][i])
+        calculate_sleep_quality(ahi, columns['snore_score'][i], columns['oxygen_saturation'][i],
+                                columns['pulse_rate'][i])
+        get_severity_level(ahi)
+        get_weight_category(columns['bmi'][i])
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ahi = predict_ahi_array(columns['bmi'], columns['oxygen_saturation'], columns['snore_score'],
+                            columns['age'], columns['pulse_rate'])
+    calculate_sleep_quality_array(ahi, columns['snore_score'], columns['oxygen_saturation'], columns['pulse_rate'])
+    get_severity_level_array(ahi)
+    get_weight_category_array(columns['bmi'])
+    vector_s = time.perf_counter() - start
+
+    return {'rows': n_rows, 'parity_rows': n_parity, 'scalar_s': scalar_s, 'vectorized_s': vector_s,
+            'speedup': scalar_s / vector_s}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scalar vs vectorized rule-based scoring.')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--parity-rows', type=int, default=200_000)
+    args = parser.parse_args()
+
+    r = run(args.rows, args.parity_rows)
+    print(f"✅ Bit-identical on {r['parity_rows']:,} random rows")
+    print(f"Scalar:     {r['scalar_s']:.2f} s for {r['rows']:,} rows")
+    print(f"Vectorized: {r['vectorized_s']:.3f} s ({r['speedup']:.0f}x faster)")
@@ -0,0 +1,55 @@
+import argparse
+import time
+
+import librosa
+import numpy as np
+
+from _common import synthetic_snore
+from audio_features import SAMPLE_RATE, N_MFCC, features_from_signal
+
+
+def reference_features(y, sr=SAMPLE_RATE):
+    """The original extractor: three separate STFTs of the same signal."""
+    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=N_MFCC)
+    chroma = librosa.feature.chroma_stft(y=y, sr=sr)
+    mel = librosa.feature.melspectrogram(y=y, sr=sr)
+    return np.hstack([np.mean(mfccs, axis=1), np.mean(chroma, axis=1), np.mean(mel, axis=1)])
+
+
+def cpu_time(func, repeat):
+    """Best CPU seconds (process time) over `repeat` runs, and the last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = func()
+        best = min(best, time.process_time() - start)
+    return best, result
+
+
+def run(durations=(10, 60, 300), repeat=5):
+    results = []
+    for seconds in durations:
+        y = synthetic_snore(seconds, sr=SAMPLE_RATE)
+        t_ref, ref = cpu_time(lambda: reference_features(y), repeat)
+        t_shared, shared = cpu_time(lambda: features_from_signal(y), repeat)
+        results.append({
+            'seconds': seconds,
+            'three_stft_cpu_s': t_ref,
+            'shared_stft_cpu_s': t_shared,
+            'speedup': t_ref / t_shared,
+            'max_abs_diff': float(np.max(np.abs(shared - ref))),
+        })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parity and CPU cost of the shared-STFT feature extractor.')
+    parser.add_argument('--durations', type=float, nargs='+', default=[10, 60, 300], help='Audio lengths in seconds')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'audio':>8} {'3x STFT cpu s':>14} {'shared cpu s':>13} {'speedup':>8} {'max abs diff':>13}")
+    for r in run(args.durations, args.repeat):
+        print(f"{r['seconds']:>7.0f}s {r['three_stft_cpu_s']:>14.3f} {r['shared_stft_cpu_s']:>13.3f} "
+              f"{r['speedup']:>7.2f}x {r['max_abs_diff']:>13.2e}")
@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+# Keep the benchmark's dataset cache out of the working tree (set before dataset_cache is imported)
+os.environ.setdefault('DATASET_CACHE_DIR', tempfile.mkdtemp(prefix='bench-dataset-cache-'))
+
+import argparse
+import shutil
+import time
+
+import pandas as pd
+
+from _common import ROOT
+import predict_ahi
+
+PATIENT_COLUMNS = ['user_id', 'night_id', 'age', 'sex', 'height', 'weight', 'pulse', 'BPsys/BPdia', 'ODI', 'NAp',
+                   'NHyp', 'AI', 'HI', 'AHI']
+
+
+def synthetic_nights(path, copies, first=0):
+    """Append `copies` copies of today's patient nights to `path`, each copy under new user ids."""
+    final = pd.read_csv(os.path.join(ROOT, 'final_dataset.csv'), dtype=str, keep_default_na=False)
+    nights = final[final['user_id'] != ''][PATIENT_COLUMNS]
+    user_ids = nights['user_id'].astype(float).astype(int)
+    for copy in range(first, first + copies):
+        nights.assign(user_id=(user_ids * 100_000 + copy).astype(str)).to_csv(
+            path, mode='a', header=not os.path.exists(path), index=False)
+
+
+def run(copies=500, new_copies=25, n_jobs=-1):
+    directory = tempfile.mkdtemp(prefix='bench-sleep-model-')
+    try:
+        data = os.path.join(directory, 'patients.csv')
+        models = os.path.join(directory, 'models')
+        synthetic_nights(data, copies)
+        report = {'full': predict_ahi.train(data, models, n_jobs=n_jobs)}
+
+        synthetic_nights(data, new_copies, first=copies)
+        start = time.perf_counter()
+        report['incremental'] = predict_ahi.train(data, models, n_jobs=n_jobs)
+        report['incremental_s'] = time.perf_counter() - start
+        start = time.perf_counter()
+        report['refit'] = predict_ahi.train(data, models, full=True, n_jobs=n_jobs)
+        report['refit_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        predict_ahi.load_artifact(report['refit'], mmap_mode='r')
+        report['mmap_load_s'] = time.perf_counter() - start
+        return report
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='AHI model: full refit vs adding trees for new nights.')
+    parser.add_argument('--copies', type=int, default=500, help="Copies of today's 80 nights trained first")
+    parser.add_argument('--new-copies', type=int, default=25, help='Copies added before the update')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Cores used to grow trees')
+    args = parser.parse_args()
+
+    r = run(args.copies, args.new_copies, args.n_jobs)
+    inc, refit = r['incremental'], r['refit']
+    print(f"{inc['new_rows']:,} new nights on top of {r['full']['training_rows']:,}")
+    print(f"full refit:  {r['refit_s']:>6.2f} s total, {refit['fit_seconds']:>6.2f} s fitting "
+          f"{refit['n_estimators']} trees")
+    print(f"incremental: {r['incremental_s']:>6.2f} s total, {inc['fit_seconds']:>6.2f} s fitting "
+          f"{inc['n_estimators'] - r['full']['n_estimators']} new trees")
+    print(f"artifact: {refit['bytes'] / 1e6:.1f} MB, memory-mapped in {r['mmap_load_s'] * 1e3:.0f} ms")
@@ -0,0 +1,44 @@
+import os
+
+# Pin BLAS/OpenMP to one thread before numpy loads: the target is one CPU core
+for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(var, '1')
+
+import argparse
+import time
+
+from _common import load_snore_model, synthetic_snore, write_wav
+from audio_features import SAMPLE_RATE
+from snore_events import detect_snore_events
+
+
+def run(minutes=60, window_seconds=2.0, hop_seconds=1.0):
+    model, model_name = load_snore_model()
+    path = write_wav(synthetic_snore(minutes * 60, sr=SAMPLE_RATE), SAMPLE_RATE)
+    try:
+        start = time.perf_counter()
+        timeline = detect_snore_events(path, model, window_seconds, hop_seconds)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.remove(path)
+    return {
+        'audio_seconds': minutes * 60,
+        'elapsed_s': elapsed,
+        'realtime_factor': minutes * 60 / elapsed,
+        'windows': timeline['windows'],
+        'events': len(timeline['events']),
+        'model': model_name,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Windowed snore detection speed on one CPU core.')
+    parser.add_argument('--minutes', type=float, default=60, help='Length of the synthetic recording')
+    parser.add_argument('--window', type=float, default=2.0, help='Window length in seconds')
+    parser.add_argument('--hop', type=float, default=1.0, help='Window hop in seconds')
+    args = parser.parse_args()
+
+    r = run(args.minutes, args.window, args.hop)
+    print(f"Model: {r['model']}")
+    print(f"{r['audio_seconds'] / 60:.0f} min of audio, {r['windows']} windows, {r['events']} events "
+          f"in {r['elapsed_s']:.1f} s -> {r['realtime_factor']:.0f}x faster than real time")
@@ -0,0 +1,53 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from _common import ROOT
+
+# Imports the app in a fresh interpreter and reports import time plus registry stats
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({'import_s': elapsed, 'librosa_loaded': 'librosa' in sys.modules, 'models': app.models.stats()}))
+"""
+
+MODES = {
+    'lazy': {},
+    'preload': {'PRELOAD_MODELS': '1'},
+}
+
+
+def probe(env_overrides):
+    env = dict(os.environ, **env_overrides)
+    out = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(repeat=5):
+    results = {}
+    for mode, env in MODES.items():
+        samples = [probe(env) for _ in range(repeat)]
+        results[mode] = {
+            'import_s': min(sample['import_s'] for sample in samples),
+            'librosa_loaded': samples[-1]['librosa_loaded'],
+            'models': samples[-1]['models'],
+        }
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='App startup time with lazy and preloaded models.')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for mode, r in run(args.repeat).items():
+        print(f"{mode:>8}: import {r['import_s'] * 1e3:.0f} ms, librosa loaded: {r['librosa_loaded']}")
+        for name, stats in r['models'].items():
+            if stats['loaded']:
+                resident = stats['resident_bytes']
+                resident = f"{resident / 1e6:.1f} MB" if resident is not None else 'n/a'
+                print(f"{'':>10}{name:<13} {stats['load_seconds'] * 1e3:7.1f} ms  resident +{resident}")
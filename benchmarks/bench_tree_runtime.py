@@ -0,0 +1,65 @@
+import os
+
+# Pin BLAS/OpenMP to one thread before numpy loads: both runtimes are compared on one core
+for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(var, '1')
+
+import argparse
+import time
+
+import joblib
+
+from _common import ROOT, load_snore_model
+from tree_runtime import CompiledTrees, check_parity, probe_inputs
+
+BATCH_SIZES = (1, 100, 10_000)
+
+
+def per_call(func, X, min_time=0.5):
+    """Best microseconds per call over a few rounds of enough calls to last min_time."""
+    func(X)
+    start = time.perf_counter()
+    func(X)
+    number = max(1, int(min_time / max(time.perf_counter() - start, 1e-9)))
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(X)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def compare(model, batch_sizes=BATCH_SIZES, parity_rows=20000):
+    compiled = CompiledTrees.from_sklearn(model)
+    report = {'trees': len(compiled.roots), 'nodes': len(compiled.feature),
+              'parity': check_parity(model, compiled, probe_inputs(compiled, parity_rows)), 'latency': {}}
+    for n in batch_sizes:
+        X = probe_inputs(compiled, n, seed=n)
+        report['latency'][n] = (per_call(model.predict, X), per_call(compiled.predict, X))
+    return report
+
+
+def run(batch_sizes=BATCH_SIZES, parity_rows=20000):
+    snore_model, snore_name = load_snore_model()
+    return {
+        'advice (model.pkl)': compare(joblib.load(os.path.join(ROOT, 'model.pkl')), batch_sizes, parity_rows),
+        f'snore ({snore_name})': compare(snore_model, batch_sizes, parity_rows),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='sklearn vs compiled node-array inference latency.')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=list(BATCH_SIZES), help='Rows per call')
+    parser.add_argument('--parity-rows', type=int, default=20000, help='Rows used for the parity check')
+    args = parser.parse_args()
+
+    for name, r in run(args.batch_sizes, args.parity_rows).items():
+        parity = r['parity']
+        status = '✅' if parity['mismatches'] == 0 else '❌'
+        print(f"{name}: {r['trees']} trees, {r['nodes']:,} nodes")
+        print(f"  {status} parity: {parity['mismatches']} of {parity['rows']:,} predictions differ "
+              f"(max |diff| {parity['max_abs_diff']:.1e})")
+        for n, (sklearn_us, compiled_us) in r['latency'].items():
+            print(f"  batch {n:>6,}: sklearn {sklearn_us:>10,.0f} us   compiled {compiled_us:>10,.0f} us   "
+                  f"{sklearn_us / compiled_us:>6.2f}x")
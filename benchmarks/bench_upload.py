@@ -0,0 +1,82 @@
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from _common import synthetic_snore, write_wav
+from audio_features import extract_features_streaming
+
+
+def io_counters():
+    """Bytes this process has passed to read/write syscalls (Linux /proc/self/io), or None."""
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except OSError:
+        return None
+
+
+def disk_round_trip(data, upload_dir):
+    """The old upload path: save the request body under uploads/, then decode it from disk."""
+    path = os.path.join(upload_dir, 'upload.wav')
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(io.BytesIO(data), f)
+    return extract_features_streaming(path)
+
+
+def in_memory(data, threshold):
+    """The new path: spool the body (in memory below the threshold) and decode from the stream."""
+    with tempfile.SpooledTemporaryFile(max_size=threshold, mode='rb+') as stream:
+        stream.write(data)
+        return extract_features_streaming(stream)
+
+
+def measure(func, repeat):
+    before = io_counters()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    after = io_counters()
+    written = (after[1] - before[1]) / repeat if before else None
+    read = (after[0] - before[0]) / repeat if before else None
+    return {'latency_s': best, 'read_bytes': read, 'written_bytes': written}
+
+
+def run(durations=(10, 60, 300), repeat=3, threshold=32 * 1024 * 1024):
+    results = []
+    with tempfile.TemporaryDirectory() as upload_dir:
+        for seconds in durations:
+            path = write_wav(synthetic_snore(seconds), 44100)
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.remove(path)
+            results.append({
+                'seconds': seconds,
+                'upload_mb': len(data) / 1e6,
+                'disk': measure(lambda: disk_round_trip(data, upload_dir), repeat),
+                'memory': measure(lambda: in_memory(data, threshold), repeat),
+            })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Upload decoding latency and disk I/O: save-then-load vs in-memory.')
+    parser.add_argument('--durations', type=float, nargs='+', default=[10, 60, 300], help='Audio lengths in seconds')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--threshold-mb', type=float, default=32, help='Spool-to-disk threshold')
+    args = parser.parse_args()
+
+    def mb(value):
+        return f"{value / 1e6:8.1f}" if value is not None else '     n/a'
+
+    print(f"{'audio':>7} {'upload MB':>9} | {'disk s':>7} {'read MB':>8} {'write MB':>8} | "
+          f"{'memory s':>8} {'read MB':>8} {'write MB':>8}")
+    for r in run(args.durations, args.repeat, int(args.threshold_mb * 1024 * 1024)):
+        d, m = r['disk'], r['memory']
+        print(f"{r['seconds']:>6.0f}s {r['upload_mb']:>9.1f} | {d['latency_s']:>7.3f} {mb(d['read_bytes'])} "
+              f"{mb(d['written_bytes'])} | {m['latency_s']:>8.3f} {mb(m['read_bytes'])} {mb(m['written_bytes'])}")
@@ -0,0 +1,119 @@
+import argparse
+import sys
+
+from _common import ROOT  # noqa: F401  (puts the app modules on sys.path)
+import chatbot
+from knowledge_index import KnowledgeIndex
+
+# The chatbot's retrieval must not fall below these on the labelled questions (43 of 47 right today)
+MIN_TOP1 = 0.9
+MIN_MRR = 0.95
+
+# Hand-labelled questions and the knowledge-base topic that should answer them
+LABELLED_QUERIES = [
+    ("What is sleep apnea?", "general"),
+    ("How common is sleep apnea in adults?", "general"),
+    ("What are the different types of apnea?", "general"),
+    ("What are the warning signs?", "symptoms"),
+    ("I wake up with a dry mouth and a headache", "symptoms"),
+    ("Why am I always tired during the day even after a full night?", "symptoms"),
+    ("Does loud snoring mean I have apnea?", "symptoms"),
+    ("What causes sleep apnea?", "causes"),
+    ("Why do throat muscles relax during sleep?", "causes"),
+    ("Am I at risk if I have a large neck?", "causes"),
+    ("Is it hereditary, does family history matter?", "causes"),
+    ("How is sleep apnea treated?", "treatment"),
+    ("What treatment options do I have?", "treatment"),
+    ("Is surgery an option?", "treatment"),
+    ("How do doctors diagnose it?", "diagnosis"),
+    ("What is a polysomnography sleep study?", "diagnosis"),
+    ("Can I do a home sleep test?", "diagnosis"),
+    ("What does my AHI score mean?", "diagnosis"),
+    ("What happens if it goes untreated?", "complications"),
+    ("Can apnea cause a stroke or heart disease?", "complications"),
+    ("Is it linked to diabetes and depression?", "complications"),
+    ("How can I prevent sleep apnea?", "prevention"),
+    ("How do I reduce my risk?", "prevention"),
+    ("What lifestyle changes help?", "lifestyle"),
+    ("Does a regular sleep schedule help?", "lifestyle"),
+    ("My child snores and wets the bed", "children"),
+    ("Should my kid have their tonsils and adenoids removed?", "children"),
+    ("Do I need a pediatrician?", "children"),
+    ("How does a CPAP machine work?", "cpap"),
+    ("How do I clean my CPAP mask?", "cpap"),
+    ("How long does it take to get used to CPAP?", "cpap"),
+    ("What foods should I eat?", "diet"),
+    ("Should I avoid caffeine and heavy meals?", "diet"),
+    ("Is a Mediterranean diet good for apnea?", "diet"),
+    ("Can exercise help?", "exercise"),
+    ("How many minutes of cardio should I do?", "exercise"),
+    ("Does yoga or strength training make a difference?", "exercise"),
+    ("What is the best sleeping position?", "sleep_position"),
+    ("Should I sleep on my side or my back?", "sleep_position"),
+    ("Will a wedge pillow help?", "sleep_position"),
+    ("Are there alternatives to CPAP?", "alternative_treatments"),
+    ("Does acupuncture work?", "alternative_treatments"),
+    ("What breathing exercises or positional therapy can I try?", "alternative_treatments"),
+    ("I'm pregnant, can apnea affect my baby?", "pregnancy"),
+    ("Does pregnancy make sleep apnea worse?", "pregnancy"),
+    ("Does sleep apnea get worse with age in older adults?", "elderly"),
+    ("My elderly mother snores, is that normal for seniors?", "elderly"),
+]
+
+
+def keyword_ranking(query):
+    """Topics ranked by the keyword matcher (score, then topic order)."""
+    scores = chatbot.match_topics(query.lower().strip())
+    return sorted(scores, key=lambda topic: (-scores[topic], chatbot.topic_order[topic]))
+
+
+def retrieval_ranking(index, query, depth=20):
+    """Topics in the order their best sentence appears in the BM25 ranking."""
+    ranking = []
+    for hit in index.search(query, k=depth):
+        if hit['topic'] not in ranking:
+            ranking.append(hit['topic'])
+    return ranking
+
+
+def evaluate(rank):
+    """Top-1 accuracy and mean reciprocal rank of the expected topic."""
+    top1 = reciprocal = 0.0
+    misses = []
+    for query, expected in LABELLED_QUERIES:
+        ranking = rank(query)
+        if ranking and ranking[0] == expected:
+            top1 += 1
+        else:
+            misses.append((query, expected, ranking[0] if ranking else None))
+        if expected in ranking:
+            reciprocal += 1 / (ranking.index(expected) + 1)
+    n = len(LABELLED_QUERIES)
+    return {'top1': top1 / n, 'mrr': reciprocal / n, 'misses': misses}
+
+
+def run():
+    index = KnowledgeIndex.build(chatbot.sleep_apnea_knowledge, chatbot.topic_keywords)
+    return {
+        'queries': len(LABELLED_QUERIES),
+        'keyword': evaluate(keyword_ranking),
+        'bm25': evaluate(lambda query: retrieval_ranking(index, query)),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Topic accuracy of keyword matching vs BM25 retrieval.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List the misclassified queries')
+    parser.add_argument('--min-top1', type=float, default=MIN_TOP1, help='Fail if BM25 top-1 accuracy is lower')
+    parser.add_argument('--min-mrr', type=float, default=MIN_MRR, help='Fail if BM25 MRR is lower')
+    args = parser.parse_args()
+
+    r = run()
+    print(f"{r['queries']} labelled queries")
+    for name in ('keyword', 'bm25'):
+        print(f"{name:>8}: top-1 {r[name]['top1']:.1%}  MRR {r[name]['mrr']:.3f}")
+        if args.verbose:
+            for query, expected, got in r[name]['misses']:
+                print(f"          {query!r}: expected {expected}, got {got}")
+    if r['bm25']['top1'] < args.min_top1 or r['bm25']['mrr'] < args.min_mrr:
+        sys.exit(f"❌ BM25 retrieval below top-1 {args.min_top1:.1%} / MRR {args.min_mrr:.3f}")
@@ -0,0 +1,155 @@
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlencode, urlsplit
+
+from _common import ROOT
+
+PATIENT = {'age': '52', 'gender': 'male', 'weight': '96', 'height': '178', 'oxygen_saturation': '91',
+           'pulse': '84', 'BPsys': '138', 'BPdia': '88'}
+MESSAGES = ["What are the symptoms of sleep apnea?", "yes", "How is it diagnosed?", "Tell me about CPAP therapy",
+            "What foods should I avoid?", "no thanks"]
+
+# Server commands for each serving mode; {port} and {workers} are filled in
+SERVERS = {
+    'wsgi': 'gunicorn --workers {workers} --threads 4 --bind 127.0.0.1:{port} app:app',
+    'asgi': 'uvicorn asgi:app --workers {workers} --host 127.0.0.1 --port {port} --log-level warning',
+}
+
+
+def multipart(fields, audio_path):
+    """Encode form fields and an audio file as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    with open(audio_path, 'rb') as f:
+        audio = f.read()
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="snoringSound"; '
+                 f'filename="{os.path.basename(audio_path)}"\r\nContent-Type: audio/wav\r\n\r\n'.encode()
+                 + audio + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def scenario_requests(scenario, audio_path=None):
+    """Return a function giving (method, path, body, content type) for the i-th request of a scenario."""
+    if scenario == 'chat':
+        return lambda i: ('POST', '/chat', json.dumps({'message': MESSAGES[i % len(MESSAGES)]}).encode(),
+                          'application/json')
+    if scenario == 'api':
+        patient = {name: value if name == 'gender' else float(value) for name, value in PATIENT.items()}
+        return lambda i: ('POST', '/api/v1/predict', json.dumps(patient).encode(), 'application/json')
+    if audio_path:
+        body, content_type = multipart(PATIENT, audio_path)
+    else:
+        body, content_type = urlencode(PATIENT).encode(), 'application/x-www-form-urlencoded'
+    return lambda i: ('POST', '/predict', body, content_type)
+
+
+def load(base_url, scenario, concurrency, duration, audio_path=None):
+    """Drive the server from `concurrency` keep-alive clients for `duration` seconds."""
+    url = urlsplit(base_url)
+    make_request = scenario_requests(scenario, audio_path)
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+        samples, failed, i = [], 0, 0
+        while time.perf_counter() < deadline:
+            method, path, body, content_type = make_request(i)
+            i += 1
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers={'Content-Type': content_type})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+                continue
+            samples.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(samples)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000 if latencies else None
+    return {'requests': len(latencies), 'errors': errors[0], 'rps': len(latencies) / elapsed,
+            'p50_ms': pick(0.5), 'p99_ms': pick(0.99)}
+
+
+def start_server(mode, port, workers):
+    """Start the app under gunicorn (wsgi) or uvicorn (asgi) and wait until it accepts requests."""
+    command = SERVERS[mode].format(port=port, workers=workers).split()
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/cache/stats')
+            conn.getresponse().read()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError(f"{command[0]} exited with status {server.returncode}")
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"{command[0]} did not start on port {port}")
+
+
+def run(modes=('wsgi', 'asgi'), scenarios=('chat', 'predict', 'api'), concurrency=32, duration=10, workers=2,
+        port=8765, audio_path=None):
+    results = {}
+    for mode in modes:
+        server = start_server(mode, port, workers)
+        try:
+            for scenario in scenarios:
+                results[(mode, scenario)] = load(f'http://127.0.0.1:{port}', scenario, concurrency, duration,
+                                                 audio_path)
+        finally:
+            server.terminate()
+            server.wait()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load-test /chat, /predict and /api/v1/predict under gunicorn (WSGI) '
+                                                 'and uvicorn (ASGI).')
+    parser.add_argument('--modes', nargs='+', choices=sorted(SERVERS), default=['wsgi', 'asgi'])
+    parser.add_argument('--scenarios', nargs='+', choices=['chat', 'predict', 'api'],
+                        default=['chat', 'predict', 'api'])
+    parser.add_argument('-c', '--concurrency', type=int, default=32, help='Concurrent keep-alive clients')
+    parser.add_argument('-d', '--duration', type=float, default=10, help='Seconds per scenario')
+    parser.add_argument('-w', '--workers', type=int, default=2, help='Server worker processes')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--audio', help='WAV file to upload with each /predict request')
+    args = parser.parse_args()
+
+    try:
+        results = run(args.modes, args.scenarios, args.concurrency, args.duration, args.workers, args.port, args.audio)
+    except (OSError, RuntimeError) as e:
+        sys.exit(f"❌ Could not start the server: {e}")
+    print(f"{'mode':<6}{'scenario':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for (mode, scenario), r in results.items():
+        print(f"{mode:<6}{scenario:<10}{r['rps']:>10.1f}{r['p50_ms'] or 0:>10.1f}{r['p99_ms'] or 0:>10.1f}"
+              f"{r['errors']:>8}")
@@ -0,0 +1,337 @@
+import os
+import tempfile
+
+# Keep the suite's feature store out of the working tree (set before app.py is imported)
+os.environ.setdefault('FEATURE_STORE_DIR', tempfile.mkdtemp(prefix='bench-feature-store-'))
+
+import argparse
+import io
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from _common import ROOT, load_snore_model, synthetic_snore, write_wav
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+# A result this much slower than the baseline is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+# name -> (setup, params, slow params); setup(param) returns the function to time
+BENCHMARKS = {}
+_temp_files = []
+
+
+class SkipBenchmark(Exception):
+    """Raised by a setup whose prerequisites are missing from this checkout."""
+
+
+def benchmark(*params, slow=()):
+    """Register a benchmark run once per param; params listed in `slow` are skipped with --quick."""
+    def register(setup):
+        BENCHMARKS[setup.__name__] = (setup, params or (None,), slow)
+        return setup
+    return register
+
+
+@benchmark(10, 60, 3600, slow=(3600,))
+def extract_features(seconds):
+    """Streaming feature extraction, as /predict runs it, for a recording of `seconds`."""
+    from audio_features import extract_features_streaming
+
+    path = _wav(seconds)
+    return lambda: extract_features_streaming(path)
+
+
+@benchmark(1000)
+def scoring_scalar(n):
+    """predict_ahi + calculate_sleep_quality + severity, one patient at a time."""
+    from bench_scoring import synthetic_patients
+    from scoring import calculate_sleep_quality, get_severity_level, predict_ahi
+
+    rows = list(zip(*synthetic_patients(n).values()))
+
+    def run():
+        for bmi, oxygen, snore, age, pulse in rows:
+            ahi = predict_ahi(bmi, oxygen, snore, age, pulse)
+            calculate_sleep_quality(ahi, snore, oxygen, pulse)
+            get_severity_level(ahi)
+    return run
+
+
+@benchmark(100_000)
+def scoring_vectorized(n):
+    """The array rule scoring used by /predict/batch."""
+    from bench_scoring import synthetic_patients
+    from scoring import calculate_sleep_quality_array, get_severity_level_array, predict_ahi_array
+
+    c = synthetic_patients(n)
+
+    def run():
+        ahi = predict_ahi_array(c['bmi'], c['oxygen_saturation'], c['snore_score'], c['age'], c['pulse_rate'])
+        calculate_sleep_quality_array(ahi, c['snore_score'], c['oxygen_saturation'], c['pulse_rate'])
+        get_severity_level_array(ahi)
+    return run
+
+
+@benchmark(1, 100)
+def clean_rows(copies):
+    """CleaningTransform.transform over `copies` stacked copies of final_dataset.csv."""
+    import pandas as pd
+    import clean_data
+    from cleaning import CleaningTransform
+    from dataset_cache import parse_dataset
+
+    source = os.path.join(ROOT, 'final_dataset.csv')
+    transform = CleaningTransform.from_state(clean_data.fit(source))
+    rows = pd.concat([parse_dataset(source)] * copies, ignore_index=True)
+    return lambda: transform.transform(rows)
+
+
+@benchmark(1000)
+def advice_single(n):
+    """AdvicePredictor.predict for n patients, one call each."""
+    advisor, cases = _advice_cases(n)
+
+    def run():
+        for case in cases:
+            advisor.predict(*case)
+    return run
+
+
+@benchmark(10_000)
+def advice_batch(n):
+    """AdvicePredictor.predict_batch for n patients in one call."""
+    advisor, cases = _advice_cases(n)
+    columns = [list(column) for column in zip(*cases)]
+    return lambda: advisor.predict_batch(*columns)
+
+
+@benchmark(1000)
+def chatbot_response(n):
+    """get_chatbot_response over a corpus of n synthetic messages."""
+    import chatbot
+    from bench_chatbot import corpus
+
+    messages = corpus(n)
+    chatbot.knowledge_index()
+
+    def run():
+        for message in messages:
+            chatbot.get_chatbot_response(message)
+    return run
+
+
+@benchmark(None, 10)
+def predict_e2e(seconds):
+    """POST /predict through Flask's test client, without audio or with a recording of `seconds`.
+
+    Every request uploads different bytes so the feature store never answers it.
+    """
+    if not os.path.exists(os.path.join(ROOT, 'templates', 'result.html')):
+        raise SkipBenchmark("templates/result.html is not in this checkout")
+    import app
+
+    client = _test_client()
+    form = {'age': '52', 'gender': 'male', 'weight': '96', 'height': '178', 'oxygen_saturation': '91',
+            'pulse': '84', 'BPsys': '138', 'BPdia': '88'}
+
+    def post(data, **kwargs):
+        # Cached scores and advice would hide the work being measured
+        app.scoring_cache.clear()
+        app.advice_cache.clear()
+        response = client.post('/predict', data=data, **kwargs)
+        if response.status_code != 200 or b'Error:' in response.data:
+            raise RuntimeError(f"/predict failed with status {response.status_code}")
+
+    if seconds is None:
+        return lambda: post(form)
+
+    with open(_wav(seconds), 'rb') as f:
+        audio = bytearray(f.read())
+    counter = [0]
+
+    def run():
+        # Bump the last sample so the content hash differs on every request
+        counter[0] += 1
+        audio[-1] = counter[0] % 256
+        post(dict(form, snoringSound=(io.BytesIO(bytes(audio)), 'night.wav')), content_type='multipart/form-data')
+    return run
+
+
+def _wav(seconds):
+    path = write_wav(synthetic_snore(seconds), 44100)
+    _temp_files.append(path)
+    return path
+
+
+def _advice_cases(n, seed=0):
+    import app
+
+    advisor = app.models.get('advisor')
+    rng = np.random.default_rng(seed)
+    severities, weights = list(advisor.severity_codes), list(advisor.weight_codes)
+    cases = [(round(rng.uniform(0, 40), 1), round(rng.uniform(17, 50), 2),
+              severities[rng.integers(len(severities))], weights[rng.integers(len(weights))]) for _ in range(n)]
+    return advisor, cases
+
+
+def _test_client():
+    import app
+
+    if not os.path.exists(os.path.join(ROOT, 'snore_model.pkl')):
+        app.models.register('snore', loader=lambda: load_snore_model()[0])
+    return app.app.test_client()
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """Seconds per call: one warm-up call, then `repeat` samples of enough calls to last min_time."""
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    number = max(1, min(10_000, math.ceil(min_time / max(first, 1e-9))))
+    if first > 5 * min_time:
+        repeat = min(repeat, 3)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {'min': min(samples), 'median': statistics.median(samples),
+            'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0, 'number': number, 'repeat': repeat}
+
+
+def git_revision():
+    """(short commit, whether the working tree has uncommitted changes), or ('unknown', True) outside git."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', True
+
+
+def machine_info():
+    import librosa
+    import sklearn
+
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'numpy': np.__version__, 'librosa': librosa.__version__, 'sklearn': sklearn.__version__}
+
+
+def run(pattern=None, quick=False, repeat=5):
+    commit, dirty = git_revision()
+    results = {}
+    try:
+        for name, (setup, params, slow) in BENCHMARKS.items():
+            for param in params:
+                if quick and param in slow:
+                    continue
+                key = name if param is None else f'{name}[{param}]'
+                if pattern and pattern not in key:
+                    continue
+                print(f"⏱️  {key} ...", end=' ', flush=True)
+                # One failing benchmark is recorded and the rest still run
+                try:
+                    results[key] = measure(setup(param), repeat)
+                except SkipBenchmark as e:
+                    results[key] = {'skipped': str(e)}
+                    print(f"skipped: {e}")
+                    continue
+                except Exception as e:
+                    results[key] = {'error': f"{type(e).__name__}: {e}"}
+                    print(f"❌ {results[key]['error']}")
+                    continue
+                print(f"{_format_seconds(results[key]['min'])}")
+    finally:
+        for path in _temp_files:
+            if os.path.exists(path):
+                os.remove(path)
+    return {'commit': commit, 'dirty': dirty, 'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'machine': machine_info(), 'results': results}
+
+
+def save(report, directory=RESULTS_DIR):
+    """Write results as <commit>[-dirty].json, merging with earlier runs of the same commit."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, report['commit'] + ('-dirty' if report['dirty'] else '') + '.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f)
+        report = dict(report, results={**previous.get('results', {}), **report['results']})
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    return path
+
+
+def load(ref, directory=RESULTS_DIR):
+    """Results for a commit (any unambiguous prefix, resolved through git) or a results file path."""
+    if os.path.exists(ref):
+        path = ref
+    else:
+        try:
+            ref = subprocess.run(['git', 'rev-parse', '--short', ref], cwd=ROOT, capture_output=True, text=True,
+                                 check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            pass
+        path = os.path.join(directory, ref + '.json')
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Rows of (benchmark, baseline s, current s, ratio, verdict) for benchmarks timed in both runs."""
+    rows = []
+    for key, result in current['results'].items():
+        if 'min' not in result or 'min' not in baseline['results'].get(key, {}):
+            continue
+        before, after = baseline['results'][key]['min'], result['min']
+        ratio = after / before
+        verdict = 'REGRESSION' if ratio > 1 + threshold else 'faster' if ratio < 1 - threshold else ''
+        rows.append((key, before, after, ratio, verdict))
+    return rows
+
+
+def _format_seconds(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.3g} {unit}'
+    return f'{seconds / 1e-9:.3g} ns'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark suite for the app hot paths; results are stored '
+                                                 'per commit in benchmarks/results/.')
+    parser.add_argument('-k', dest='pattern', help='Only run benchmarks whose name contains this string')
+    parser.add_argument('--quick', action='store_true', help='Skip slow benchmarks (one-hour recording)')
+    parser.add_argument('--repeat', type=int, default=5, help='Samples per benchmark')
+    parser.add_argument('--compare', metavar='REF', help='Commit or results file to compare against')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Slowdown ratio reported as a regression (default 0.10 = 10%%)')
+    parser.add_argument('--no-save', action='store_true', help="Don't write the results file")
+    args = parser.parse_args()
+
+    report = run(args.pattern, args.quick, args.repeat)
+    if not args.no_save:
+        print(f"✅ Results saved to {os.path.relpath(save(report))}")
+
+    if args.compare:
+        baseline = load(args.compare)
+        rows = compare(baseline, report, args.threshold)
+        print(f"\nCompared with {baseline['commit']} ({baseline['date']}):")
+        print(f"{'benchmark':<32}{'baseline':>12}{'current':>12}{'ratio':>8}")
+        for key, before, after, ratio, verdict in rows:
+            print(f"{key:<32}{_format_seconds(before):>12}{_format_seconds(after):>12}{ratio:>8.2f}  {verdict}")
+        if any(verdict == 'REGRESSION' for *_, verdict in rows):
+            sys.exit(1)
+    if any('error' in result for result in report['results'].values()):
+        sys.exit(1)
@@ -0,0 +1,122 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from audio_features import FEATURE_NAMES
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg', '.mp3', '.m4a', '.aiff')
+BLAS_THREAD_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+
+def find_recordings(paths):
+    """Expand files and directories into a sorted list of audio files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def _init_worker(blas_threads):
+    """Pin BLAS/OpenMP pools so N workers do not each spawn one thread per core."""
+    for var in BLAS_THREAD_VARS:
+        os.environ[var] = str(blas_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    # Pools already initialised before the fork ignore the variables above
+    threadpool_limits(limits=blas_threads)
+
+
+def _extract_one(path):
+    from audio_features import extract_features_streaming
+
+    try:
+        return path, extract_features_streaming(path).astype(np.float32), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def ingest(files, workers=None, chunksize=1, blas_threads=1):
+    """Extract features for every file across a process pool.
+
+    Returns (features DataFrame indexed by path, {path: error} for failed files).
+    """
+    workers = workers or os.cpu_count()
+    paths, vectors, errors = [], [], {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(blas_threads,)) as pool:
+        for path, vector, error in pool.map(_extract_one, files, chunksize=chunksize):
+            if vector is None:
+                errors[path] = error
+            else:
+                paths.append(path)
+                vectors.append(vector)
+
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, len(FEATURE_NAMES)), dtype=np.float32)
+    features = pd.DataFrame(matrix, columns=FEATURE_NAMES, index=pd.Index(paths, name='path'))
+    return features, errors
+
+
+def write_features(features, output):
+    """Write features in a columnar format: Parquet, or a NumPy .npz archive."""
+    if output.endswith('.npz'):
+        np.savez(output, paths=features.index.to_numpy(dtype=str), features=features.to_numpy(),
+                 columns=np.array(FEATURE_NAMES))
+    else:
+        features.reset_index().to_parquet(output, index=False)
+
+
+def measure_scaling(files, max_workers, chunksize=1, blas_threads=1):
+    """Files/sec for 1, 2, 4, ... up to max_workers worker processes."""
+    counts = sorted({1, max_workers, *[2 ** i for i in range(1, max_workers.bit_length()) if 2 ** i < max_workers]})
+    rates = {}
+    for n in counts:
+        start = time.perf_counter()
+        ingest(files, workers=n, chunksize=chunksize, blas_threads=blas_threads)
+        rates[n] = len(files) / (time.perf_counter() - start)
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract snore features from a backlog of recordings.')
+    parser.add_argument('inputs', nargs='+', help='Audio files or directories')
+    parser.add_argument('-o', '--output', default='features.parquet', help='Output file (.parquet or .npz)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--chunksize', type=int, default=1, help='Files handed to a worker at a time')
+    parser.add_argument('--blas-threads', type=int, default=1, help='BLAS threads per worker')
+    parser.add_argument('--scaling', action='store_true', help='Report files/sec from 1 to --workers processes')
+    args = parser.parse_args()
+
+    files = find_recordings(args.inputs)
+    if not files:
+        print("No recordings found.")
+        return
+
+    if args.scaling:
+        rates = measure_scaling(files, args.workers, args.chunksize, args.blas_threads)
+        base = rates[1]
+        print(f"\n📈 Scaling over {len(files)} files:")
+        for n, rate in rates.items():
+            print(f"{n:>3} workers: {rate:7.2f} files/sec ({rate / base:.2f}x)")
+        return
+
+    start = time.perf_counter()
+    features, errors = ingest(files, args.workers, args.chunksize, args.blas_threads)
+    elapsed = time.perf_counter() - start
+    write_features(features, args.output)
+    for path, error in errors.items():
+        print(f"⚠️ Skipped {path}: {error}")
+    print(f"✅ Extracted features for {len(features)} files in {elapsed:.1f} s "
+          f"({len(files) / elapsed:.2f} files/sec). Saved as '{args.output}'.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional time-to-live."""
+
+    def __init__(self, maxsize=4096, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return _stats(self.hits, self.misses, len(self._data), self.maxsize)
+
+
+class SQLiteCache:
+    """Cache kept in a local SQLite file so every gunicorn worker shares its entries.
+
+    Each cache sharing the file keeps its entries in its own `table`. Hit/miss
+    counters are per process; size is the number of rows in the table.
+    """
+
+    def __init__(self, path, table='cache', maxsize=100000, ttl=None):
+        if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', table):
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.path = path
+        self.table = table
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                         "(key BLOB PRIMARY KEY, value BLOB, expires REAL, accessed REAL)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            # Connections must not cross a fork, so each worker process opens its own
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        conn = self._connect()
+        blob = pickle.dumps(key)
+        row = conn.execute(f"SELECT value, expires FROM {self.table} WHERE key = ?", (blob,)).fetchone()
+        now = time.time()
+        if row is not None and (row[1] is None or row[1] > now):
+            conn.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, blob))
+            with self._lock:
+                self.hits += 1
+            return pickle.loads(row[0])
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        conn = self._connect()
+        now = time.time()
+        expires = now + self.ttl if self.ttl else None
+        conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                     (pickle.dumps(key), pickle.dumps(value), expires, now))
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % 256 == 0
+        if evict:
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute(f"DELETE FROM {self.table} WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        conn.execute(f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY accessed DESC "
+                     "LIMIT -1 OFFSET ?)", (self.maxsize,))
+
+    def clear(self):
+        self._connect().execute(f"DELETE FROM {self.table}")
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self):
+        size = self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        with self._lock:
+            return _stats(self.hits, self.misses, size, self.maxsize)
+
+
+class ScoringCache:
+    """In-process LRU in front of an optional shared SQLite file, where `name` is its table."""
+
+    def __init__(self, name, maxsize=4096, ttl=None, db_path=None, shared_maxsize=100000):
+        self.name = name
+        self.memory = LRUCache(maxsize, ttl)
+        self.shared = SQLiteCache(db_path, name, shared_maxsize, ttl) if db_path else None
+
+    def get_or_compute(self, key, compute):
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.shared is not None:
+            value = self.shared.get(key, _MISSING)
+            if value is not _MISSING:
+                self.memory.set(key, value)
+                return value
+        value = compute()
+        self.memory.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+        return value
+
+    def clear(self):
+        self.memory.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self):
+        stats = {'memory': self.memory.stats()}
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
+
+
+def _stats(hits, misses, size, maxsize):
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / lookups if lookups else 0.0,
+        'size': size,
+        'maxsize': maxsize,
+    }
@@ -0,0 +1,100 @@
+import itertools
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class ChatSession:
+    """Conversation context kept between /chat messages."""
+
+    __slots__ = ('last_topic', 'offered', 'turns', 'expires')
+
+    def __init__(self):
+        self.last_topic = None
+        self.offered = ()  # topics proposed by the last follow-up question
+        self.turns = 0
+        self.expires = None
+
+
+class SessionStore:
+    """Bounded in-memory chat sessions with LRU eviction and a sliding time-to-live.
+
+    Every access moves a session to the end and pushes its expiry forward, so
+    the OrderedDict is ordered by expiry too: expired sessions are always at the
+    front and are dropped there on each access, without scanning the store.
+    """
+
+    def __init__(self, maxsize=50000, ttl=1800):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id=None):
+        """Return (session_id, session), starting a new session for unknown or expired ids."""
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session_id = uuid.uuid4().hex
+                session = self._sessions[session_id] = ChatSession()
+                self.created += 1
+                while len(self._sessions) > self.maxsize:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            session.expires = now + self.ttl if self.ttl else None
+            return session_id, session
+
+    def _purge(self, now):
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.expires is None or session.expires > now:
+                return
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def memory_bytes(self, sample=256):
+        """Approximate bytes held by the store: its hash table plus sampled per-session sizes."""
+        with self._lock:
+            count = len(self._sessions)
+            sampled = list(itertools.islice(self._sessions.items(), sample))
+            table = sys.getsizeof(self._sessions)
+        if not sampled:
+            return table
+        per_session = sum(_session_bytes(key, session) for key, session in sampled) / len(sampled)
+        return int(table + per_session * count)
+
+    def stats(self):
+        memory = self.memory_bytes()
+        with self._lock:
+            count = len(self._sessions)
+            return {
+                'sessions': count,
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'created': self.created,
+                'evicted': self.evicted,
+                'expired': self.expired,
+                'memory_bytes': memory,
+                'bytes_per_session': memory / count if count else 0.0,
+            }
+
+
+def _session_bytes(session_id, session):
+    # offered holds the chatbot's shared follow_up_topics tuples, so it adds nothing per session
+    return sys.getsizeof(session_id) + sys.getsizeof(session) + sys.getsizeof(session.expires)
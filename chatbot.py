@@ -1,6 +1,10 @@
+import os
 import random
 import re
 from datetime import datetime
+from functools import lru_cache
+
+from knowledge_index import INDEX_PATH, load_or_build
 
 # Enhanced knowledge base for sleep apnea
 sleep_apnea_knowledge = {
@@ -124,61 +128,176 @@ farewells = [
     "Take care and don't hesitate to return with more questions!"
 ]
 
-def get_chatbot_response(user_input):
+# Greeting and farewell triggers
+greeting_keywords = ["hi", "hello", "hey", "good morning", "good afternoon", "good evening"]
+farewell_keywords = ["bye", "goodbye", "thanks", "thank you", "see you"]
+
+# Follow-up question offered after each topic's answer
+follow_ups = {
+    "general": "Would you like to know more about specific symptoms or treatments?",
+    "symptoms": "Would you like to know about causes or treatment options?",
+    "causes": "Would you like to learn about prevention or treatment options?",
+    "treatment": "Would you like to know more about CPAP therapy or lifestyle changes?",
+    "diagnosis": "Would you like to know about treatment options or lifestyle changes?",
+    "complications": "Would you like to know how to prevent these complications?",
+    "prevention": "Would you like to know more about lifestyle changes or treatment options?",
+    "lifestyle": "Would you like to know more about specific treatment options?",
+    "children": "Would you like to know more about diagnosis or treatment for children?",
+    "cpap": "Would you like to know more about other treatment options?",
+    "diet": "Would you like to know about exercise recommendations or sleep positions?",
+    "exercise": "Would you like to know about dietary recommendations or sleep positions?",
+    "sleep_position": "Would you like to know about other lifestyle changes or treatments?",
+    "alternative_treatments": "Would you like to know about traditional treatments or lifestyle changes?",
+    "pregnancy": "Would you like to know about treatment options or lifestyle changes during pregnancy?",
+    "elderly": "Would you like to know about treatment options or lifestyle changes for older adults?"
+}
+
+# Topics each follow-up question offers, so a "yes" can be answered from the session
+follow_up_topics = {
+    "general": ("symptoms", "treatment"),
+    "symptoms": ("causes", "treatment"),
+    "causes": ("prevention", "treatment"),
+    "treatment": ("cpap", "lifestyle"),
+    "diagnosis": ("treatment", "lifestyle"),
+    "complications": ("prevention",),
+    "prevention": ("lifestyle", "treatment"),
+    "lifestyle": ("treatment",),
+    "children": ("diagnosis", "treatment"),
+    "cpap": ("alternative_treatments",),
+    "diet": ("exercise", "sleep_position"),
+    "exercise": ("diet", "sleep_position"),
+    "sleep_position": ("lifestyle", "treatment"),
+    "alternative_treatments": ("treatment", "lifestyle"),
+    "pregnancy": ("treatment", "lifestyle"),
+    "elderly": ("treatment", "lifestyle")
+}
+
+# Short replies that accept the follow-up question ("yes", "sure, tell me more", "ok please")
+affirmative_pattern = re.compile(r"^(?:(?:yes|yeah|yep|yup|sure|ok|okay|please|of course|definitely|go on|go ahead"
+                                 r"|tell me more|more|continue)[\s,.!?]*)+$")
+# Short replies that decline it
+negative_pattern = re.compile(r"^(?:no|nope|not now|no thanks|no thank you)[\s,.!?]*$")
+declined_responses = [
+    "No problem! Is there anything else you'd like to know about sleep apnea?",
+    "Alright. Feel free to ask me anything else about sleep apnea."
+]
+
+# Fallback when no topic matches
+contextual_responses = [
+    "I'm here to help with sleep apnea information. Could you tell me more about what you'd like to know?",
+    "I specialize in sleep apnea information. Could you be more specific about your question?",
+    "I'd be happy to help with your sleep apnea questions. What specific aspect would you like to know more about?",
+    "I understand you have questions about sleep apnea. Would you like to know about symptoms, causes, treatment, or something else?",
+    "I can help you with information about sleep apnea. What specific topic would you like to learn about?"
+]
+
+def _trie_regex(keywords):
+    """Regex source for a set of keywords, factored into a character trie.
+
+    Shared prefixes are matched once, so the engine does not retry every
+    keyword at each position; greedy optional branches prefer the longest keyword.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+def _compile_keyword_pattern(keywords):
+    """One regex that finds every whole-word keyword occurrence in a single pass.
+
+    The zero-width lookahead lets matches overlap ("sleep apnea" and "apnea"). When
+    two keywords start at the same word, the longer one wins; no keyword is a
+    whole-word prefix of another, so none is lost.
+    """
+    return re.compile(r"\b(?=(" + _trie_regex(set(keywords)) + r")\b)")
+
+# Which topics each keyword counts towards
+keyword_topics = {}
+for _topic, _keywords in topic_keywords.items():
+    for _keyword in _keywords:
+        keyword_topics.setdefault(_keyword, []).append(_topic)
+
+keyword_pattern = _compile_keyword_pattern(list(keyword_topics) + greeting_keywords + farewell_keywords)
+greeting_set = frozenset(greeting_keywords)
+farewell_set = frozenset(farewell_keywords)
+topic_order = {topic: index for index, topic in enumerate(topic_keywords)}
+
+def matched_keywords(user_input):
+    """The topic, greeting and farewell keywords found as whole words in a lowercased message."""
+    return {match.group(1) for match in keyword_pattern.finditer(user_input)}
+
+def match_topics(user_input):
+    """{topic: number of its keywords found} for a lowercased message (the keyword baseline of retrieval)."""
+    scores = {}
+    for keyword in matched_keywords(user_input):
+        for topic in keyword_topics.get(keyword, ()):
+            scores[topic] = scores.get(topic, 0) + 1
+    return scores
+
+# Where the index is persisted: next to this module rather than in whatever directory the server runs from
+KNOWLEDGE_INDEX_PATH = os.environ.get('KNOWLEDGE_INDEX_PATH',
+                                      os.path.join(os.path.dirname(os.path.abspath(__file__)), INDEX_PATH))
+# Best-sentence score below which a message is treated as off-topic. Every labelled question of
+# benchmarks/eval_chatbot_retrieval.py scores above 3.7; a single stray shared word ("weather like") about 2.9
+MIN_SCORE = 3.0
+
+@lru_cache(maxsize=None)
+def knowledge_index():
+    """BM25 index over the knowledge base, loaded from disk (or built and saved) on first use."""
+    return load_or_build(sleep_apnea_knowledge, topic_keywords, KNOWLEDGE_INDEX_PATH)
+
+def retrieve(query, k=3):
+    """Top-k knowledge-base sentences for a question, best first; none when nothing scores MIN_SCORE."""
+    return knowledge_index().search(query, k, MIN_SCORE)
+
+def answer_topic(topic, passage=None, session=None):
+    """A passage from a topic plus its follow-up question, remembering both in the session."""
+    passages = sleep_apnea_knowledge[topic]
+    response = passages[passage] if passage is not None else random.choice(passages)
+    if session is not None:
+        session.last_topic = topic
+        session.offered = follow_up_topics.get(topic, ())
+    return f"{response} {follow_ups.get(topic, 'Is there anything else you would like to know?')}"
+
+def get_chatbot_response(user_input, session=None):
+    """Reply to a message; with a ChatSession, replies to the last follow-up question use its context."""
     # Convert input to lowercase for matching
     user_input = user_input.lower().strip()
-    
+    if session is not None:
+        session.turns += 1
+        offered = session.offered
+        session.offered = ()
+        # Route answers to the last follow-up question straight from the session
+        if offered and affirmative_pattern.match(user_input):
+            return answer_topic(offered[0], session=session)
+        if offered and negative_pattern.match(user_input):
+            return random.choice(declined_responses)
+
+    matched = matched_keywords(user_input)
+
     # Check for greetings
-    if any(greeting in user_input for greeting in ["hi", "hello", "hey", "good morning", "good afternoon", "good evening"]):
+    if not greeting_set.isdisjoint(matched):
         return random.choice(greetings)
-    
+
     # Check for farewells
-    if any(farewell in user_input for farewell in ["bye", "goodbye", "thanks", "thank you", "see you"]):
+    if not farewell_set.isdisjoint(matched):
         return random.choice(farewells)
-    
-    # Check for topic keywords with improved matching
-    matched_topic = None
-    best_match_score = 0
-    
-    for topic, keywords in topic_keywords.items():
-        match_score = sum(1 for keyword in keywords if keyword in user_input)
-        if match_score > best_match_score:
-            best_match_score = match_score
-            matched_topic = topic
-    
-    if matched_topic and matched_topic in sleep_apnea_knowledge:
-        # Get a random response from the matched topic
-        response = random.choice(sleep_apnea_knowledge[matched_topic])
-        
-        # Add follow-up question
-        follow_ups = {
-            "general": "Would you like to know more about specific symptoms or treatments?",
-            "symptoms": "Would you like to know about causes or treatment options?",
-            "causes": "Would you like to learn about prevention or treatment options?",
-            "treatment": "Would you like to know more about CPAP therapy or lifestyle changes?",
-            "diagnosis": "Would you like to know about treatment options or lifestyle changes?",
-            "complications": "Would you like to know how to prevent these complications?",
-            "prevention": "Would you like to know more about lifestyle changes or treatment options?",
-            "lifestyle": "Would you like to know more about specific treatment options?",
-            "children": "Would you like to know more about diagnosis or treatment for children?",
-            "cpap": "Would you like to know more about other treatment options?",
-            "diet": "Would you like to know about exercise recommendations or sleep positions?",
-            "exercise": "Would you like to know about dietary recommendations or sleep positions?",
-            "sleep_position": "Would you like to know about other lifestyle changes or treatments?",
-            "alternative_treatments": "Would you like to know about traditional treatments or lifestyle changes?",
-            "pregnancy": "Would you like to know about treatment options or lifestyle changes during pregnancy?",
-            "elderly": "Would you like to know about treatment options or lifestyle changes for older adults?"
-        }
-        
-        return f"{response} {follow_ups.get(matched_topic, 'Is there anything else you would like to know?')}"
-    
+
+    # Answer with the passage holding the best-ranked sentence
+    hits = retrieve(user_input, k=1)
+    if hits:
+        return answer_topic(hits[0]['topic'], hits[0]['passage'], session)
+
     # If no specific topic is matched, provide a contextual response
-    contextual_responses = [
-        "I'm here to help with sleep apnea information. Could you tell me more about what you'd like to know?",
-        "I specialize in sleep apnea information. Could you be more specific about your question?",
-        "I'd be happy to help with your sleep apnea questions. What specific aspect would you like to know more about?",
-        "I understand you have questions about sleep apnea. Would you like to know about symptoms, causes, treatment, or something else?",
-        "I can help you with information about sleep apnea. What specific topic would you like to learn about?"
-    ]
-    
-    return random.choice(contextual_responses) 
\ No newline at end of file
+    return random.choice(contextual_responses)
\ No newline at end of file
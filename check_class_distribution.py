@@ -1,7 +1,7 @@
-import pandas as pd
+from dataset_cache import load_dataset
 
 # Load cleaned dataset
-df = pd.read_csv('cleaned_dataset.csv')
+df = load_dataset('cleaned_dataset.csv')
 
 # Check class distribution
 print("\n🔍 Diagnosis Class Distribution:")
@@ -1,22 +1,15 @@
-import pandas as pd
-import numpy as np
+from dataset_cache import load_dataset
 
-# Load dataset
-df = pd.read_csv('final_dataset.csv')
-
-# Convert categorical columns to strings to prevent conversion errors
-df = df.astype(str)
+# Load dataset (already typed: labels are categoricals, measurements float32)
+df = load_dataset('final_dataset.csv')
 
 # Check class balance
 print("\n🔍 Diagnosis Class Distribution:")
-print(df['Diagnosis_of_SDB'].value_counts(normalize=True) * 100)
+print(df['Diagnosis_of_SDB'].value_counts(normalize=True, dropna=False) * 100)
 
-# Convert numeric columns back (ignore categorical ones)
-for col in df.columns:
-    try:
-        df[col] = pd.to_numeric(df[col])
-    except ValueError:
-        print(f"⚠️ Column '{col}' is non-numeric and will be ignored in variance & correlation checks.")
+# Text and label columns are left out of the numeric checks
+for col in df.select_dtypes(exclude=['number', 'bool', 'boolean']).columns:
+    print(f"⚠️ Column '{col}' is non-numeric and will be ignored in variance & correlation checks.")
 
 # Check for low-variance features
 low_variance_features = df.var(numeric_only=True)[df.var(numeric_only=True) < 0.01].index.tolist()
@@ -1,9 +1,10 @@
 import pandas as pd
+from dataset_cache import load_dataset
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 
 # Load cleaned dataset
-df = pd.read_csv('cleaned_dataset.csv')
+df = load_dataset('cleaned_dataset.csv')
 
 # Select same features as in training
 features = ['Age', 'BMI', 'Oxygen_Saturation', 'AHI', 'ECG_Heart_Rate', 'Snoring']
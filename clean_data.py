@@ -1,43 +1,97 @@
+import argparse
+import json
+import os
+import time
+
 import pandas as pd
-import numpy as np
+from cleaning import TARGET, CleaningTransform
+from dataset_cache import apply_schema
+
+SOURCE = 'final_dataset.csv'
+OUTPUT = 'cleaned_dataset.csv'
+CHUNK_ROWS = 100_000
+
+
+def state_path(output):
+    """Progress kept next to the cleaned CSV: cleaned_dataset.csv -> cleaned_dataset.state.json."""
+    return os.path.splitext(output)[0] + '.state.json'
+
 
-# Load dataset
-df = pd.read_csv('final_dataset.csv')
+def read_chunks(source, chunk_rows, skip_rows=0):
+    """Typed chunks of the source CSV, starting after its first `skip_rows` rows."""
+    skip = range(1, skip_rows + 1) if skip_rows else None
+    for chunk in pd.read_csv(source, skiprows=skip, chunksize=chunk_rows, low_memory=False):
+        yield apply_schema(chunk)
 
-# Remove rows where 'Diagnosis_of_SDB' is missing
-df = df.dropna(subset=['Diagnosis_of_SDB'])
 
-# Drop unnecessary text-based columns
-columns_to_remove = ['user_id', 'night_id', 'Patient_ID', 'Physician_Notes', 'Patient_Symptoms']
-df = df.drop(columns=columns_to_remove, errors='ignore')
+def fit(source, chunk_rows=CHUNK_ROWS):
+    """Diagnosis codes and per-column medians over the whole source, one chunk at a time."""
+    labels = set()
+    for chunk in pd.read_csv(source, usecols=[TARGET], dtype=str, chunksize=chunk_rows):
+        labels.update(chunk[TARGET].dropna().unique())
+    # Sorted, like the category codes of a single full pass
+    transform = CleaningTransform({label: code for code, label in enumerate(sorted(labels))})
+    transform.fit(read_chunks(source, chunk_rows))
+    return dict(transform.to_state(), source_rows=0, output_bytes=0, columns=None)
 
-# Convert categorical columns to numeric
-df['Gender'] = df['Gender'].map({'Male': 1, 'Female': 0})
-df['CPAP'] = df['CPAP'].map({'True': 1, 'False': 0})
-df['Surgery'] = df['Surgery'].map({'True': 1, 'False': 0})
 
-# Convert Diagnosis_of_SDB into categories
-df['Diagnosis_of_SDB'] = df['Diagnosis_of_SDB'].astype('category').cat.codes
+def save_state(state, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
 
-# Convert all numeric-like columns properly
-numeric_columns = ['Age', 'BMI', 'Oxygen_Saturation', 'AHI', 'ECG_Heart_Rate', 'SpO2', 'Nasal_Airflow', 'Chest_Movement']
-for col in numeric_columns:
-    df[col] = pd.to_numeric(df[col], errors='coerce')
 
-# Fill missing numeric values with median
-df.fillna(df.median(numeric_only=True), inplace=True)
+def clean(source=SOURCE, output=OUTPUT, chunk_rows=CHUNK_ROWS, rebuild=False):
+    """Append the cleaned form of source rows not cleaned before to `output`.
 
-# ✅ NEW: Estimate ODI based on Oxygen Saturation
-df['ODI'] = df['Oxygen_Saturation'].apply(lambda x: 30 if x < 90 else 20 if x < 93 else 10 if x < 95 else 0)
+    The first run (or rebuild=True) fits medians and diagnosis codes over the
+    whole source and rewrites the output. Later runs keep those, skip the
+    source rows already cleaned and append only the rows merged since.
+    """
+    path = state_path(output)
+    state = None
+    if not rebuild and os.path.exists(path) and os.path.exists(output):
+        with open(path) as f:
+            state = json.load(f)
+        if os.path.getsize(output) > state['output_bytes']:
+            # The last run stopped between writing a chunk and recording it
+            with open(output, 'r+b') as f:
+                f.truncate(state['output_bytes'])
+    if state is None:
+        state = fit(source, chunk_rows)
+        if os.path.exists(output):
+            os.remove(output)
 
-# ✅ NEW: Add Blood Pressure Columns (Estimated if missing)
-df['BPsys'] = 120 + (df['BMI'] * 0.3)  # Example estimation
-df['BPdia'] = 80 + (df['BMI'] * 0.2)   # Example estimation
+    stats = {'rows_read': 0, 'rows_written': 0}
+    start = time.perf_counter()
+    transform = CleaningTransform.from_state(state)
+    for chunk in read_chunks(source, chunk_rows, state['source_rows']):
+        cleaned = transform.transform(chunk)
+        # Diagnoses first seen in this chunk got new codes
+        state.update(transform.to_state())
+        if state['columns'] is None:
+            state['columns'] = list(cleaned.columns)
+        with open(output, 'a', newline='') as f:
+            cleaned.reindex(columns=state['columns']).to_csv(f, index=False, header=state['output_bytes'] == 0)
+        state['source_rows'] += len(chunk)
+        state['output_bytes'] = os.path.getsize(output)
+        save_state(state, path)
+        stats['rows_read'] += len(chunk)
+        stats['rows_written'] += len(cleaned)
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = stats['rows_read'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
 
-# ✅ NEW: Add Snoring_Score (Random values for now, replace if real data is available)
-df['Snoring_Score'] = np.random.randint(0, 100, size=len(df))  # Replace with real snoring data if available
 
-# Save cleaned dataset
-df.to_csv('cleaned_dataset.csv', index=False)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Clean the merged dataset, appending only rows not cleaned before.')
+    parser.add_argument('--source', default=SOURCE, help='Merged CSV written by merge_data.py')
+    parser.add_argument('--output', default=OUTPUT, help='Cleaned CSV, appended to')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows read per chunk')
+    parser.add_argument('--rebuild', action='store_true', help='Refit medians and codes and rewrite the output')
+    args = parser.parse_args()
 
-print("✅ Data cleaning complete! Saved as 'cleaned_dataset.csv'.")
+    s = clean(args.source, args.output, args.chunk_rows, args.rebuild)
+    print(f"✅ Data cleaning complete! {s['rows_written']:,} rows appended to '{args.output}' "
+          f"({s['rows_per_second']:,.0f} source rows/s).")
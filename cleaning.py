@@ -0,0 +1,196 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# How each column of final_dataset.csv is cleaned: column -> (step, argument).
+#   drop     unnecessary text-based columns
+#   target   Diagnosis_of_SDB; rows without one are dropped, labels become fitted integer codes
+#   map      labels -> numbers; anything else becomes missing
+#   numeric  coerced to a number, unparseable values become missing
+# Every numeric column is then filled with its fitted median. Columns not listed are kept as they are.
+SCHEMA = {
+    'user_id': ('drop', None),
+    'night_id': ('drop', None),
+    'Patient_ID': ('drop', None),
+    'Physician_Notes': ('drop', None),
+    'Patient_Symptoms': ('drop', None),
+    'Diagnosis_of_SDB': ('target', None),
+    'Gender': ('map', {'Male': 1, 'Female': 0}),
+    'CPAP': ('map', {True: 1, 'True': 1, False: 0, 'False': 0}),
+    'Surgery': ('map', {True: 1, 'True': 1, False: 0, 'False': 0}),
+    'Age': ('numeric', None),
+    'BMI': ('numeric', None),
+    'Oxygen_Saturation': ('numeric', None),
+    'AHI': ('numeric', None),
+    'ECG_Heart_Rate': ('numeric', None),
+    'SpO2': ('numeric', None),
+    'Nasal_Airflow': ('numeric', None),
+    'Chest_Movement': ('numeric', None),
+}
+
+# Columns estimated where the source has no value (after the median fill): column -> (step, argument).
+#   bins    (input column, upper bounds, values, value above the last bound)
+#   linear  (input column, intercept, slope)
+#   random  (low, high): placeholder integers, seeded by the row's own values
+DERIVED = {
+    # ODI estimated from Oxygen Saturation
+    'ODI': ('bins', ('Oxygen_Saturation', [90, 93, 95], [30, 20, 10], 0)),
+    # Blood pressure estimated from BMI
+    'BPsys': ('linear', ('BMI', 120, 0.3)),
+    'BPdia': ('linear', ('BMI', 80, 0.2)),
+    # Snoring_Score: random values for now, replace if real snoring data is available
+    'Snoring_Score': ('random', (0, 100)),
+}
+
+TARGET = next(column for column, (step, _) in SCHEMA.items() if step == 'target')
+SEED = 42
+
+# Gender as the app receives it (any case) -> the label of final_dataset.csv that SCHEMA maps
+GENDER_LABELS = {'m': 'Male', 'male': 'Male', 'f': 'Female', 'female': 'Female'}
+
+# The app's patient fields -> columns of final_dataset.csv
+PATIENT_COLUMNS = {
+    'age': 'Age',
+    'gender': 'Gender',
+    'bmi': 'BMI',
+    'oxygen_saturation': 'Oxygen_Saturation',
+    'pulse_rate': 'ECG_Heart_Rate',
+    'BPsys': 'BPsys',
+    'BPdia': 'BPdia',
+    'snore_score': 'Snoring_Score',
+}
+
+
+def _lookup(column, mapping):
+    """Vectorized mapping.get(value): the mapped numbers as float64, NaN where a value is not a key."""
+    # Look up each distinct value once (categorical and boolean columns factorize without hashing)
+    codes, uniques = pd.factorize(column)
+    positions = pd.Index(list(mapping), dtype=object).get_indexer(pd.Index(uniques, dtype=object))
+    values = np.append(np.array(list(mapping.values()), dtype=np.float64), np.nan)[positions]
+    return np.append(values, np.nan)[codes]  # -1 (not a key, or missing) picks the trailing NaN
+
+
+def _as_float(column):
+    return column.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class CleaningTransform:
+    """The cleaning steps of SCHEMA and DERIVED with their fitted state, applied a whole frame at a time.
+
+    The state is the diagnosis codes, the median of every numeric column and
+    the seed of the Snoring_Score placeholder, so a row is cleaned the same
+    way in clean_data.py and, one at a time, in the app.
+    """
+
+    def __init__(self, diagnosis_codes=None, fill_values=None, seed=SEED):
+        self.diagnosis_codes = dict(diagnosis_codes or {})
+        self.fill_values = dict(fill_values or {})
+        self.seed = seed
+
+    def to_state(self):
+        return {'diagnosis_codes': self.diagnosis_codes, 'fill_values': self.fill_values, 'seed': self.seed}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state['diagnosis_codes'], state['fill_values'], state.get('seed', SEED))
+
+    @classmethod
+    def load(cls, path):
+        """Read the state clean_data.py keeps next to the cleaned CSV."""
+        with open(path) as f:
+            return cls.from_state(json.load(f))
+
+    def encode(self, df, target=True):
+        """The SCHEMA steps, up to (not including) the median fill.
+
+        With target=True rows without a diagnosis are dropped and a diagnosis
+        first seen here gets the next code, so rows encoded earlier keep
+        theirs. With target=False the diagnosis column is left out.
+        """
+        df = df.drop(columns=[column for column, (step, _) in SCHEMA.items()
+                              if step == 'drop' or (step == 'target' and not target)], errors='ignore')
+        if target:
+            df = df[df[TARGET].notna().to_numpy()]
+        encoded = {}
+        for column, (step, argument) in SCHEMA.items():
+            if column not in df.columns:
+                continue
+            if step == 'map':
+                values = _lookup(df[column], argument)
+                # Integers when every label was known, as pandas' map gives
+                encoded[column] = values if np.isnan(values).any() else values.astype(np.int64)
+            elif step == 'target':
+                codes, labels = pd.factorize(df[column].astype(str))
+                for label in labels:
+                    self.diagnosis_codes.setdefault(label, len(self.diagnosis_codes))
+                encoded[column] = np.array([self.diagnosis_codes[label] for label in labels], dtype=np.int8)[codes]
+            elif step == 'numeric' and not pd.api.types.is_numeric_dtype(df[column]):
+                encoded[column] = pd.to_numeric(df[column], errors='coerce')
+        return df.assign(**encoded)
+
+    def fit(self, chunks):
+        """Median of every numeric column over `chunks` of source rows (DataFrames), kept as fill values.
+
+        Only the numeric columns of the encoded rows are held in memory, to
+        take exact medians.
+        """
+        numeric = [self.encode(chunk).select_dtypes('number') for chunk in chunks]
+        medians = pd.concat(numeric).median() if numeric else pd.Series(dtype=float)
+        self.fill_values = {column: None if pd.isna(value) else float(value) for column, value in medians.items()}
+        return self
+
+    def transform(self, df, target=True):
+        """Clean a frame of final_dataset.csv rows, as typed by dataset_cache.apply_schema."""
+        df = self.encode(df, target)
+        missing = {column: df[column].isna().to_numpy() if column in df.columns else np.ones(len(df), dtype=bool)
+                   for column in DERIVED}
+        placeholder_rows = df.drop(columns=list(DERIVED), errors='ignore')
+
+        # Fill missing numeric values with median, every column in one pass; columns the rows do not
+        # have at all (e.g. those of a single patient from the app) are created from the median too
+        filled = {}
+        for column, value in self.fill_values.items():
+            if column in df.columns:
+                values = df[column].to_numpy()
+                if value is not None and values.dtype.kind == 'f':
+                    filled[column] = np.where(np.isnan(values), values.dtype.type(value), values)
+            elif column not in DERIVED and (target or column != TARGET):
+                filled[column] = np.full(len(df), np.nan if value is None else value)
+
+        def values_of(column):
+            return filled[column] if column in filled else _as_float(df[column])
+
+        for column, (step, argument) in DERIVED.items():
+            if step == 'bins':
+                source, bounds, values, above = argument
+                x = values_of(source)
+                estimate = np.select([x < bound for bound in bounds], values, above)
+            elif step == 'linear':
+                source, intercept, slope = argument
+                estimate = intercept + values_of(source) * slope
+            elif step == 'random':
+                low, high = argument
+                # The seed is hashed as one more column: hash_key only reaches text columns, and these are numeric
+                keys = pd.util.hash_pandas_object(placeholder_rows.assign(_seed=np.uint64(self.seed)), index=False)
+                estimate = (low + keys.to_numpy() % np.uint64(high - low)).astype(np.int64)
+            if column in df.columns and not missing[column].all():
+                estimate = np.where(missing[column], estimate, _as_float(df[column]))
+            filled[column] = estimate
+        return df.assign(**filled)
+
+    def transform_records(self, records):
+        """Clean dicts of source columns without a diagnosis, e.g. patients entered in the app.
+
+        Missing values come back as None.
+        """
+        cleaned = self.transform(pd.DataFrame.from_records(records), target=False)
+        return [{column: None if value != value else value for column, value in row.items()}
+                for row in cleaned.to_dict(orient='records')]
+
+
+def patient_record(patient, snore_score=None):
+    """A patient dict of the app (see api.validate_patient) as final_dataset.csv columns."""
+    values = dict(patient, bmi=patient['weight'] / patient['height'] ** 2, snore_score=snore_score)
+    values['gender'] = GENDER_LABELS.get(str(values['gender']).strip().lower(), values['gender'])
+    return {column: values[field] for field, column in PATIENT_COLUMNS.items() if values.get(field) is not None}
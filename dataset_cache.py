@@ -0,0 +1,130 @@
+import argparse
+import hashlib
+import os
+import re
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (pandas' Parquet engine)
+except ImportError:
+    pyarrow = None
+
+CACHE_DIR = os.environ.get('DATASET_CACHE_DIR', '.dataset_cache')
+# Bump when the column types below change, so caches written with the old ones are not reused
+SCHEMA_VERSION = 1
+
+# Explicit column types of the patient datasets; columns not listed keep pandas' inference
+CATEGORICAL_COLUMNS = ('sex', 'Gender', 'Severity', 'Diagnosis_of_SDB')
+BOOLEAN_COLUMNS = ('Snoring', 'Treatment_Required', 'CPAP', 'Surgery')
+ID_COLUMNS = ('user_id', 'night_id')
+# Measurements are stored as float32; the source CSVs sometimes write them with comma decimals
+FLOAT32_COLUMNS = ('age', 'height', 'weight', 'pulse', 'BPsys', 'BPdia', 'ODI', 'NAp', 'NHyp', 'AI', 'HI', 'AHI',
+                   'Age', 'BMI', 'Oxygen_Saturation', 'ECG_Heart_Rate', 'SpO2', 'Nasal_Airflow', 'Chest_Movement',
+                   'Snoring_Score')
+BLOOD_PRESSURE_COLUMN = 'BPsys/BPdia'
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_text(column):
+    return column.dtype == object or pd.api.types.is_string_dtype(column)
+
+
+def to_float32(column):
+    """A column as float32, reading comma decimals ('50,9') and coercing anything unparseable to NaN."""
+    if _is_text(column):
+        column = column.astype(str).str.replace(',', '.', regex=False)
+    return pd.to_numeric(column, errors='coerce').astype(np.float32)
+
+
+def apply_schema(df):
+    """Convert the columns of a freshly parsed patient CSV to their declared types (in place)."""
+    if BLOOD_PRESSURE_COLUMN in df.columns:
+        # '160/100' -> BPsys 160, BPdia 100; values already in separate columns take precedence
+        parts = df[BLOOD_PRESSURE_COLUMN].astype(str).str.split('/', n=1, expand=True).reindex(columns=[0, 1])
+        for name, part in (('BPsys', parts[0]), ('BPdia', parts[1])):
+            split = to_float32(part)
+            df[name] = to_float32(df[name]).fillna(split) if name in df.columns else split
+    for name in df.columns.intersection(FLOAT32_COLUMNS):
+        df[name] = to_float32(df[name])
+    for name in df.columns.intersection(ID_COLUMNS):
+        df[name] = pd.to_numeric(df[name], errors='coerce').astype('Int64')
+    for name in df.columns.intersection(BOOLEAN_COLUMNS):
+        df[name] = df[name].astype('boolean')
+    for name in df.columns.intersection(CATEGORICAL_COLUMNS):
+        # Only labels; columns already encoded as numbers (e.g. in cleaned_dataset.csv) stay numeric
+        if _is_text(df[name]):
+            df[name] = df[name].astype('category')
+    return df
+
+
+def parse_dataset(path):
+    """Parse a patient CSV into typed columns, without the cache."""
+    return apply_schema(pd.read_csv(path, low_memory=False))
+
+
+def cache_path(path, digest, cache_dir=CACHE_DIR):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    extension = '.parquet' if pyarrow is not None else '.pkl'
+    return os.path.join(cache_dir, f'{stem}-v{SCHEMA_VERSION}-{digest[:16]}{extension}')
+
+
+def load_dataset(path, cache_dir=CACHE_DIR):
+    """A patient CSV as a typed DataFrame, parsed once and then read from a columnar cache.
+
+    The cache is keyed on the CSV's content hash, so editing or replacing the
+    file invalidates it. Caches are Parquet when pyarrow is installed, else
+    pickled DataFrames; either keeps the column types.
+    """
+    cached = cache_path(path, file_digest(path), cache_dir)
+    if os.path.exists(cached):
+        return pd.read_parquet(cached) if cached.endswith('.parquet') else pd.read_pickle(cached)
+
+    df = parse_dataset(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write under a temporary name so a concurrent reader never sees a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    os.close(fd)
+    try:
+        if cached.endswith('.parquet'):
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, cached)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _remove_stale(path, cached, cache_dir)
+    return df
+
+
+def _remove_stale(path, current, cache_dir):
+    """Delete caches of earlier versions of the same CSV."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    pattern = re.compile(re.escape(stem) + r'-v\d+-[0-9a-f]{16}\.(parquet|pkl)')
+    for name in os.listdir(cache_dir):
+        candidate = os.path.join(cache_dir, name)
+        if pattern.fullmatch(name) and candidate != current:
+            os.remove(candidate)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parse patient CSVs into the typed dataset cache.')
+    parser.add_argument('paths', nargs='*', default=['final_dataset.csv', 'cleaned_dataset.csv'], help='CSV files')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Cache directory')
+    args = parser.parse_args()
+
+    for path in args.paths:
+        df = load_dataset(path, args.cache_dir)
+        print(f"✅ {path}: {len(df):,} rows, {len(df.columns)} columns -> "
+              f"{cache_path(path, file_digest(path), args.cache_dir)}")
@@ -1,9 +1,10 @@
 import pandas as pd
+from dataset_cache import load_dataset
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 
 # Load cleaned dataset
-df = pd.read_csv('cleaned_dataset.csv')
+df = load_dataset('cleaned_dataset.csv')
 
 # ✅ CREATE MISSING FEATURES
 df['BMI_Age'] = df['BMI'] * df['Age']
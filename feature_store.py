@@ -0,0 +1,193 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from audio_features import FEATURE_NAMES
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def hash_stream(stream):
+    """SHA-256 of a seekable binary stream, read in blocks; the stream is rewound afterwards."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b''):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class FeatureStore:
+    """Content-addressed store of extracted audio features.
+
+    Feature vectors live in a memory-mapped raw float32 arena, one row per
+    recording, and a SQLite index maps each content hash to its row. Windowed
+    features, whose length varies with the recording, are kept as one .npz file
+    per hash. Least recently used entries are evicted once the stored features
+    exceed max_bytes.
+
+    Several processes can share a store: index reads and writes run in SQLite
+    write transactions, which also serialize their arena accesses, and the
+    arena only ever grows in place, so a process whose mapping is too short
+    for a slot maps the file again.
+    """
+
+    def __init__(self, root='feature_store', max_bytes=512 * 1024 * 1024, initial_capacity=1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.dim = len(FEATURE_NAMES)
+        self.row_bytes = self.dim * np.dtype(np.float32).itemsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        os.makedirs(os.path.join(root, 'windows'), exist_ok=True)
+
+        self._arena_path = os.path.join(root, 'features.f32')
+        self._db = sqlite3.connect(os.path.join(root, 'index.sqlite'), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (hash TEXT PRIMARY KEY, slot INTEGER, "
+                         "windows_bytes INTEGER DEFAULT 0, accessed REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS free_slots (slot INTEGER PRIMARY KEY)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._db.execute("INSERT OR IGNORE INTO meta VALUES ('next_slot', 0)")
+
+        with self._lock, self._transaction():
+            if not os.path.exists(self._arena_path):
+                # A new store; the transaction keeps two processes from both creating it
+                with open(self._arena_path, 'wb') as f:
+                    f.truncate(initial_capacity * self.row_bytes)
+        self._map()
+
+    def get(self, content_hash):
+        """Return a copy of the stored feature vector, or None on a miss."""
+        with self._lock, self._transaction():
+            row = self._db.execute("SELECT slot FROM entries WHERE hash = ? AND slot IS NOT NULL",
+                                   (content_hash,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(content_hash)
+            return np.array(self._row(row[0]), dtype=np.float64)
+
+    def put(self, content_hash, vector):
+        """Store a feature vector for a content hash."""
+        vector = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        with self._lock, self._transaction():
+            row = self._db.execute("SELECT slot FROM entries WHERE hash = ?", (content_hash,)).fetchone()
+            slot = row[0] if row is not None and row[0] is not None else self._allocate_slot()
+            self._row(slot)[:] = vector
+            self._db.execute("INSERT INTO entries (hash, slot, accessed) VALUES (?, ?, ?) "
+                             "ON CONFLICT(hash) DO UPDATE SET slot = excluded.slot, accessed = excluded.accessed",
+                             (content_hash, slot, time.time()))
+            self._evict()
+
+    def get_windows(self, content_hash):
+        """Return (start_seconds, features, duration_seconds) for stored windowed features, or None."""
+        path = self._windows_path(content_hash)
+        with self._lock:
+            # Loaded under the lock, so this process's eviction cannot remove the file mid-read; another
+            # process's can, which is a miss like any other
+            try:
+                with np.load(path) as data:
+                    windows = data['start_seconds'], data['features'].astype(np.float64), float(data['duration'])
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(content_hash)
+            return windows
+
+    def put_windows(self, content_hash, start_seconds, features, duration):
+        """Store the windowed features of a recording."""
+        path = self._windows_path(content_hash)
+        with self._lock, self._transaction():
+            np.savez(path, start_seconds=start_seconds, features=np.asarray(features, dtype=np.float32),
+                     duration=duration)
+            self._db.execute("INSERT INTO entries (hash, windows_bytes, accessed) VALUES (?, ?, ?) "
+                             "ON CONFLICT(hash) DO UPDATE SET windows_bytes = excluded.windows_bytes, "
+                             "accessed = excluded.accessed",
+                             (content_hash, os.path.getsize(path), time.time()))
+            self._evict()
+
+    def stored_bytes(self):
+        rows, windows = self._db.execute("SELECT COUNT(slot), COALESCE(SUM(windows_bytes), 0) "
+                                         "FROM entries").fetchone()
+        return rows * self.row_bytes + windows
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0],
+                'bytes': self.stored_bytes(),
+                'max_bytes': self.max_bytes,
+            }
+
+    @contextmanager
+    def _transaction(self):
+        """An IMMEDIATE transaction: other processes wait until it commits (callers hold self._lock)."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _map(self):
+        rows = os.path.getsize(self._arena_path) // self.row_bytes
+        self._arena = np.memmap(self._arena_path, dtype=np.float32, mode='r+', shape=(rows, self.dim))
+
+    def _row(self, slot):
+        """The arena row of a slot, mapping the file again if another process has grown it."""
+        if slot >= len(self._arena):
+            self._map()
+        return self._arena[slot]
+
+    def _windows_path(self, content_hash):
+        return os.path.join(self.root, 'windows', f'{content_hash}.npz')
+
+    def _touch(self, content_hash):
+        self._db.execute("UPDATE entries SET accessed = ? WHERE hash = ?", (time.time(), content_hash))
+
+    def _allocate_slot(self):
+        row = self._db.execute("SELECT slot FROM free_slots LIMIT 1").fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM free_slots WHERE slot = ?", row)
+            return row[0]
+        slot = self._db.execute("SELECT value FROM meta WHERE key = 'next_slot'").fetchone()[0]
+        self._db.execute("UPDATE meta SET value = ? WHERE key = 'next_slot'", (slot + 1,))
+        capacity = os.path.getsize(self._arena_path) // self.row_bytes
+        if slot >= capacity:
+            self._grow(max(slot + 1, 2 * capacity))
+        return slot
+
+    def _grow(self, capacity):
+        """Double the arena by extending the file in place, so other processes' mappings stay valid."""
+        with open(self._arena_path, 'r+b') as f:
+            f.truncate(capacity * self.row_bytes)
+        self._map()
+
+    def _evict(self):
+        """Drop least recently used entries until the stored features fit in max_bytes."""
+        while self.stored_bytes() > self.max_bytes:
+            row = self._db.execute("SELECT hash, slot FROM entries ORDER BY accessed LIMIT 1").fetchone()
+            if row is None:
+                return
+            content_hash, slot = row
+            self._db.execute("DELETE FROM entries WHERE hash = ?", (content_hash,))
+            if slot is not None:
+                self._db.execute("INSERT OR IGNORE INTO free_slots VALUES (?)", (slot,))
+            windows_path = self._windows_path(content_hash)
+            if os.path.exists(windows_path):
+                os.remove(windows_path)
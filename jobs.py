@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from tree_runtime import load_model
+
+# Snore models loaded inside each worker process, keyed by path
+_worker_models = {}
+
+
+def snore_score_job(audio_path, snore_model_path='snore_model.pkl', cleanup=False):
+    """Worker task: extract audio features and predict the snore score.
+
+    A recording that cannot be decoded raises ValueError, so its job fails
+    rather than reporting a score. With cleanup=True the audio file is
+    deleted once it has been read.
+    """
+    started_at = time.time()
+    from audio_features import extract_features_streaming
+
+    try:
+        features = extract_features_streaming(audio_path)
+    except Exception as e:
+        raise ValueError(f"The snoringSound recording could not be decoded: {e}") from None
+    finally:
+        if cleanup and os.path.exists(audio_path):
+            os.remove(audio_path)
+    if snore_model_path not in _worker_models:
+        _worker_models[snore_model_path] = load_model(snore_model_path, mmap_mode='r')
+    snore_score = float(_worker_models[snore_model_path].predict(features.reshape(1, -1))[0])
+    return {'snore_score': snore_score, 'started_at': started_at, 'finished_at': time.time()}
+
+
+class JobQueue:
+    """Run snore analysis on a local process pool and track each job by id.
+
+    `on_done` callbacks run in the parent process, so the cheap rule scoring and
+    advice prediction can reuse the app's loaded models and caches.
+    """
+
+    def __init__(self, max_workers=None, history=1000, window=1000):
+        self.max_workers = max_workers
+        self.history = history
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._wait_times = deque(maxlen=window)
+        self._processing_times = deque(maxlen=window)
+        self._counts = {'submitted': 0, 'completed': 0, 'failed': 0}
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, func, *args, on_done=None):
+        """Enqueue func(*args) and return the job id immediately."""
+        job_id = uuid.uuid4().hex
+        job = {'id': job_id, 'status': 'pending', 'enqueued_at': time.time(), 'result': None, 'error': None}
+        with self._lock:
+            self._jobs[job_id] = job
+            self._counts['submitted'] += 1
+            self._trim()
+        future = self._pool().submit(func, *args)
+        future.add_done_callback(lambda f: self._finish(job, f, on_done))
+        return job_id
+
+    def _finish(self, job, future, on_done):
+        try:
+            output = future.result()
+            result = on_done(output) if on_done is not None else output
+            error = None
+        except Exception as e:
+            output, result, error = {}, None, str(e)
+        with self._lock:
+            job['result'] = result
+            job['error'] = error
+            job['status'] = 'failed' if error else 'done'
+            job['finished_at'] = time.time()
+            if 'started_at' in output:
+                job['wait_seconds'] = output['started_at'] - job['enqueued_at']
+                job['processing_seconds'] = output['finished_at'] - output['started_at']
+                self._wait_times.append(job['wait_seconds'])
+                self._processing_times.append(job['processing_seconds'])
+            self._counts['failed' if error else 'completed'] += 1
+
+    def _trim(self):
+        # Forget the oldest finished jobs beyond the history limit
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('done', 'failed')]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Snapshot of a job, or None if the id is unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def metrics(self):
+        with self._lock:
+            depth = sum(1 for job in self._jobs.values() if job['status'] == 'pending')
+            return {
+                **self._counts,
+                'queue_depth': depth,
+                'wait_seconds': _summary(self._wait_times),
+                'processing_seconds': _summary(self._processing_times),
+            }
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def _summary(samples):
+    if not samples:
+        return {'count': 0, 'mean': None, 'p95': None, 'max': None}
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+    }
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import math
+import os
+import re
+
+INDEX_PATH = 'knowledge_index.json'
+# Bumped when tokenizing or scoring changes, so indexes persisted by an older version are rebuilt
+INDEX_VERSION = 2
+# Standard BM25 parameters
+K1 = 1.2
+B = 0.75
+# Share of a topic-field match added to each sentence of that topic
+TOPIC_WEIGHT = 1.0
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z])")
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both but
+by can could did do does doing down during each few for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my no nor not now of off on once only or other our out over
+own same she should so some such than that the their them then there these they this those through to too under
+until up very was we were what when where which while who whom why will with would you your yours
+""".split())
+
+
+def stem(token):
+    """Light suffix stripping so "snoring", "snores" and "snore" (or "treated" and "treatment") share one term."""
+    if token.endswith('ies') and len(token) > 4:
+        token = token[:-3] + 'y'
+    elif token.endswith('s') and not token.endswith('ss') and len(token) > 3:
+        token = token[:-1]
+    if token.endswith('ing') and len(token) > 5:
+        token = token[:-3]
+    elif token.endswith('ed') and len(token) > 4:
+        token = token[:-2]
+    elif token.endswith('ment') and len(token) > 7:
+        token = token[:-4]
+    elif token.endswith('ion') and len(token) > 6:
+        token = token[:-3]
+    if token.endswith('e') and len(token) > 3:
+        token = token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [stem(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_PATTERN.split(text.strip()) if sentence]
+
+
+def fingerprint(knowledge, topic_terms=None):
+    """Hash of the knowledge base and index settings; a persisted index is reused only if it matches."""
+    payload = json.dumps({'knowledge': knowledge, 'topic_terms': topic_terms, 'k1': K1, 'b': B,
+                          'topic_weight': TOPIC_WEIGHT, 'version': INDEX_VERSION}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def bm25_postings(documents, collection=None):
+    """{term: [[document id, bm25 weight], ...]} for a list of tokenized documents.
+
+    Term rarity (idf) is taken from `collection` when given, otherwise from the documents themselves.
+    """
+    collection = documents if collection is None else collection
+    n_docs = len(collection)
+    document_frequency = {}
+    for doc in collection:
+        for term in set(doc):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    avg_length = sum(len(doc) for doc in documents) / len(documents) if documents else 0.0
+    frequencies = {}
+    for doc_id, doc in enumerate(documents):
+        for term in doc:
+            counts = frequencies.setdefault(term, {})
+            counts[doc_id] = counts.get(doc_id, 0) + 1
+
+    postings = {}
+    for term, counts in frequencies.items():
+        df = document_frequency.get(term, 0)
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        postings[term] = [
+            [doc_id, idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * len(documents[doc_id]) / avg_length))]
+            for doc_id, tf in counts.items()
+        ]
+    return postings
+
+
+class KnowledgeIndex:
+    """Sentence-level BM25 index over a {topic: [passage, ...]} knowledge base.
+
+    Every sentence is a document. Each topic also gets a short field made of its
+    name and any extra terms (e.g. the chatbot's topic keywords); its BM25 score,
+    scaled by TOPIC_WEIGHT, is added to every sentence of that topic. Topic-field
+    terms are weighted by their rarity across the sentences, so words every
+    question carries ("sleep", "apnea") do not pull answers towards the one
+    topic that lists them. Weights are computed once at build time and stored
+    per term, so a query only sums the postings of its own terms. The index is
+    plain JSON and needs nothing beyond the standard library, so it builds and
+    loads fully offline.
+    """
+
+    def __init__(self, sentences, postings, topics, topic_postings, fingerprint=None):
+        self.sentences = sentences  # [(topic, passage index, sentence text)]
+        self.postings = postings  # {term: [[sentence id, bm25 weight], ...]}
+        self.topics = topics
+        self.topic_postings = topic_postings  # {term: [[topic id, bm25 weight], ...]}
+        self.fingerprint = fingerprint
+        self._topic_sentences = {}
+        for doc_id, (topic, _, _) in enumerate(sentences):
+            self._topic_sentences.setdefault(topic, []).append(doc_id)
+
+    @classmethod
+    def build(cls, knowledge, topic_terms=None):
+        topic_terms = topic_terms or {}
+        sentences, documents = [], []
+        for topic, passages in knowledge.items():
+            for passage_id, passage in enumerate(passages):
+                for sentence in split_sentences(passage):
+                    sentences.append((topic, passage_id, sentence))
+                    documents.append(tokenize(sentence))
+
+        topics = list(knowledge)
+        topic_documents = [tokenize(' '.join([topic.replace('_', ' ')] + list(topic_terms.get(topic, ()))))
+                           for topic in topics]
+        return cls(sentences, bm25_postings(documents), topics, bm25_postings(topic_documents, documents),
+                   fingerprint(knowledge, topic_terms))
+
+    def search(self, query, k=3, min_score=0.0):
+        """Top-k sentences for a query as dicts with topic, passage, sentence and score.
+
+        Sentences scoring below min_score are left out, so an unrelated query can come back empty.
+        """
+        terms = set(tokenize(query))
+        scores = {}
+        for term in terms:
+            for doc_id, weight in self.postings.get(term, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        topic_scores = {}
+        for term in terms:
+            for topic_id, weight in self.topic_postings.get(term, ()):
+                topic_scores[topic_id] = topic_scores.get(topic_id, 0.0) + weight
+        for topic_id, topic_score in topic_scores.items():
+            for doc_id in self._topic_sentences.get(self.topics[topic_id], ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + TOPIC_WEIGHT * topic_score
+
+        # Highest score first; equal scores keep knowledge-base order
+        ranked = sorted((doc_id for doc_id in scores if scores[doc_id] >= min_score),
+                        key=lambda doc_id: (-scores[doc_id], doc_id))[:k]
+        return [
+            {'topic': self.sentences[doc_id][0], 'passage': self.sentences[doc_id][1],
+             'sentence': self.sentences[doc_id][2], 'score': scores[doc_id]}
+            for doc_id in ranked
+        ]
+
+    def save(self, path=INDEX_PATH):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'sentences': self.sentences, 'postings': self.postings,
+                       'topics': self.topics, 'topic_postings': self.topic_postings}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        return cls([tuple(sentence) for sentence in data['sentences']], data['postings'], data['topics'],
+                   data['topic_postings'], data['fingerprint'])
+
+
+def load_or_build(knowledge, topic_terms=None, path=INDEX_PATH):
+    """Load the persisted index, rebuilding and saving it if missing or built from other knowledge."""
+    expected = fingerprint(knowledge, topic_terms)
+    try:
+        index = KnowledgeIndex.load(path)
+        if index.fingerprint == expected:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    index = KnowledgeIndex.build(knowledge, topic_terms)
+    try:
+        index.save(path)
+    except OSError:
+        pass  # read-only checkout: keep the in-memory index
+    return index
+
+
+if __name__ == '__main__':
+    from chatbot import sleep_apnea_knowledge, topic_keywords
+
+    index = KnowledgeIndex.build(sleep_apnea_knowledge, topic_keywords)
+    index.save()
+    print(f"✅ Indexed {len(index.sentences)} sentences, {len(index.postings)} terms -> {INDEX_PATH}")
@@ -1,15 +1,170 @@
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
 import pandas as pd
 
-# Load existing dataset
-existing_df = pd.read_csv('data/patients.csv')  # Change this to your current dataset filename
+SOURCES = ['data/patients.csv', 'data/sdb_dataset.csv']
+OUTPUT = 'final_dataset.csv'
+CHUNK_ROWS = 100_000
+# A row is identified by these columns; rows with none of them set are identified by all their values
+KEY_COLUMNS = ['user_id', 'night_id', 'Patient_ID']
+# Keys looked up per SQLite query (below its bound-parameter limit)
+LOOKUP_BATCH = 900
+
+
+def index_path(output):
+    """Key index kept next to the merged CSV: final_dataset.csv -> final_dataset.keys.sqlite."""
+    return os.path.splitext(output)[0] + '.keys.sqlite'
+
+
+class KeyIndex:
+    """Persistent set of 64-bit row keys in SQLite, so a merge remembers every row it has written.
+
+    Alongside the keys it records how many bytes of the output were written
+    under them, both in one transaction: an output longer than that was
+    interrupted mid-chunk and is truncated back before appending again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS row_keys (key INTEGER PRIMARY KEY)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value)")
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM row_keys").fetchone()[0]
+
+    def get_meta(self, name, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return default if row is None else row[0]
+
+    def unseen(self, keys):
+        """Boolean mask of the keys not in the index (and not repeated earlier in `keys`)."""
+        keys = np.asarray(keys, dtype=np.uint64).view(np.int64)
+        unique, first = np.unique(keys, return_index=True)
+        values = unique.tolist()
+        known = []
+        for start in range(0, len(values), LOOKUP_BATCH):
+            batch = values[start:start + LOOKUP_BATCH]
+            known.extend(key for key, in self.conn.execute(
+                f"SELECT key FROM row_keys WHERE key IN ({','.join('?' * len(batch))})", batch))
+        mask = np.zeros(len(keys), dtype=bool)
+        mask[first[~np.isin(unique, known)]] = True
+        return mask
+
+    def commit(self, keys, output_bytes):
+        """Record keys as written, together with the output size that includes their rows."""
+        # Sorted keys fill the B-tree in order
+        keys = np.sort(np.asarray(keys, dtype=np.uint64).view(np.int64))
+        self.conn.execute("BEGIN")
+        self.conn.executemany("INSERT OR IGNORE INTO row_keys VALUES (?)", [(key,) for key in keys.tolist()])
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('output_bytes', ?)", (output_bytes,))
+        self.conn.execute("COMMIT")
+
+    def close(self):
+        self.conn.close()
+
+
+def row_keys(chunk):
+    """64-bit key of every row: a hash of its key columns, or of the whole row when those are empty."""
+    keyed = chunk.reindex(columns=KEY_COLUMNS, fill_value='')
+    by_key = pd.util.hash_pandas_object(keyed, index=False).to_numpy()
+    by_row = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    return np.where((keyed != '').any(axis=1).to_numpy(), by_key, by_row)
+
+
+def output_columns(sources, output):
+    """Columns of the merged CSV: the existing header, or the union of the source headers in order."""
+    if os.path.exists(output) and os.path.getsize(output):
+        return list(pd.read_csv(output, nrows=0).columns)
+    columns = []
+    for source in sources:
+        columns.extend(name for name in pd.read_csv(source, nrows=0).columns if name not in columns)
+    return columns
+
+
+def _read_text_chunks(path, chunk_rows):
+    """CSV rows as text, empty fields kept as '' rather than NaN."""
+    return pd.read_csv(path, dtype=str, keep_default_na=False, na_filter=False, chunksize=chunk_rows)
+
+
+def _line_terminator(path):
+    """Keep the line endings of an existing CSV (final_dataset.csv has CRLF ones)."""
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.readline().endswith(b'\r\n'):
+                return '\r\n'
+    return '\n'
+
+
+def merge(sources=SOURCES, output=OUTPUT, chunk_rows=CHUNK_ROWS, rebuild=False):
+    """Append the source rows not merged before to `output`, reading every file in bounded chunks.
 
-# Load new dataset
-new_df = pd.read_csv('data/sdb_dataset.csv')  # Change this if filename differs
+    Values are copied through as text, so merged rows are byte-for-byte what
+    the sources hold. With rebuild=True the output and key index start empty.
+    """
+    keys_path = index_path(output)
+    if rebuild:
+        for path in (output, keys_path):
+            if os.path.exists(path):
+                os.remove(path)
+    columns = output_columns(sources, output)
+    index = KeyIndex(keys_path)
+    stats = {'rows_read': 0, 'rows_added': 0, 'duplicates': 0}
+    start = time.perf_counter()
+    try:
+        written = index.get_meta('output_bytes')
+        if written is None and os.path.exists(output) and os.path.getsize(output):
+            # A merged CSV from before the key index existed: index its rows rather than append them again
+            for chunk in _read_text_chunks(output, chunk_rows):
+                index.commit(row_keys(chunk.reindex(columns=columns, fill_value='')), os.path.getsize(output))
+        elif written is not None and os.path.exists(output) and os.path.getsize(output) > written:
+            # The last run stopped between writing a chunk and recording its keys
+            with open(output, 'r+b') as f:
+                f.truncate(written)
+        line_terminator = _line_terminator(output)
+        for source in sources:
+            new_columns = set(pd.read_csv(source, nrows=0).columns) - set(columns)
+            if new_columns:
+                raise ValueError(f"{source} has columns not in {output}: {sorted(new_columns)}; "
+                                 f"merge again with rebuild=True (--rebuild)")
+            for chunk in _read_text_chunks(source, chunk_rows):
+                chunk = chunk.reindex(columns=columns, fill_value='')
+                keys = row_keys(chunk)
+                new = index.unseen(keys)
+                chunk = chunk[new]
+                if len(chunk):
+                    header = not os.path.exists(output) or os.path.getsize(output) == 0
+                    with open(output, 'a', newline='') as f:
+                        chunk.to_csv(f, index=False, header=header, lineterminator=line_terminator)
+                        f.flush()
+                        os.fsync(f.fileno())
+                index.commit(keys[new], os.path.getsize(output) if os.path.exists(output) else 0)
+                stats['rows_read'] += len(new)
+                stats['rows_added'] += len(chunk)
+                stats['duplicates'] += len(new) - len(chunk)
+        stats['rows_total'] = len(index)
+    finally:
+        index.close()
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = stats['rows_read'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
 
-# Merge datasets (remove duplicates)
-merged_df = pd.concat([existing_df, new_df]).drop_duplicates()
 
-# Save merged dataset
-merged_df.to_csv('final_dataset.csv', index=False)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Merge new patient rows into the combined dataset.')
+    parser.add_argument('sources', nargs='*', default=SOURCES, help='Source CSV files, in priority order')
+    parser.add_argument('--output', default=OUTPUT, help='Merged CSV, appended to')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows read per chunk')
+    parser.add_argument('--rebuild', action='store_true', help='Discard the merged CSV and key index first')
+    args = parser.parse_args()
 
-print("✅ Merging completed! New dataset saved as 'final_dataset.csv'.")
+    s = merge(args.sources, args.output, args.chunk_rows, args.rebuild)
+    print(f"✅ Merging completed! {s['rows_added']:,} new rows appended to '{args.output}' "
+          f"({s['duplicates']:,} duplicates skipped, {s['rows_total']:,} rows in total, "
+          f"{s['rows_per_second']:,.0f} rows/s).")
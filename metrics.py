@@ -0,0 +1,106 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Upper bounds (seconds) of the histogram buckets; +Inf is implicit
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Set METRICS_ENABLED=0 to turn span timing into a no-op
+_enabled = os.environ.get('METRICS_ENABLED', '1') != '0'
+_NULL_SPAN = nullcontext()
+
+
+class Histogram:
+    """A Prometheus histogram with one series per combination of label values."""
+
+    def __init__(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [count per bucket (last is +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """{label values: {'count', 'sum'}} for every series."""
+        with self._lock:
+            return {labels: {'count': sum(counts), 'sum': total} for labels, (counts, total) in self._series.items()}
+
+    def render(self):
+        """The histogram in the Prometheus text exposition format."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in sorted(self._series.items())]
+        for labels, counts, total in series:
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels))
+            prefix = label_text + ',' if label_text else ''
+            suffix = '{' + label_text + '}' if label_text else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{suffix} {total!r}')
+            lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return '\n'.join(lines)
+
+
+stage_seconds = Histogram('apneainsight_stage_duration_seconds',
+                          'Time spent in each stage of a prediction (streamed audio records one sample per block).',
+                          ('stage',))
+request_seconds = Histogram('apneainsight_request_duration_seconds', 'HTTP request latency.',
+                            ('endpoint', 'method', 'status'))
+
+
+class _Span:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stage_seconds.observe(time.perf_counter() - self.start, self.stage)
+        return False
+
+
+def span(stage):
+    """Context manager timing a stage into stage_seconds; a shared no-op when metrics are disabled."""
+    return _Span(stage) if _enabled else _NULL_SPAN
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(flag):
+    global _enabled
+    _enabled = bool(flag)
+
+
+def render():
+    """All metrics in the Prometheus text format (one process; each gunicorn worker reports its own)."""
+    return '\n'.join([stage_seconds.render(), request_seconds.render()]) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+import joblib
+
+
+def _resident_bytes():
+    """Current resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def _mtime(path):
+    """Modification time of a watched path in nanoseconds, or None while it does not exist."""
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ModelRegistry:
+    """Load model artifacts lazily, on first use, and record what each load cost.
+
+    Files written with joblib.dump are opened with mmap_mode='r', so the numpy
+    arrays inside (e.g. random-forest node tables) are mapped read-only and
+    shared copy-on-write between forked gunicorn workers. Plain pickles load
+    normally. Call preload() before forking (gunicorn --preload) to share them.
+    An artifact registered with `watch` is loaded again once the modification
+    time of that file or directory changes, e.g. when a new version lands.
+    """
+
+    def __init__(self, mmap_mode='r'):
+        self.mmap_mode = mmap_mode
+        self._loaders = {}
+        self._paths = {}
+        self._models = {}
+        self._stats = {}
+        self._watches = {}
+        self._loaded_mtimes = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, path=None, loader=None, mmap_mode=None, watch=None):
+        """Register an artifact by file path, or a loader built from other artifacts.
+
+        Passing both uses the loader for an artifact that still lives at `path`
+        (e.g. one with a compiled copy), so path() and stats() keep reporting it.
+        """
+        if path is None and loader is None:
+            raise ValueError("Pass a path, a loader or both")
+        if loader is None:
+            mode = mmap_mode or self.mmap_mode
+            loader = lambda: joblib.load(path, mmap_mode=mode)
+        with self._lock:
+            self._loaders[name] = loader
+            self._paths[name] = path
+            self._watches[name] = watch
+            self._models.pop(name, None)
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None and not self._changed(name):
+            return model
+        with self._lock:
+            if name not in self._models or self._changed(name):
+                if name not in self._loaders:
+                    raise KeyError(f"Unknown model: {name}")
+                # Taken before loading, so a change made while it loads triggers another load
+                self._loaded_mtimes[name] = _mtime(self._watches[name])
+                rss_before = _resident_bytes()
+                start = time.perf_counter()
+                self._models[name] = self._loaders[name]()
+                rss_after = _resident_bytes()
+                self._stats[name] = {
+                    'load_seconds': time.perf_counter() - start,
+                    'resident_bytes': rss_after - rss_before if rss_before is not None else None,
+                }
+            return self._models[name]
+
+    def preload(self, *names):
+        """Load the given artifacts now (all registered ones by default)."""
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def _changed(self, name):
+        watch = self._watches.get(name)
+        return watch is not None and _mtime(watch) != self._loaded_mtimes.get(name)
+
+    def path(self, name):
+        """File path an artifact was registered with (None for loader-built ones)."""
+        return self._paths[name]
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def stats(self):
+        """Per-artifact load time and resident-size delta; unloaded artifacts report loaded=False."""
+        with self._lock:
+            report = {}
+            for name in self._loaders:
+                path = self._paths[name]
+                entry = {'loaded': name in self._models, 'path': path}
+                if path is not None and os.path.exists(path):
+                    entry['file_bytes'] = os.path.getsize(path)
+                entry.update(self._stats.get(name, {}))
+                report[name] = entry
+            return report
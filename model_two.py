@@ -1,76 +1,136 @@
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.metrics import accuracy_score, classification_report
+import argparse
+import json
 import pickle
+import shutil
+import tempfile
+import time
+
+import pandas as pd
 from imblearn.over_sampling import SMOTE
+from imblearn.pipeline import Pipeline as ImbPipeline
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401  (makes HalvingGridSearchCV importable)
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, train_test_split
 from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder, StandardScaler
 
-# Load the dataset
-df = pd.read_csv('data/nutrition.csv')
-
-# Encode categorical columns
-label_encoder = LabelEncoder()
-df['Severity'] = label_encoder.fit_transform(df['Severity'])
-df['Weight Category'] = label_encoder.fit_transform(df['Weight Category'])
-
-# Encode target column 'Personalized Nutrition & Sleep Advice' as categorical label
-y = df['Personalized Nutrition & Sleep Advice']
-
-# Prepare features (X) - Using available features
-X = df[['AHI', 'BMI', 'Severity', 'Weight Category']]
-
-# Handle missing values
-X = X.fillna(X.mean())
-
-# Split the data
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-
-# Create preprocessing pipeline
-preprocessor = Pipeline([
-    ('scaler', StandardScaler())
-])
-
-# Fit and transform the training data
-X_train_scaled = preprocessor.fit_transform(X_train)
-X_test_scaled = preprocessor.transform(X_test)
+from tree_runtime import export
 
-# Handle class imbalance using SMOTE
-smote = SMOTE(random_state=42)
-X_train_resampled, y_train_resampled = smote.fit_resample(X_train_scaled, y_train)
+DATA_PATH = 'data/nutrition.csv'
+FEATURES = ['AHI', 'BMI', 'Severity', 'Weight Category']
+CATEGORY_COLUMNS = ['Severity', 'Weight Category']
+TARGET = 'Personalized Nutrition & Sleep Advice'
+CV_FOLDS = 5
 
-# Initialize and train the model with hyperparameter tuning
-param_grid = {
-    'n_estimators': [100, 200, 300],
-    'max_depth': [None, 10, 20, 30],
-    'min_samples_split': [2, 5, 10],
-    'min_samples_leaf': [1, 2, 4]
+# Hyperparameters searched for the GradientBoostingClassifier (steps of the pipeline below)
+PARAM_GRID = {
+    'classifier__n_estimators': [100, 200, 300],
+    'classifier__max_depth': [None, 10, 20, 30],
+    'classifier__min_samples_split': [2, 5, 10],
+    'classifier__min_samples_leaf': [1, 2, 4]
 }
+# Successive halving spends trees as its resource: every round keeps the best third of the
+# candidates and fits them with three times as many trees, up to the largest n_estimators
+HALVING_FACTOR = 3
+# Boosting stops once the score on a held-out 10% of the training fold has not improved for
+# this many trees (0 fits all n_estimators)
+N_ITER_NO_CHANGE = 10
+
+
+def load_data(path=DATA_PATH):
+    """Features, target and the classes of each encoded category column."""
+    df = pd.read_csv(path)
+
+    # Encode categorical columns, keeping each column's classes for inference
+    label_encoder = LabelEncoder()
+    categories = {}
+    for column in CATEGORY_COLUMNS:
+        df[column] = label_encoder.fit_transform(df[column])
+        categories[column] = label_encoder.classes_.tolist()
+
+    # Prepare features (X) - Using available features; handle missing values
+    X = df[FEATURES]
+    X = X.fillna(X.mean())
+    return X, df[TARGET], categories
+
+
+def build_pipeline(n_iter_no_change=N_ITER_NO_CHANGE, memory=None):
+    """Scaler -> SMOTE -> GradientBoostingClassifier.
+
+    SMOTE runs inside the pipeline, so cross-validation oversamples each
+    training fold on its own and never scores on synthetic neighbours of its
+    validation rows. With `memory` the fitted scaler and resampled fold are
+    cached, so candidates sharing a fold do not redo them.
+    """
+    return ImbPipeline([
+        ('scaler', StandardScaler()),
+        ('smote', SMOTE(random_state=42)),
+        ('classifier', GradientBoostingClassifier(random_state=42, n_iter_no_change=n_iter_no_change or None)),
+    ], memory=memory)
+
+
+def make_search(pipeline, search='halving', cv=CV_FOLDS, n_jobs=-1):
+    """GridSearchCV over PARAM_GRID, or successive halving with n_estimators as the resource."""
+    if search == 'grid':
+        return GridSearchCV(pipeline, PARAM_GRID, cv=cv, scoring='accuracy', n_jobs=n_jobs)
+    if search != 'halving':
+        raise ValueError(f"Unknown search: {search}")
+    grid = {name: values for name, values in PARAM_GRID.items() if name != 'classifier__n_estimators'}
+    max_trees = max(PARAM_GRID['classifier__n_estimators'])
+    return HalvingGridSearchCV(pipeline, grid, factor=HALVING_FACTOR, resource='classifier__n_estimators',
+                               min_resources=max_trees // HALVING_FACTOR ** 2, max_resources=max_trees, cv=cv,
+                               scoring='accuracy', random_state=42, n_jobs=n_jobs)
+
+
+def train(X_train, y_train, X_test, y_test, search='halving', n_iter_no_change=N_ITER_NO_CHANGE, cache_dir=None,
+          n_jobs=-1):
+    """Search hyperparameters on the training split; returns (best pipeline, wall-clock/accuracy report)."""
+    directory = cache_dir or tempfile.mkdtemp(prefix='model-two-cache-')
+    try:
+        search_cv = make_search(build_pipeline(n_iter_no_change, memory=directory), search, n_jobs=n_jobs)
+        start = time.perf_counter()
+        search_cv.fit(X_train, y_train)
+        seconds = time.perf_counter() - start
+    finally:
+        if cache_dir is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    best = search_cv.best_estimator_
+    results = search_cv.cv_results_
+    report = {
+        'search': search,
+        'seconds': seconds,
+        'candidates': len(results['params']),
+        'fits': len(results['params']) * search_cv.n_splits_,
+        'best_params': {name.split('__', 1)[1]: value for name, value in search_cv.best_params_.items()},
+        'trees_fitted': int(best.named_steps['classifier'].n_estimators_),
+        'cv_accuracy': float(search_cv.best_score_),
+        'test_accuracy': float(accuracy_score(y_test, best.predict(X_test))),
+    }
+    return best, report
+
+
+def save_artifacts(best, categories, model_path='model.pkl', preprocessor_path='preprocessor.pkl',
+                   categories_path='advice_categories.json'):
+    """Write the classifier and its scaler as the separate artifacts the app loads (SMOTE is training-only)."""
+    # Save the trained model and preprocessor
+    with open(model_path, 'wb') as model_file:
+        pickle.dump(best.named_steps['classifier'], model_file)
+
+    with open(preprocessor_path, 'wb') as preprocessor_file:
+        pickle.dump(Pipeline([('scaler', best.named_steps['scaler'])]), preprocessor_file)
+
+    with open(categories_path, 'w') as categories_file:
+        json.dump(categories, categories_file, indent=2)
+
+
+def print_report(report):
+    print(f"Search: {report['search']}, {report['candidates']} candidates, {report['fits']} fits "
+          f"in {report['seconds']:.1f} s")
+    print(f"Best parameters: {report['best_params']} ({report['trees_fitted']} trees fitted)")
+    print(f"CV accuracy: {report['cv_accuracy']:.2f}, test accuracy: {report['test_accuracy']:.2f}")
 
-model = GradientBoostingClassifier(random_state=42)
-grid_search = GridSearchCV(model, param_grid, cv=5, scoring='accuracy', n_jobs=-1)
-grid_search.fit(X_train_resampled, y_train_resampled)
-
-# Get the best model
-best_model = grid_search.best_estimator_
-
-# Test the model
-y_pred = best_model.predict(X_test_scaled)
-
-# Calculate and print the accuracy and classification report
-accuracy = accuracy_score(y_test, y_pred)
-print(f'Model Accuracy: {accuracy:.2f}')
-print('\nClassification Report:')
-print(classification_report(y_test, y_pred))
-
-# Save the trained model and preprocessor
-with open('model.pkl', 'wb') as model_file:
-    pickle.dump(best_model, model_file)
-
-with open('preprocessor.pkl', 'wb') as preprocessor_file:
-    pickle.dump(preprocessor, preprocessor_file)
 
 def get_personalized_advice(ahi, bmi, severity, weight_category):
     # Prepare input data for prediction
@@ -80,24 +140,56 @@ def get_personalized_advice(ahi, bmi, severity, weight_category):
         'Severity': [severity],
         'Weight Category': [weight_category]
     })
-    
+
     # Load the preprocessor and model
     with open('preprocessor.pkl', 'rb') as f:
         preprocessor = pickle.load(f)
     with open('model.pkl', 'rb') as f:
         model = pickle.load(f)
-    
+
     # Preprocess and predict
     input_scaled = preprocessor.transform(input_data)
     predicted_advice = model.predict(input_scaled)
-    
+
     return predicted_advice[0]
 
-# Example usage
-advice = get_personalized_advice(
-    ahi=15,
-    bmi=25,
-    severity=2,  # Moderate
-    weight_category=2  # Overweight
-)
-print(f"Personalized Nutrition & Sleep Advice: {advice}")
\ No newline at end of file
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the nutrition & sleep advice model.')
+    parser.add_argument('--data', default=DATA_PATH, help='Training CSV')
+    parser.add_argument('--search', choices=['halving', 'grid'], default='halving',
+                        help='Successive halving over n_estimators (default), or the full grid')
+    parser.add_argument('--n-iter-no-change', type=int, default=N_ITER_NO_CHANGE,
+                        help='Early-stopping patience in trees; 0 fits every tree')
+    parser.add_argument('--cache-dir', help='Keep fitted fold preprocessing here between runs')
+    parser.add_argument('--report', help='Also write the wall-clock/accuracy report to this JSON file')
+    args = parser.parse_args()
+
+    X, y, categories = load_data(args.data)
+
+    # Split the data
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    best_model, report = train(X_train, y_train, X_test, y_test, args.search, args.n_iter_no_change, args.cache_dir)
+
+    # Calculate and print the accuracy and classification report
+    print_report(report)
+    print('\nClassification Report:')
+    print(classification_report(y_test, best_model.predict(X_test)))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    save_artifacts(best_model, categories)
+
+    # Keep the compiled copy the app runs from in step with the new model
+    export('model.pkl')
+
+    # Example usage
+    advice = get_personalized_advice(
+        ahi=15,
+        bmi=25,
+        severity=2,  # Moderate
+        weight_category=2  # Overweight
+    )
+    print(f"Personalized Nutrition & Sleep Advice: {advice}")
@@ -1,42 +1,184 @@
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder
-import joblib
-
-# Load your data (make sure to update this with the correct file path)
-data = pd.read_csv('data/patients.csv')
-
-# Replace commas with dots for numeric columns
-numeric_columns = ['height', 'weight', 'pulse', 'ODI', 'NAp', 'NHyp', 'AI', 'HI', 'AHI']
-for column in numeric_columns:
-    data[column] = data[column].astype(str).str.replace(',', '.').astype(float)
-
-# Split 'BPsys/BPdia' into separate columns
-if 'BPsys/BPdia' in data.columns:
-    data[['BPsys', 'BPdia']] = data['BPsys/BPdia'].str.split('/', expand=True)
-    data['BPsys'] = data['BPsys'].astype(float)
-    data['BPdia'] = data['BPdia'].astype(float)
-else:
-    print("Column 'BPsys/BPdia' not found in dataset.")
-
-# Convert 'sex' to numeric (M -> 1, F -> 0)
-label_encoder = LabelEncoder()
-data['sex'] = label_encoder.fit_transform(data['sex'])
-
-
-
-X_train = data[['age', 'sex', 'height', 'weight', 'pulse', 'BPsys', 'BPdia', 'ODI', 'NAp', 'NHyp', 'AI', 'HI']]
-y_train = data['AHI']
-
-# Train the model
-model = RandomForestRegressor()
-model.fit(X_train, y_train)
-
-# Save the trained model
-joblib.dump(model, 'trained_sleep_model.pkl')
-
-# Select features and target
-print(data[['height', 'weight', 'pulse', 'ODI', 'NAp', 'NHyp', 'AI', 'HI']].head())
-print(data[['BPsys', 'BPdia']].head())
-print(data['AHI'].head())
-print(model.feature_importances_)
\ No newline at end of file
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from dataset_cache import file_digest, load_dataset
+from merge_data import KEY_COLUMNS
+
+DATA_PATH = 'data/patients.csv'
+# Versioned artifacts: sleep_model-v0001.joblib with its manifest sleep_model-v0001.json
+MODEL_DIR = os.environ.get('SLEEP_MODEL_DIR', 'models/sleep')
+FEATURES = ['age', 'sex', 'height', 'weight', 'pulse', 'BPsys', 'BPdia', 'ODI', 'NAp', 'NHyp', 'AI', 'HI']
+TARGET = 'AHI'
+# A night is keyed as merge_data.py keys rows: by its id columns, or by the whole row when it has no ids
+NIGHT_KEY = {'columns': KEY_COLUMNS, 'fallback': 'row'}
+# Convert 'sex' to numeric (M -> 1, F -> 0), the codes LabelEncoder gave; fixed so updates agree
+SEX_CODES = {'F': 0, 'M': 1}
+N_ESTIMATORS = 100
+VERSION_PATTERN = re.compile(r'sleep_model-v(\d+)\.json$')
+
+
+def load_training_data(path=DATA_PATH):
+    """Features, target and a 64-bit key per night, for the rows that have an AHI."""
+    # The typed cache has already read comma decimals and split 'BPsys/BPdia' into BPsys and BPdia
+    data = load_dataset(path)
+    if 'BPsys' not in data.columns:
+        print("Column 'BPsys/BPdia' not found in dataset.")
+    data = data[data[TARGET].notna()]
+    X = data[FEATURES].assign(sex=data['sex'].astype(object).map(SEX_CODES).astype(float))
+    return X, data[TARGET], night_keys(data)
+
+
+def night_keys(data):
+    """64-bit key of every night: a hash of its id columns, or of the whole row when it has none."""
+    ids = data.reindex(columns=KEY_COLUMNS)
+    by_id = pd.util.hash_pandas_object(ids, index=False).to_numpy()
+    by_row = pd.util.hash_pandas_object(data, index=False).to_numpy()
+    return np.where(ids.notna().any(axis=1).to_numpy(), by_id, by_row)
+
+
+def artifact_paths(version, directory=MODEL_DIR):
+    """(model, manifest, trained night keys) paths of a version."""
+    stem = os.path.join(directory, f'sleep_model-v{version:04d}')
+    return stem + '.joblib', stem + '.json', stem + '.keys.npy'
+
+
+def latest_manifest(directory=MODEL_DIR):
+    """Manifest of the newest version (with its artifact 'path'), or None before the first training run.
+
+    The manifest is written last, so a version without one is ignored.
+    """
+    versions = []
+    for path in glob.glob(os.path.join(directory, 'sleep_model-v*.json')):
+        match = VERSION_PATTERN.search(path)
+        if match:
+            versions.append(int(match.group(1)))
+    if not versions:
+        return None
+    model_path, manifest_path, _ = artifact_paths(max(versions), directory)
+    with open(manifest_path) as f:
+        return dict(json.load(f), path=model_path)
+
+
+def load_artifact(manifest, mmap_mode=None):
+    """Load the model of a manifest, refusing one whose file does not match the recorded hash."""
+    digest = file_digest(manifest['path'])
+    if digest != manifest['sha256']:
+        raise ValueError(f"{manifest['path']} does not match its manifest (sha256 {digest[:12]}, "
+                         f"expected {manifest['sha256'][:12]})")
+    return joblib.load(manifest['path'], mmap_mode=mmap_mode)
+
+
+def _metrics(y, predicted, prefix):
+    metrics = {f'{prefix}_mae': float(mean_absolute_error(y, predicted))}
+    if len(y) > 1:
+        metrics[f'{prefix}_r2'] = float(r2_score(y, predicted))
+    return metrics
+
+
+def fit_full(X, y, n_estimators=N_ESTIMATORS, n_jobs=-1):
+    """A new forest on every row; its out-of-bag predictions give the metrics."""
+    model = RandomForestRegressor(n_estimators=n_estimators, oob_score=True, n_jobs=n_jobs)
+    model.fit(X, y)
+    return model, _metrics(y, model.oob_prediction_, 'oob')
+
+
+def fit_incremental(model, X_new, y_new, n_trees, n_jobs=-1):
+    """Grow `model` by n_trees trees fitted on the new nights only (warm_start keeps the existing trees).
+
+    The metrics are those of the model before the update on the new nights,
+    i.e. how well it predicted nights it had not seen.
+    """
+    metrics = _metrics(y_new, model.predict(X_new), 'new_nights')
+    # Out-of-bag scores only cover the rows of one fit, so they are not recomputed for the new trees
+    model.set_params(warm_start=True, oob_score=False, n_jobs=n_jobs, n_estimators=model.n_estimators + n_trees)
+    model.fit(X_new, y_new)
+    return model, metrics
+
+
+def trees_for(new_rows, trained_rows, n_estimators):
+    """Trees to add for new rows: the forest's trees per trained row, so each night keeps the same weight."""
+    return max(1, math.ceil(n_estimators * new_rows / max(trained_rows, 1)))
+
+
+def save_version(model, keys, manifest, directory=MODEL_DIR):
+    """Write model, trained night keys and (last, atomically) manifest as the next version."""
+    os.makedirs(directory, exist_ok=True)
+    previous = latest_manifest(directory)
+    version = previous['version'] + 1 if previous else 1
+    model_path, manifest_path, keys_path = artifact_paths(version, directory)
+    # Uncompressed, so the app can memory-map the forest's node arrays
+    joblib.dump(model, model_path)
+    np.save(keys_path, np.sort(keys))
+    manifest = dict(manifest, version=version, artifact=os.path.basename(model_path), sha256=file_digest(model_path),
+                    bytes=os.path.getsize(model_path),
+                    created_at=datetime.now(timezone.utc).isoformat(timespec='seconds'))
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return dict(manifest, path=model_path)
+
+
+def train(data_path=DATA_PATH, directory=MODEL_DIR, full=False, n_estimators=N_ESTIMATORS, n_jobs=-1):
+    """Train the next model version and return its manifest (the current one if there is nothing new).
+
+    With a previous version, and unless full=True, only nights it was not
+    trained on are fitted, as trees added to its forest.
+    """
+    X, y, keys = load_training_data(data_path)
+    previous = None if full else latest_manifest(directory)
+    if previous is not None and (previous['features'] != FEATURES or previous.get('night_key') != NIGHT_KEY):
+        previous = None  # Features or night keys changed since: start over
+
+    start = time.perf_counter()
+    if previous is None:
+        model, metrics = fit_full(X, y, n_estimators, n_jobs)
+        trained_keys, new_rows = keys, len(X)
+        manifest = {'mode': 'full', 'parent': None, 'training_rows': len(X)}
+    else:
+        trained_keys = np.load(artifact_paths(previous['version'], directory)[2])
+        new = ~np.isin(keys, trained_keys)
+        new_rows = int(new.sum())
+        if new_rows == 0:
+            return previous
+        model = load_artifact(previous)
+        n_trees = trees_for(new_rows, previous['training_rows'], model.n_estimators)
+        model, metrics = fit_incremental(model, X[new], y[new], n_trees, n_jobs)
+        trained_keys = np.concatenate([trained_keys, keys[new]])
+        manifest = {'mode': 'incremental', 'parent': previous['version'],
+                    'training_rows': previous['training_rows'] + new_rows}
+    manifest.update(features=FEATURES, night_key=NIGHT_KEY, target=TARGET, new_rows=new_rows, n_estimators=len(model.estimators_),
+                    data_sha256=file_digest(data_path), fit_seconds=time.perf_counter() - start, metrics=metrics)
+    # Served one patient at a time, where spreading trees over cores costs more than it saves
+    model.set_params(n_jobs=None)
+    return save_version(model, trained_keys, manifest, directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the AHI model, adding trees for nights not trained on yet.')
+    parser.add_argument('--data', default=DATA_PATH, help='Patient nights CSV')
+    parser.add_argument('--model-dir', default=MODEL_DIR, help='Where versioned artifacts are written')
+    parser.add_argument('--full', action='store_true', help='Refit from scratch on every night')
+    parser.add_argument('--n-estimators', type=int, default=N_ESTIMATORS, help='Trees of a full fit')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Cores used to grow trees (-1: all)')
+    args = parser.parse_args()
+
+    previous = latest_manifest(args.model_dir)
+    m = train(args.data, args.model_dir, args.full, args.n_estimators, args.n_jobs)
+    if previous is not None and m['version'] == previous['version']:
+        print(f"✅ Sleep model v{m['version']} is up to date: no new nights in '{args.data}'.")
+        raise SystemExit(0)
+    print(f"✅ Sleep model v{m['version']} ({m['mode']}, {m['new_rows']:,} new of {m['training_rows']:,} nights, "
+          f"{m['n_estimators']} trees) saved as '{m['path']}'.")
+    print(json.dumps(m['metrics'], indent=2))
\ No newline at end of file
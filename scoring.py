@@ -0,0 +1,243 @@
+import numpy as np
+
+SLEEP_QUALITY_PERCENTAGES = {
+    "Extremely Poor": 20,
+    "Very Poor": 40,
+    "Poor": 50,
+    "Moderately Poor": 60,
+    "Moderate": 70,
+    "Mild": 80,
+    "Very Mild": 90,
+    "Good": 100
+}
+
+def calculate_sleep_quality(ahi, snoring_score, oxygen_saturation, pulse):
+    """Calculate overall sleep quality score based on multiple factors."""
+    # Normalize values
+    ahi_score = max(0, 100 - (ahi * 2))  # Convert AHI to score (0-100)
+    snoring_score_norm = max(0, 100 - (snoring_score * 10))  # Convert snoring score (0-100)
+    oxygen_score = (oxygen_saturation - 80) * 5  # Convert oxygen saturation to score (0-100)
+    pulse_score = max(0, 100 - abs(pulse - 60) * 2)  # Convert pulse to score (0-100)
+    
+    # Weighted average
+    weights = {'ahi': 0.4, 'snoring': 0.3, 'oxygen': 0.2, 'pulse': 0.1}
+    total_score = (
+        ahi_score * weights['ahi'] +
+        snoring_score_norm * weights['snoring'] +
+        oxygen_score * weights['oxygen'] +
+        pulse_score * weights['pulse']
+    )
+    
+    # Convert to quality level
+    if total_score >= 90:
+        return "Good"
+    elif total_score >= 80:
+        return "Very Mild"
+    elif total_score >= 70:
+        return "Mild"
+    elif total_score >= 60:
+        return "Moderate"
+    elif total_score >= 50:
+        return "Moderately Poor"
+    elif total_score >= 40:
+        return "Poor"
+    elif total_score >= 30:
+        return "Very Poor"
+    else:
+        return "Extremely Poor"
+
+def predict_ahi(bmi, oxygen_saturation, snore_score, age, pulse_rate):
+    """Predict AHI based on key factors with improved accuracy."""
+    # Base AHI calculation based on BMI (primary factor)
+    base_ahi = 0
+    
+    # BMI impact (strong correlation)
+    if bmi >= 40:
+        base_ahi = 35  # Severe obesity
+    elif bmi >= 35:
+        base_ahi = 25  # Moderate obesity
+    elif bmi >= 30:
+        base_ahi = 15  # Mild obesity
+    elif bmi >= 25:
+        base_ahi = 8   # Overweight
+    else:
+        base_ahi = 3   # Normal weight
+
+    # Oxygen saturation impact (inverse relationship)
+    oxygen_factor = 0
+    if oxygen_saturation < 90:
+        oxygen_factor = 12  # Severe desaturation
+    elif oxygen_saturation < 93:
+        oxygen_factor = 8   # Moderate desaturation
+    elif oxygen_saturation < 95:
+        oxygen_factor = 4   # Mild desaturation
+    else:
+        oxygen_factor = 0   # Normal saturation
+
+    # Snoring impact (weighted less than BMI and oxygen)
+    snoring_factor = snore_score * 1.5  # Reduced impact
+
+    # Age impact (older age increases risk)
+    age_factor = 0
+    if age >= 60:
+        age_factor = 4
+    elif age >= 50:
+        age_factor = 2
+    elif age >= 40:
+        age_factor = 1
+    else:
+        age_factor = 0
+
+    # Pulse rate impact (minimal impact)
+    pulse_factor = 0
+    if pulse_rate >= 90:
+        pulse_factor = 2
+    elif pulse_rate >= 80:
+        pulse_factor = 1
+    else:
+        pulse_factor = 0
+
+    # Calculate final AHI with weighted factors
+    final_ahi = (
+        base_ahi * 0.5 +           # BMI is most important (50%)
+        oxygen_factor * 0.3 +      # Oxygen saturation (30%)
+        snoring_factor * 0.1 +     # Snoring (10%)
+        age_factor * 0.05 +        # Age (5%)
+        pulse_factor * 0.05        # Pulse rate (5%)
+    )
+    
+    # Apply non-linear scaling to prevent extreme values
+    final_ahi = final_ahi * (1 - 0.1 * (final_ahi / 100))  # Diminishing returns
+    
+    # Ensure AHI is within reasonable range (0-100)
+    final_ahi = max(0, min(100, final_ahi))
+    
+    # Round to one decimal place
+    return round(final_ahi, 1)
+
+def get_severity_level(ahi):
+    """Get severity level based on AHI score."""
+    if ahi >= 30:
+        return "Severe"
+    elif ahi >= 15:
+        return "Moderate"
+    elif ahi >= 5:
+        return "Mild"
+    else:
+        return "Normal"
+
+def get_weight_category(bmi):
+    """Get weight category based on BMI."""
+    if bmi >= 40:
+        return "Severe Obesity"
+    elif bmi >= 35:
+        return "Moderate Obesity"
+    elif bmi >= 30:
+        return "Mild Obesity"
+    elif bmi >= 25:
+        return "Overweight"
+    else:
+        return "Normal Weight"
+
+def get_doctor_recommendation(ahi):
+    """Get the doctor's recommendation based on AHI score."""
+    if ahi >= 30:
+        return "🚨 URGENT: Immediate specialist consultation required. Severe sleep apnea detected with high risk of complications."
+    elif ahi >= 20:
+        return "⚠️ Critical: Severe condition detected. Medical intervention is necessary. Consider CPAP therapy."
+    elif ahi >= 15:
+        return "⚠️ Severe: Strongly recommended to consult a sleep specialist. Lifestyle changes and medical treatment may be needed."
+    elif ahi >= 10:
+        return "🔶 High Risk: Lifestyle changes & medical guidance suggested. Consider weight management and sleep position therapy."
+    elif ahi >= 5:
+        return "🟡 Moderate Risk: Medical consultation advised. Focus on sleep hygiene and weight management."
+    elif ahi >= 3:
+        return "🟢 Mild: Consider lifestyle changes & monitor symptoms. Maintain healthy sleep habits."
+    else:
+        return "✅ No sleep apnea detected. Continue maintaining healthy sleep habits."
+
+# Array versions of the rules above for batch scoring. Bin edges follow the
+# ">=" ladders, so np.digitize(x, edges) is the index of the matching rung.
+# They do not take NaN: np.digitize puts NaN past the last edge (the top rung)
+# while every ">=" in the scalar ladders is False for it (the bottom rung), so
+# predict_batch rejects rows with missing values before they get here.
+BMI_EDGES = [25, 30, 35, 40]
+BASE_AHI = np.array([3, 8, 15, 25, 35])
+WEIGHT_CATEGORIES = np.array(["Normal Weight", "Overweight", "Mild Obesity", "Moderate Obesity", "Severe Obesity"],
+                             dtype=object)
+OXYGEN_EDGES = [90, 93, 95]
+OXYGEN_FACTORS = np.array([12, 8, 4, 0])
+AGE_EDGES = [40, 50, 60]
+AGE_FACTORS = np.array([0, 1, 2, 4])
+PULSE_EDGES = [80, 90]
+PULSE_FACTORS = np.array([0, 1, 2])
+SEVERITY_EDGES = [5, 15, 30]
+SEVERITY_LEVELS = np.array(["Normal", "Mild", "Moderate", "Severe"], dtype=object)
+QUALITY_EDGES = [30, 40, 50, 60, 70, 80, 90]
+QUALITY_LEVELS = np.array(["Extremely Poor", "Very Poor", "Poor", "Moderately Poor", "Moderate", "Mild",
+                           "Very Mild", "Good"], dtype=object)
+RECOMMENDATION_EDGES = [3, 5, 10, 15, 20, 30]
+RECOMMENDATIONS = np.array([get_doctor_recommendation(ahi) for ahi in [0] + RECOMMENDATION_EDGES], dtype=object)
+
+
+def round_half_array(values, ndigits=1):
+    """Round like the built-in round(), which np.round does not match near ties."""
+    values = np.asarray(values, dtype=float)
+    scaled = values * 10 ** ndigits
+    rounded = np.rint(scaled) / 10 ** ndigits
+    # Near a .5 tie the scaled product can round either way; defer to round() there
+    near_tie = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(value, ndigits) for value in values[near_tie]]
+    return rounded
+
+
+def predict_ahi_array(bmi, oxygen_saturation, snore_score, age, pulse_rate):
+    """Vectorized predict_ahi over arrays of inputs."""
+    base_ahi = BASE_AHI[np.digitize(bmi, BMI_EDGES)]
+    oxygen_factor = OXYGEN_FACTORS[np.digitize(oxygen_saturation, OXYGEN_EDGES)]
+    snoring_factor = np.asarray(snore_score, dtype=float) * 1.5
+    age_factor = AGE_FACTORS[np.digitize(age, AGE_EDGES)]
+    pulse_factor = PULSE_FACTORS[np.digitize(pulse_rate, PULSE_EDGES)]
+
+    final_ahi = (
+        base_ahi * 0.5 +
+        oxygen_factor * 0.3 +
+        snoring_factor * 0.1 +
+        age_factor * 0.05 +
+        pulse_factor * 0.05
+    )
+    final_ahi = final_ahi * (1 - 0.1 * (final_ahi / 100))
+    final_ahi = np.clip(final_ahi, 0, 100)
+    return round_half_array(final_ahi, 1)
+
+
+def calculate_sleep_quality_array(ahi, snoring_score, oxygen_saturation, pulse):
+    """Vectorized calculate_sleep_quality over arrays of inputs."""
+    ahi_score = np.maximum(0, 100 - (np.asarray(ahi, dtype=float) * 2))
+    snoring_score_norm = np.maximum(0, 100 - (np.asarray(snoring_score, dtype=float) * 10))
+    oxygen_score = (np.asarray(oxygen_saturation, dtype=float) - 80) * 5
+    pulse_score = np.maximum(0, 100 - np.abs(np.asarray(pulse, dtype=float) - 60) * 2)
+
+    total_score = (
+        ahi_score * 0.4 +
+        snoring_score_norm * 0.3 +
+        oxygen_score * 0.2 +
+        pulse_score * 0.1
+    )
+    return QUALITY_LEVELS[np.digitize(total_score, QUALITY_EDGES)]
+
+
+def get_severity_level_array(ahi):
+    """Vectorized get_severity_level."""
+    return SEVERITY_LEVELS[np.digitize(ahi, SEVERITY_EDGES)]
+
+
+def get_weight_category_array(bmi):
+    """Vectorized get_weight_category."""
+    return WEIGHT_CATEGORIES[np.digitize(bmi, BMI_EDGES)]
+
+
+def get_doctor_recommendation_array(ahi):
+    """Vectorized get_doctor_recommendation."""
+    return RECOMMENDATIONS[np.digitize(ahi, RECOMMENDATION_EDGES)]
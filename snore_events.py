@@ -0,0 +1,117 @@
+import librosa
+import numpy as np
+import scipy.fft
+from numpy.lib.stride_tricks import sliding_window_view
+
+from audio_features import (SAMPLE_RATE, HOP_LENGTH, N_MFCC, N_CHROMA, N_MELS, TOP_DB, mel_basis,
+                            stream_spectrogram)
+
+WINDOW_SECONDS = 2.0
+HOP_SECONDS = 1.0
+# Windows scoring at or above this (on the 0-10 snore scale) count as snoring
+SNORE_THRESHOLD = 5.0
+
+
+def window_features(source, window_seconds=WINDOW_SECONDS, hop_seconds=HOP_SECONDS):
+    """Feature vectors for sliding windows over a recording (a path or a seekable file object).
+
+    Returns (start_seconds, features, duration_seconds), with one 153-dim row per
+    window in the same layout as extract_features. The spectrogram is streamed
+    and computed once; each window averages the per-frame mel, log-mel and
+    chroma values it covers. Chroma tuning is estimated once per night.
+    """
+    window = max(1, int(round(window_seconds * SAMPLE_RATE / HOP_LENGTH)))
+    hop = max(1, int(round(hop_seconds * SAMPLE_RATE / HOP_LENGTH)))
+
+    tuning = None
+    carry = None  # per-frame values not yet covered by a complete window
+    offset = 0  # index of the first frame in carry
+    total_frames = 0
+    starts, vectors = [], []
+    for S in stream_spectrogram(source):
+        if tuning is None:
+            tuning = librosa.estimate_tuning(S=S, sr=SAMPLE_RATE, bins_per_octave=N_CHROMA)
+        frames = _frame_values(S, tuning)
+        total_frames += frames.shape[1]
+        carry = frames if carry is None else np.concatenate([carry, frames], axis=1)
+
+        n_windows = 0 if carry.shape[1] < window else 1 + (carry.shape[1] - window) // hop
+        if n_windows:
+            vectors.append(_window_vectors(carry, window, hop, n_windows))
+            starts.append(offset + hop * np.arange(n_windows))
+            carry = carry[:, n_windows * hop:]
+            offset += n_windows * hop
+
+    # A recording shorter than one window is scored as a single window
+    if not vectors and carry is not None and carry.shape[1]:
+        vectors.append(_window_vectors(carry, carry.shape[1], hop, 1))
+        starts.append(np.zeros(1, dtype=int))
+
+    if not vectors:
+        return np.zeros(0), np.zeros((0, N_MFCC + N_CHROMA + N_MELS)), 0.0
+    start_seconds = np.concatenate(starts) * HOP_LENGTH / SAMPLE_RATE
+    return start_seconds, np.vstack(vectors), total_frames * HOP_LENGTH / SAMPLE_RATE
+
+
+def _frame_values(S, tuning):
+    """Stack per-frame mel power, mel dB and chroma into one (268, n_frames) array."""
+    mel = mel_basis() @ S
+    db = librosa.power_to_db(mel, top_db=None)
+    chroma = librosa.feature.chroma_stft(S=S, sr=SAMPLE_RATE, tuning=tuning)
+    return np.vstack([mel, db, chroma])
+
+
+def _window_vectors(frames, window, hop, n_windows):
+    """Average the frame values of each window into (n_windows, 153) feature rows."""
+    view = sliding_window_view(frames, window, axis=1)[:, ::hop][:, :n_windows]
+    mel = view[:N_MELS].mean(axis=2)
+    db = view[N_MELS:2 * N_MELS]
+    chroma = view[2 * N_MELS:].mean(axis=2)
+    # Same top_db floor as librosa's MFCC, relative to the loudest bin in each window
+    floor = db.max(axis=(0, 2)) - TOP_DB
+    log_mel = np.maximum(db, floor[None, :, None]).mean(axis=2)
+    mfcc = scipy.fft.dct(log_mel, type=2, norm='ortho', axis=0)[:N_MFCC]
+    return np.vstack([mfcc, chroma, mel]).T
+
+
+def detect_snore_events(file_path, snore_model, window_seconds=WINDOW_SECONDS, hop_seconds=HOP_SECONDS,
+                        threshold=SNORE_THRESHOLD):
+    """Score every window with one snore_model.predict call and summarise the night."""
+    start_seconds, features, duration = window_features(file_path, window_seconds, hop_seconds)
+    return score_windows(start_seconds, features, duration, snore_model, window_seconds, threshold)
+
+
+def score_windows(start_seconds, features, duration, snore_model, window_seconds=WINDOW_SECONDS,
+                  threshold=SNORE_THRESHOLD):
+    """Build the timeline from window features computed earlier (e.g. from the feature store)."""
+    scores = snore_model.predict(features) if len(features) else np.zeros(0)
+    return build_timeline(start_seconds, np.asarray(scores, dtype=float), window_seconds, duration, threshold)
+
+
+def build_timeline(start_seconds, scores, window_seconds, duration, threshold=SNORE_THRESHOLD):
+    """Merge consecutive snoring windows into events and compute per-night statistics."""
+    snoring = np.concatenate([[False], scores >= threshold, [False]])
+    edges = np.flatnonzero(np.diff(snoring.astype(np.int8)))
+    first, last = edges[::2], edges[1::2] - 1
+
+    events = []
+    for i, j in zip(first, last):
+        onset = float(start_seconds[i])
+        end = min(float(start_seconds[j]) + window_seconds, duration)
+        events.append({
+            'onset': round(onset, 2),
+            'duration': round(end - onset, 2),
+            'peak_score': round(float(scores[i:j + 1].max()), 2),
+        })
+
+    hours = duration / 3600
+    return {
+        'duration_seconds': round(duration, 2),
+        'window_seconds': window_seconds,
+        'windows': int(len(scores)),
+        'events': events,
+        'snore_index': round(len(events) / hours, 2) if hours > 0 else 0.0,
+        'snoring_minutes': round(sum(event['duration'] for event in events) / 60, 2),
+        # Night-level score passed to predict_ahi in place of the single averaged-feature score
+        'snore_score': float(scores.mean()) if len(scores) else 0.0,
+    }
@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# Make the top-level app modules importable, as benchmarks/_common.py does for the benchmarks
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Keep the feature store, dataset cache and chatbot index of the tests out of the working tree (set before app.py is imported)
+os.environ.setdefault('FEATURE_STORE_DIR', tempfile.mkdtemp(prefix='test-feature-store-'))
+os.environ.setdefault('DATASET_CACHE_DIR', tempfile.mkdtemp(prefix='test-dataset-cache-'))
+os.environ.setdefault('KNOWLEDGE_INDEX_PATH', os.path.join(tempfile.mkdtemp(prefix='test-knowledge-index-'),
+                                                          'knowledge_index.json'))
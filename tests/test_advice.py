@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from advice import AdvicePredictor
+from scoring import SEVERITY_LEVELS, WEIGHT_CATEGORIES
+
+
+class EchoModel:
+    """Returns the encoded, scaled rows it is given, so tests can read the codes back."""
+
+    def predict(self, X):
+        return X.copy()
+
+
+@pytest.fixture
+def advisor():
+    scaler = StandardScaler(with_mean=False, with_std=False).fit(np.zeros((2, 4)))
+    # Categories as LabelEncoder saves them from training data without 'Normal' or the two top obesity classes
+    categories = {'Severity': ['Mild', 'Moderate', 'Severe'],
+                  'Weight Category': ['Mild Obesity', 'Normal Weight', 'Overweight']}
+    return AdvicePredictor(EchoModel(), Pipeline([('scaler', scaler)]), categories)
+
+
+def test_untrained_levels_get_the_nearest_trained_code(advisor):
+    assert advisor.predict(2.0, 21.0, 'Normal', 'Normal Weight')[2:].tolist() == [0, 1]
+    assert advisor.predict(20.0, 37.0, 'Moderate', 'Moderate Obesity')[2:].tolist() == [1, 0]
+    assert advisor.predict(40.0, 45.0, 'Severe', 'Severe Obesity')[2:].tolist() == [2, 0]
+
+
+def test_every_scoring_level_is_accepted_in_batches(advisor):
+    n = len(WEIGHT_CATEGORIES)
+    severity = list(SEVERITY_LEVELS) + ['Severe'] * (n - len(SEVERITY_LEVELS))
+    X = advisor.predict_batch(np.zeros(n), np.zeros(n), severity, list(WEIGHT_CATEGORIES))
+    assert X[:, 2].tolist() == [0, 0, 1, 2, 2]
+    assert X[:, 3].tolist() == [1, 2, 0, 0, 0]
+
+
+def test_unknown_labels_raise_value_error(advisor):
+    with pytest.raises(ValueError, match='Unknown Severity'):
+        advisor.predict(2.0, 21.0, 'Unknown', 'Normal Weight')
@@ -0,0 +1,102 @@
+import io
+import json
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+import app
+import asgi
+from cleaning import CleaningTransform
+
+PATIENT = {'age': 52, 'gender': 'male', 'weight': 96, 'height': 178, 'oxygen_saturation': 91, 'pulse': 84,
+           'BPsys': 138, 'BPdia': 88}
+
+
+class FlaskClient:
+    """Flask's test client behind the requests-style calls of Starlette's TestClient."""
+
+    def __init__(self):
+        self.client = app.app.test_client()
+
+    def post(self, url, json=None, data=None, files=None, headers=None, content=None):
+        if files:
+            data = dict(data or {}, **{name: (io.BytesIO(body), filename) for name, (filename, body) in files.items()})
+            return self.client.post(url, data=data, content_type='multipart/form-data')
+        return self.client.post(url, json=json, data=content if content is not None else data, headers=headers)
+
+
+@pytest.fixture(scope='module', params=['flask', 'asgi'])
+def client(request):
+    if request.param == 'flask':
+        yield FlaskClient()
+        return
+    with TestClient(asgi.app) as client:
+        yield client
+
+
+@pytest.fixture
+def cleaning_state(tmp_path):
+    """Point the app's cleaning artifact at a state file in tmp_path; yields its path, not yet written."""
+    path = str(tmp_path / 'cleaned_dataset.state.json')
+    app.models.register('cleaning', path, loader=lambda: CleaningTransform.load(path))
+    yield path
+    app.models.register('cleaning', 'cleaned_dataset.state.json',
+                        loader=lambda: CleaningTransform.load(app.models.path('cleaning')))
+
+
+def json_of(response):
+    return response.json() if callable(response.json) else response.json
+
+
+@pytest.mark.parametrize('query', ['', '?timeline=1'])
+def test_undecodable_audio_is_a_client_error(client, query):
+    form = {name: str(value) for name, value in PATIENT.items()}
+    response = client.post(f'/api/v1/predict{query}', data=form, files={'snoringSound': ('night.wav', b'not audio')})
+    assert response.status_code == 422
+    assert json_of(response)['error']['code'] == 'invalid_audio'
+    assert json_of(response)['error']['field'] == 'snoringSound'
+
+
+def test_undecodable_audio_fails_its_job(client):
+    form = {name: str(value) for name, value in PATIENT.items()}
+    response = client.post('/api/v1/predict?async=1', data=form, files={'snoringSound': ('night.wav', b'not audio')})
+    assert response.status_code == 202
+    job_id = json_of(response)['job_id']
+    deadline = time.monotonic() + 60
+    while app.snore_jobs.get(job_id)['status'] == 'pending' and time.monotonic() < deadline:
+        time.sleep(0.05)
+    job = app.snore_jobs.get(job_id)
+    assert (job['status'], job['result']) == ('failed', None)
+    assert 'could not be decoded' in job['error']
+
+
+def test_json_with_charset_is_json(client):
+    response = client.post('/api/v1/predict', content=json.dumps(PATIENT),
+                           headers={'Content-Type': 'application/json; charset=utf-8'})
+    assert response.status_code == 200
+    assert json_of(response)['snore_score'] == 0
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.post('/api/v1/predict', json=dict(PATIENT, shoe_size=44))
+    assert response.status_code == 422
+    assert json_of(response)['error'] == {'code': 'unknown_field', 'message': 'Unknown field: shoe_size',
+                                          'field': 'shoe_size'}
+
+
+def test_features_without_cleaning_state_are_unavailable(client, cleaning_state):
+    response = client.post('/api/v1/predict?features=1', json=PATIENT)
+    assert response.status_code == 503
+    error = json_of(response)['error']
+    assert error['code'] == 'model_unavailable'
+    assert error['field'] == 'features'
+    assert 'clean_data.py' in error['message']
+
+
+def test_features_encode_single_letter_gender(client, cleaning_state):
+    with open(cleaning_state, 'w') as f:
+        json.dump(CleaningTransform(fill_values={'Gender': 0.5, 'Age': 40.0}).to_state(), f)
+    response = client.post('/api/v1/predict?features=1', json=dict(PATIENT, gender='M'))
+    assert response.status_code == 200
+    assert json_of(response)['features']['Gender'] == 1
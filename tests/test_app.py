@@ -0,0 +1,28 @@
+import pytest
+
+import app
+from scoring import calculate_sleep_quality, get_severity_level, predict_ahi
+
+
+@pytest.fixture
+def scoring_cache():
+    app.scoring_cache.clear()
+    yield app.scoring_cache.memory
+    app.scoring_cache.clear()
+
+
+def test_near_identical_patients_share_a_cache_entry(scoring_cache):
+    first = app.score_patient(31.24, 91.2, 3.1416, 52.0, 84.3)
+    # Same BMI and age rungs, the same vitals once rounded, a snore score equal to one decimal
+    assert app.score_patient(33.9, 90.8, 3.1402, 58.5, 83.6) == first
+    assert scoring_cache.stats()['size'] == 1
+    assert scoring_cache.stats()['hits'] == 1
+
+
+def test_rung_edges_get_their_own_entries(scoring_cache):
+    # Scored one after another through the same cache, each side of an edge keeps its own result
+    for bmi, age in [(24.99, 39.9), (25.0, 40.0), (34.99, 59.9), (35.0, 60.0), (40.0, 60.0)]:
+        ahi = predict_ahi(bmi, 92, 4.2, age, 75)
+        expected = (ahi, get_severity_level(ahi), calculate_sleep_quality(ahi, 4.2, 92, 75))
+        assert app.score_patient(bmi, 92.0, 4.2, age, 75.0) == expected
+    assert scoring_cache.stats()['size'] == 5
@@ -0,0 +1,41 @@
+import pytest
+from jinja2 import DictLoader
+from starlette.testclient import TestClient
+
+import asgi
+
+PATIENT = {'age': '52', 'gender': 'male', 'weight': '96', 'height': '178', 'oxygen_saturation': '91',
+           'pulse': '84', 'BPsys': '138', 'BPdia': '88'}
+
+
+@pytest.fixture(scope='module')
+def client():
+    # The page templates are not part of the repository; stand-ins show the values they are given
+    loader = asgi.flask_app.jinja_env.loader
+    asgi.flask_app.jinja_env.loader = DictLoader({
+        'result.html': 'severity={{ prediction }} ahi={{ ahi_score }}',
+        'prediction.html': 'error={{ error }}',
+    })
+    try:
+        with TestClient(asgi.app) as client:
+            yield client
+    finally:
+        asgi.flask_app.jinja_env.loader = loader
+
+
+def test_predict_renders_the_result_page(client):
+    response = client.post('/predict', data=PATIENT)
+    assert response.status_code == 200
+    assert response.text.startswith('severity=')
+
+
+def test_predict_renders_form_errors(client):
+    response = client.post('/predict', data=dict(PATIENT, age=''))
+    assert response.status_code == 200
+    assert response.text == 'error=Error: Missing input: age'
+
+
+def test_flask_routes_are_mounted(client):
+    response = client.get('/cache/stats')
+    assert response.status_code == 200
+    assert set(response.json()) == {'advice', 'scoring'}
@@ -0,0 +1,54 @@
+import os
+
+import librosa
+import numpy as np
+import pytest
+
+from audio_features import N_MFCC, SAMPLE_RATE, extract_features, extract_features_streaming, features_from_signal
+
+
+def synthetic_snore(seconds, sr=SAMPLE_RATE, seed=0):
+    """Bursts of low-frequency rumble over breathing noise, as in benchmarks/_common.py."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    envelope = np.clip(np.sin(2 * np.pi * t / 4.0), 0, None) ** 4
+    rumble = np.sin(2 * np.pi * 90 * t) + 0.5 * np.sin(2 * np.pi * 180 * t) + 0.1 * rng.standard_normal(t.size)
+    return (0.02 * rng.standard_normal(t.size) + 0.3 * envelope * rumble).astype(np.float32)
+
+
+@pytest.fixture(scope='module', params=[1, 90])
+def recording(request, tmp_path_factory):
+    """WAVs at 44.1 kHz (resampled on decode): shorter than one streamed block, and several blocks long."""
+    import soundfile as sf
+
+    path = os.path.join(tmp_path_factory.mktemp('audio'), f'night-{request.param}s.wav')
+    sf.write(path, synthetic_snore(request.param, sr=44100), 44100)
+    return path
+
+
+def test_streaming_matches_in_memory(recording):
+    full = extract_features(recording)
+    stream = extract_features_streaming(recording)
+    assert stream.shape == full.shape == (153,)
+    np.testing.assert_allclose(stream, full, rtol=1e-3, atol=1e-3)
+
+
+def test_streaming_reads_upload_streams(recording):
+    with open(recording, 'rb') as f:
+        np.testing.assert_allclose(extract_features_streaming(f), extract_features_streaming(recording))
+
+
+def reference_features(y, sr=SAMPLE_RATE):
+    """The original extractor: three separate STFTs of the same signal."""
+    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=N_MFCC)
+    chroma = librosa.feature.chroma_stft(y=y, sr=sr)
+    mel = librosa.feature.melspectrogram(y=y, sr=sr)
+    return np.hstack([np.mean(mfccs, axis=1), np.mean(chroma, axis=1), np.mean(mel, axis=1)])
+
+
+@pytest.mark.parametrize('seconds', [1, 30])
+def test_shared_stft_matches_separate_librosa_calls(seconds):
+    y = synthetic_snore(seconds)
+    shared = features_from_signal(y)
+    assert shared.shape == (153,)
+    np.testing.assert_allclose(shared, reference_features(y), rtol=1e-4, atol=1e-4)
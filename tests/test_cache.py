@@ -0,0 +1,25 @@
+from cache import ScoringCache
+
+
+def test_shared_caches_keep_separate_tables(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    advice = ScoringCache('advice', db_path=path)
+    scoring = ScoringCache('scoring', db_path=path)
+    advice.get_or_compute((1.0, 2.0), lambda: 'advice')
+    scoring.get_or_compute((1.0, 2.0), lambda: 'scores')
+
+    assert advice.stats()['shared']['size'] == scoring.stats()['shared']['size'] == 1
+    scoring.clear()
+    assert scoring.stats()['shared']['size'] == 0
+    assert advice.stats()['shared']['size'] == 1
+    # A fresh process sees the advice entry, not the scores cached under the same key
+    assert ScoringCache('advice', db_path=path).get_or_compute((1.0, 2.0), lambda: 'recomputed') == 'advice'
+
+
+def test_shared_maxsize_bounds_the_table(tmp_path):
+    cache = ScoringCache('scoring', maxsize=1, db_path=str(tmp_path / 'cache.sqlite'), shared_maxsize=10)
+    for i in range(512):
+        cache.get_or_compute(i, lambda: i)
+    assert cache.stats()['shared']['maxsize'] == 10
+    # Eviction runs every 256 writes
+    assert cache.stats()['shared']['size'] == 10
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+import chatbot
+from knowledge_index import KnowledgeIndex, stem
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import eval_chatbot_retrieval  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def index():
+    return KnowledgeIndex.build(chatbot.sleep_apnea_knowledge, chatbot.topic_keywords)
+
+
+@pytest.mark.parametrize('words', [('treated', 'treatment', 'treating'), ('causes', 'caused', 'cause'),
+                                   ('snoring', 'snores', 'snore'), ('prevent', 'prevention', 'preventing')])
+def test_word_forms_share_a_stem(words):
+    assert len({stem(word) for word in words}) == 1
+
+
+@pytest.mark.parametrize('query, topic', [("What causes sleep apnea?", 'causes'),
+                                          ("How is sleep apnea treated?", 'treatment'),
+                                          ("How can I prevent sleep apnea?", 'prevention')])
+def test_questions_reach_their_topic(index, query, topic):
+    assert index.search(query.lower(), k=1)[0]['topic'] == topic
+
+
+@pytest.mark.parametrize('message', ["What is this?", "Which treatment works best?", "Is it worth something?"])
+def test_greetings_match_whole_words_only(message):
+    assert chatbot.matched_keywords(message.lower()).isdisjoint(chatbot.greeting_set)
+    assert chatbot.get_chatbot_response(message) not in chatbot.greetings
+
+
+def test_greeting_is_answered():
+    assert chatbot.get_chatbot_response("Hi there") in chatbot.greetings
+
+
+@pytest.mark.parametrize('message', ["What is the weather like?", "I like pizza"])
+def test_off_topic_messages_fall_through(message):
+    assert chatbot.retrieve(message.lower()) == []
+    assert chatbot.get_chatbot_response(message) in chatbot.contextual_responses
+
+
+def test_labelled_retrieval_accuracy():
+    r = eval_chatbot_retrieval.run()['bm25']
+    assert r['top1'] >= eval_chatbot_retrieval.MIN_TOP1, r['misses']
+    assert r['mrr'] >= eval_chatbot_retrieval.MIN_MRR
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning import CleaningTransform, patient_record
+
+PATIENT = {'age': 52.0, 'gender': 'male', 'weight': 96.0, 'height': 1.78, 'oxygen_saturation': 91.0, 'pulse': 84.0,
+           'BPsys': 138.0, 'BPdia': 88.0}
+
+
+@pytest.mark.parametrize('gender, label', [('M', 'Male'), ('m', 'Male'), (' male ', 'Male'), ('MALE', 'Male'),
+                                           ('F', 'Female'), ('f', 'Female'), ('Female', 'Female')])
+def test_patient_gender_becomes_a_dataset_label(gender, label):
+    assert patient_record(dict(PATIENT, gender=gender))['Gender'] == label
+
+
+@pytest.mark.parametrize('gender, code', [('M', 1), ('F', 0), ('male', 1), ('female', 0)])
+def test_single_letter_gender_is_encoded_not_filled(gender, code):
+    # A median fill of 0.5 would show up if the label were not mapped
+    transform = CleaningTransform(fill_values={'Gender': 0.5})
+    assert transform.transform_records([patient_record(dict(PATIENT, gender=gender))])[0]['Gender'] == code
+
+
+def test_unknown_gender_is_filled_with_the_median():
+    transform = CleaningTransform(fill_values={'Gender': 0.5})
+    assert transform.transform_records([patient_record(dict(PATIENT, gender='x'))])[0]['Gender'] == 0.5
+
+
+@pytest.fixture
+def source_rows():
+    """final_dataset.csv rows covering each cleaning step; CPAP/Surgery come as booleans or as text."""
+    return pd.DataFrame({
+        'user_id': ['1', None, None, None, None],
+        'Patient_ID': [None, 'P1', 'P2', 'P3', 'P4'],
+        'Physician_Notes': ['note', None, None, None, None],
+        'Diagnosis_of_SDB': ['OSA', 'None', 'OSA', None, 'CSA'],
+        'Gender': ['Male', 'Female', 'Other', 'Male', 'Female'],
+        'CPAP': [True, 'False', 'True', False, None],
+        'Surgery': ['False', False, True, 'True', 'True'],
+        'Age': ['50', 'unknown', 40.0, 30.0, 61.0],
+        'BMI': [30.0, 25.0, np.nan, 20.0, 35.0],
+        'Oxygen_Saturation': [89.0, 92.0, 94.0, 97.0, np.nan],
+        'AHI': [12.0, 3.0, 25.0, 1.0, 40.0],
+        'ODI': [np.nan, np.nan, 7.0, np.nan, np.nan],
+    })
+
+
+@pytest.fixture
+def transform(source_rows):
+    return CleaningTransform({'CSA': 0, 'None': 1, 'OSA': 2}).fit([source_rows])
+
+
+def test_medians_are_fitted_on_rows_with_a_diagnosis(transform):
+    # The row without a diagnosis (Age 30, BMI 20, saturation 97) is left out
+    assert {column: transform.fill_values[column] for column in ('Age', 'BMI', 'Oxygen_Saturation', 'CPAP')} == \
+        {'Age': 50.0, 'BMI': 30.0, 'Oxygen_Saturation': 92.0, 'CPAP': 1.0}
+
+
+def test_cleaned_columns(transform, source_rows):
+    cleaned = transform.transform(source_rows)
+    assert list(cleaned.index) == [0, 1, 2, 4]
+    assert not {'user_id', 'Patient_ID', 'Physician_Notes'} & set(cleaned.columns)
+    expected = {
+        'Diagnosis_of_SDB': [2, 1, 2, 0],
+        'Gender': [1, 0, 0, 0],  # 'Other' takes the median
+        'CPAP': [1, 0, 1, 1],  # booleans map like their text; the missing one takes the median
+        'Surgery': [0, 0, 1, 1],
+        'Age': [50, 50, 40, 61],  # 'unknown' takes the median
+        'BMI': [30, 25, 30, 35],
+        'ODI': [30, 20, 7, 20],  # binned from saturation (median-filled first) unless the source has one
+        'BPsys': [129, 127.5, 129, 130.5],
+        'BPdia': [86, 85, 86, 87],
+    }
+    assert {column: cleaned[column].tolist() for column in expected} == expected
+
+
+def test_snoring_placeholder_is_seeded_by_the_row(transform, source_rows):
+    scores = transform.transform(source_rows)['Snoring_Score']
+    assert scores.between(0, 99).all()
+    # The same rows get the same scores on every run and in any chunk
+    assert scores.tolist() == transform.transform(source_rows)['Snoring_Score'].tolist()
+    assert scores.tolist()[2:] == transform.transform(source_rows[2:])['Snoring_Score'].tolist()
+    reseeded = CleaningTransform(transform.diagnosis_codes, transform.fill_values, seed=7)
+    assert scores.tolist() != reseeded.transform(source_rows)['Snoring_Score'].tolist()
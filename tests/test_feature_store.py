@@ -0,0 +1,67 @@
+import multiprocessing
+
+import numpy as np
+
+from feature_store import FeatureStore
+
+
+def vector(i):
+    return np.full(153, i, dtype=np.float32)
+
+
+def test_instances_see_each_others_growth(tmp_path):
+    first = FeatureStore(str(tmp_path), initial_capacity=2)
+    second = FeatureStore(str(tmp_path), initial_capacity=2)
+    for i in range(5):
+        first.put(f'first-{i}', vector(i))
+    # The second instance still maps the two-row file; it has to see rows the first one added past it
+    for i in range(5):
+        np.testing.assert_array_equal(second.get(f'first-{i}'), vector(i))
+    for i in range(5, 10):
+        second.put(f'second-{i}', vector(i))
+    for i in range(5):
+        np.testing.assert_array_equal(first.get(f'first-{i}'), vector(i))
+    for i in range(5, 10):
+        np.testing.assert_array_equal(first.get(f'second-{i}'), vector(i))
+
+
+def _put_many(root, prefix, n):
+    store = FeatureStore(root, initial_capacity=2)
+    for i in range(n):
+        store.put(f'{prefix}-{i}', vector(i))
+
+
+def test_processes_do_not_overwrite_each_others_rows(tmp_path):
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_put_many, args=(str(tmp_path), prefix, 200)) for prefix in 'abcd']
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    store = FeatureStore(str(tmp_path))
+    for prefix in 'abcd':
+        for i in range(200):
+            np.testing.assert_array_equal(store.get(f'{prefix}-{i}'), vector(i))
+
+
+def test_eviction_frees_slots_for_reuse(tmp_path):
+    store = FeatureStore(str(tmp_path), max_bytes=3 * 153 * 4, initial_capacity=2)
+    for i in range(10):
+        store.put(f'entry-{i}', vector(i))
+    assert store.get('entry-0') is None
+    np.testing.assert_array_equal(store.get('entry-9'), vector(9))
+    assert store.stats()['entries'] == 3
+
+
+def test_windows_evicted_by_another_process_are_a_miss(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    store.put_windows('night', np.arange(3.0), np.ones((3, 153)), 30.0)
+    start_seconds, features, duration = store.get_windows('night')
+    assert (start_seconds.tolist(), features.shape, duration) == ([0.0, 1.0, 2.0], (3, 153), 30.0)
+    # Another process's eviction removes the file between this process's lookups
+    FeatureStore(str(tmp_path), max_bytes=0).put_windows('other', np.arange(1.0), np.ones((1, 153)), 10.0)
+    misses = store.misses
+    assert store.get_windows('night') is None
+    assert store.misses == misses + 1
@@ -0,0 +1,32 @@
+import os
+
+from model_registry import ModelRegistry
+
+
+def test_watched_artifact_reloads_after_a_change(tmp_path):
+    loads = []
+    registry = ModelRegistry()
+    registry.register('model', loader=lambda: loads.append(len(loads)) or len(loads), watch=str(tmp_path))
+    assert registry.get('model') == registry.get('model') == 1
+
+    (tmp_path / 'v2.json').write_text('{}')
+    os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 1))
+    assert registry.get('model') == registry.get('model') == 2
+
+
+def test_missing_watched_path_reloads_once_created(tmp_path):
+    loads = []
+    registry = ModelRegistry()
+    registry.register('model', loader=lambda: loads.append(len(loads)) or len(loads), watch=str(tmp_path / 'models'))
+    assert registry.get('model') == registry.get('model') == 1
+    (tmp_path / 'models').mkdir()
+    assert registry.get('model') == 2
+
+
+def test_unwatched_artifact_loads_once():
+    loads = []
+    registry = ModelRegistry()
+    registry.register('model', loader=lambda: loads.append(len(loads)) or len(loads))
+    registry.get('model')
+    registry.get('model')
+    assert loads == [0]
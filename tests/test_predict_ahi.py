@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import predict_ahi
+
+FINAL_DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final_dataset.csv')
+COLUMNS = ['user_id', 'night_id', 'Patient_ID', 'age', 'sex', 'height', 'weight', 'pulse', 'BPsys/BPdia', 'ODI',
+           'NAp', 'NHyp', 'AI', 'HI', 'AHI']
+
+
+def write_nights(path, rows):
+    rows.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+
+@pytest.fixture(scope='module')
+def nights():
+    final = pd.read_csv(FINAL_DATASET, dtype=str, keep_default_na=False)
+    return final[COLUMNS]
+
+
+def test_every_night_gets_its_own_key():
+    _, _, keys = predict_ahi.load_training_data(FINAL_DATASET)
+    assert len(np.unique(keys)) == len(keys)
+
+
+def test_rows_without_ids_are_keyed_by_their_values():
+    data = pd.DataFrame({'user_id': [1.0, 1.0, None, None, None], 'night_id': [2.0, 2.0, None, None, None],
+                         'AHI': [5.0, 6.0, 5.0, 6.0, 5.0]})
+    keys = predict_ahi.night_keys(data)
+    assert keys[0] == keys[1]  # the same night, re-measured
+    assert len({keys[1], keys[2], keys[3]}) == 3
+    assert keys[2] == keys[4]  # an identical row
+
+
+def test_update_trains_on_new_nights_without_ids(tmp_path, nights):
+    data, directory = str(tmp_path / 'patients.csv'), str(tmp_path / 'models')
+    without_ids = nights[nights['user_id'] == '']
+    write_nights(data, pd.concat([nights[nights['user_id'] != ''], without_ids[:100]]))
+    first = predict_ahi.train(data, directory, n_estimators=10, n_jobs=1)
+    assert first['training_rows'] == 180
+
+    write_nights(data, without_ids[100:150])
+    update = predict_ahi.train(data, directory, n_estimators=10, n_jobs=1)
+    assert (update['mode'], update['new_rows'], update['training_rows']) == ('incremental', 50, 230)
+    assert predict_ahi.train(data, directory, n_jobs=1)['version'] == update['version']
+
+
+def test_artifacts_are_saved_uncompressed(tmp_path, nights):
+    data = str(tmp_path / 'patients.csv')
+    write_nights(data, nights[:100])
+    manifest = predict_ahi.train(data, str(tmp_path / 'models'), n_estimators=5, n_jobs=1)
+    assert 'compress' not in manifest
+    model = predict_ahi.load_artifact(manifest, mmap_mode='r')
+    assert len(model.estimators_) == 5
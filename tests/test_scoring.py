@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_predict import predict_batch
+from scoring import (AGE_EDGES, BMI_EDGES, OXYGEN_EDGES, PULSE_EDGES, QUALITY_EDGES, RECOMMENDATION_EDGES,
+                     SEVERITY_EDGES, calculate_sleep_quality, calculate_sleep_quality_array,
+                     get_doctor_recommendation, get_doctor_recommendation_array, get_severity_level,
+                     get_severity_level_array, get_weight_category, get_weight_category_array, predict_ahi,
+                     predict_ahi_array, round_half_array)
+
+
+def patients(n, seed):
+    """Random vitals, a share of them exactly on the rule thresholds or a hair either side."""
+    rng = np.random.default_rng(seed)
+    columns = {
+        'bmi': rng.uniform(15, 55, n).round(2),
+        'oxygen_saturation': rng.uniform(80, 100, n),
+        'snore_score': rng.uniform(0, 10, n),
+        'age': rng.integers(18, 90, n).astype(float),
+        'pulse_rate': rng.uniform(45, 120, n),
+    }
+    edges = {'bmi': BMI_EDGES, 'oxygen_saturation': OXYGEN_EDGES, 'age': AGE_EDGES, 'pulse_rate': PULSE_EDGES}
+    for name, values in edges.items():
+        on_edge = rng.random(n) < 0.3
+        columns[name][on_edge] = (rng.choice(values, on_edge.sum()) +
+                                  rng.choice([-1e-9, 0, 0, 1e-9], on_edge.sum()))
+    return columns
+
+
+def edge_values(edges, low, high):
+    """Each threshold, its float neighbours and the ends of the range."""
+    values = [low, high, 0.0]
+    for edge in edges:
+        values += [np.nextafter(edge, -np.inf), float(edge), np.nextafter(edge, np.inf)]
+    return np.array(values)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_predict_ahi_array_matches_scalar(seed):
+    c = patients(5000, seed)
+    ahi = predict_ahi_array(c['bmi'], c['oxygen_saturation'], c['snore_score'], c['age'], c['pulse_rate'])
+    expected = [predict_ahi(*row) for row in zip(c['bmi'], c['oxygen_saturation'], c['snore_score'], c['age'],
+                                                  c['pulse_rate'])]
+    np.testing.assert_array_equal(ahi, expected)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_sleep_quality_array_matches_scalar(seed):
+    c = patients(5000, seed)
+    ahi = predict_ahi_array(c['bmi'], c['oxygen_saturation'], c['snore_score'], c['age'], c['pulse_rate'])
+    quality = calculate_sleep_quality_array(ahi, c['snore_score'], c['oxygen_saturation'], c['pulse_rate'])
+    expected = [calculate_sleep_quality(*row) for row in zip(ahi, c['snore_score'], c['oxygen_saturation'],
+                                                              c['pulse_rate'])]
+    assert quality.tolist() == expected
+
+
+def test_sleep_quality_array_on_score_thresholds():
+    # With snoring 0, oxygen 100 and pulse 60 the total score is 0.4 * (100 - 2 * ahi) + 70
+    ahi = (100 - (np.array(QUALITY_EDGES, dtype=float) - 70) / 0.4) / 2
+    ahi = ahi[(ahi >= 0) & (ahi <= 50)]
+    n = len(ahi)
+    quality = calculate_sleep_quality_array(ahi, np.zeros(n), np.full(n, 100.0), np.full(n, 60.0))
+    assert quality.tolist() == [calculate_sleep_quality(a, 0.0, 100.0, 60.0) for a in ahi]
+
+
+@pytest.mark.parametrize('function, array_function, edges', [
+    (get_severity_level, get_severity_level_array, SEVERITY_EDGES),
+    (get_doctor_recommendation, get_doctor_recommendation_array, RECOMMENDATION_EDGES),
+])
+def test_ahi_ladders_match_scalar(function, array_function, edges):
+    rng = np.random.default_rng(0)
+    ahi = np.concatenate([edge_values(edges, 0.0, 100.0), rng.uniform(0, 60, 2000).round(1)])
+    assert array_function(ahi).tolist() == [function(value) for value in ahi]
+
+
+def test_weight_category_array_matches_scalar():
+    rng = np.random.default_rng(0)
+    bmi = np.concatenate([edge_values(BMI_EDGES, 10.0, 80.0), rng.uniform(15, 55, 2000).round(2)])
+    assert get_weight_category_array(bmi).tolist() == [get_weight_category(value) for value in bmi]
+
+
+def test_round_half_array_matches_round():
+    values = np.concatenate([np.arange(0, 100, 0.05), np.random.default_rng(0).uniform(0, 100, 5000)])
+    assert round_half_array(values, 1).tolist() == [round(value, 1) for value in values]
+    assert round_half_array(values, 2).tolist() == [round(value, 2) for value in values]
+
+
+def test_batch_rejects_missing_values():
+    # NaN falls on the bottom rung of the scalar ladders but the top bin of np.digitize
+    batch = pd.DataFrame({'age': [52, 40], 'gender': ['male', 'female'], 'weight': [96, None],
+                          'height': [178, 165], 'oxygen_saturation': [91, 97], 'pulse': [84, 70],
+                          'BPsys': [138, 120], 'BPdia': [88, 80]})
+    with pytest.raises(ValueError, match='row 1: weight'):
+        predict_batch(batch, advisor=None)
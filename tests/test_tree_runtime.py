@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier, RandomForestRegressor
+
+from tree_runtime import CompiledTrees
+
+
+def training_data(n=400, seed=0, missing=True):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, 4))
+    y = (X[:, 0] + 0.5 * X[:, 1] - X[:, 2] * X[:, 3] > 0).astype(int) + (X[:, 1] > 1)
+    if missing:
+        # Missing values in training, so the splits learn which side NaN goes to
+        X[rng.random(X.shape) < 0.1] = np.nan
+    return X, y
+
+
+def probe(model, n=2000, seed=1, missing=True):
+    """Random rows, rows with every split threshold of the first tree, and (with missing=True) rows with NaN."""
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, model.n_features_in_))
+    tree = np.ravel(model.estimators_)[0].tree_
+    # Splits that only separate missing values have an infinite threshold
+    split = (tree.children_left >= 0) & np.isfinite(tree.threshold)
+    on_threshold = np.tile(X[:1], (split.sum(), 1))
+    on_threshold[np.arange(split.sum()), tree.feature[split]] = tree.threshold[split]
+    if not missing:
+        return np.vstack([X, on_threshold])
+    with_nan = X[:200].copy()
+    with_nan[rng.random(with_nan.shape) < 0.3] = np.nan
+    all_nan = np.full((1, model.n_features_in_), np.nan)
+    return np.vstack([X, on_threshold, with_nan, all_nan])
+
+
+def boosting(n_classes):
+    """A gradient boosting classifier on `n_classes` classes (GradientBoosting does not take NaN)."""
+    X, y = training_data(missing=False)
+    y = np.minimum(y, n_classes - 1)
+    return GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0).fit(X, y)
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    X, y = training_data()
+    return RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0).fit(X, y)
+
+
+@pytest.fixture(scope='module')
+def regressor():
+    X, y = training_data()
+    target = y + np.nan_to_num(X[:, 0]).clip(-1, 1)
+    return RandomForestRegressor(n_estimators=15, max_depth=6, random_state=0).fit(X, target)
+
+
+def test_classifier_predictions_match_sklearn(classifier):
+    compiled = CompiledTrees.from_sklearn(classifier)
+    X = probe(classifier)
+    np.testing.assert_array_equal(compiled.predict(X), classifier.predict(X))
+    np.testing.assert_allclose(compiled.predict_proba(X), classifier.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_regressor_predictions_match_sklearn(regressor):
+    compiled = CompiledTrees.from_sklearn(regressor)
+    X = probe(regressor)
+    np.testing.assert_allclose(compiled.predict(X), regressor.predict(X), rtol=1e-12, atol=1e-12)
+
+
+def test_single_rows_match_sklearn(classifier):
+    compiled = CompiledTrees.from_sklearn(classifier)
+    for row in probe(classifier, n=20)[::7]:
+        assert compiled.predict(row[None]) == classifier.predict(row[None])
+
+
+def test_saved_copy_predicts_the_same(classifier, tmp_path):
+    compiled = CompiledTrees.from_sklearn(classifier)
+    compiled.save(tmp_path / 'model.compiled.npz')
+    X = probe(classifier)
+    np.testing.assert_array_equal(CompiledTrees.load(tmp_path / 'model.compiled.npz').predict(X),
+                                  classifier.predict(X))
+
+
+@pytest.mark.parametrize('n_classes', [2, 3])
+def test_boosting_predictions_match_sklearn(n_classes):
+    model = boosting(n_classes)
+    compiled = CompiledTrees.from_sklearn(model)
+    X = probe(model, missing=False)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('n_classes', [2, 3])
+def test_boosting_zero_decision_matches_sklearn(n_classes):
+    # Balanced classes give an initial prediction of exactly 0 per class; with every leaf
+    # zeroed the decision stays 0, where binary sklearn picks the positive class and
+    # multiclass ties go to the first class
+    X = np.random.default_rng(0).standard_normal((60, 3))
+    model = GradientBoostingClassifier(n_estimators=3, random_state=0).fit(X, np.arange(60) % n_classes)
+    for tree in model.estimators_.ravel():
+        tree.tree_.value[:] = 0
+    compiled = CompiledTrees.from_sklearn(model)
+    assert not model.decision_function(X).any()
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))